@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+BACKUP STORE
+Content-addressed backups of the Planningstabel workbook
+
+Each backup hashes the workbook and keeps one blob per distinct content in
+<store>/blobs/<sha256>.xlsx; index.json records which file was backed up
+when. Backing up an unchanged workbook only costs the hash. Blobs are
+reflinked (copy-on-write) where the filesystem supports it and copied
+otherwise - never hard-linked to the workbook itself, which Excel or a
+script may later rewrite in place.
+
+Usage:
+    python backup_store.py list
+    python backup_store.py restore 3f9a2c --to Planningstabel_2_0__2_.xlsx
+    python backup_store.py prune --keep 10 --max-age-days 90
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+DEFAULT_STORE_DIR = '.excel_backups'
+
+# Linux ioctl that clones a file's extents (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def clone_file(source, target):
+    """Copy-on-write clone where supported, else a plain copy"""
+    try:
+        import fcntl
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return 'reflink'
+    except (ImportError, OSError):
+        shutil.copyfile(source, target)
+        return 'copy'
+
+
+class BackupStore:
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self.blob_dir = self.store_dir / 'blobs'
+        self.index_path = self.store_dir / 'index.json'
+
+    def load_index(self):
+        if not self.index_path.exists():
+            return []
+        return json.loads(self.index_path.read_text(encoding='utf-8'))
+
+    def save_index(self, entries):
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(entries, indent=1), encoding='utf-8')
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, digest, suffix='.xlsx'):
+        return self.blob_dir / f"{digest}{suffix}"
+
+    def backup(self, path):
+        """Record a backup of path, storing its content only if it is new
+
+        Returns the index entry; entry['stored'] says how the content was
+        written ('reflink', 'copy') or 'existing' when it was already there.
+        """
+        path = Path(path)
+        digest = file_digest(path)
+        blob = self.blob_path(digest, path.suffix)
+
+        stored = 'existing'
+        if not blob.exists():
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            tmp_blob = blob.with_suffix('.tmp')
+            stored = clone_file(path, tmp_blob)
+            os.replace(tmp_blob, blob)
+
+        entry = {
+            'digest': digest,
+            'source': str(path.resolve()),
+            'size': path.stat().st_size,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'blob': blob.name
+        }
+        entries = self.load_index()
+        entries.append(entry)
+        self.save_index(entries)
+        return {**entry, 'stored': stored}
+
+    def find(self, ref):
+        """The newest entry whose digest starts with ref"""
+        matches = [entry for entry in self.load_index() if entry['digest'].startswith(ref)]
+        if not matches:
+            raise KeyError(f"No backup matching '{ref}'")
+        if len({entry['digest'] for entry in matches}) > 1:
+            raise KeyError(f"'{ref}' matches more than one backup, give more of the hash")
+        return matches[-1]
+
+    def restore(self, ref, target=None):
+        """Write a backup back to target (default: where it came from)
+
+        The file being replaced is backed up first, so a restore can itself
+        be undone.
+        """
+        entry = self.find(ref)
+        target = Path(target or entry['source'])
+        if target.exists():
+            self.backup(target)
+        tmp_path = target.with_name(f".{target.name}.tmp")
+        shutil.copyfile(self.blob_path(entry['digest'], Path(entry['blob']).suffix), tmp_path)
+        os.replace(tmp_path, target)
+        return entry, target
+
+    def prune(self, keep=None, max_age_days=None):
+        """Drop old index entries, then blobs no entry refers to
+
+        keep is the number of newest entries kept per source file; entries
+        older than max_age_days are dropped unless they are a source's
+        newest. Returns (entries removed, blobs removed, bytes freed).
+        """
+        entries = self.load_index()
+        cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days is not None else None
+
+        by_source = {}
+        for entry in entries:
+            by_source.setdefault(entry['source'], []).append(entry)
+
+        kept = []
+        for source_entries in by_source.values():
+            newest_first = source_entries[::-1]
+            for rank, entry in enumerate(newest_first):
+                if rank > 0 and keep is not None and rank >= keep:
+                    continue
+                if rank > 0 and cutoff and datetime.fromisoformat(entry['created']) < cutoff:
+                    continue
+                kept.append(entry)
+        kept.sort(key=lambda entry: entry['created'])
+        self.save_index(kept)
+
+        referenced = {entry['blob'] for entry in kept}
+        blobs_removed = 0
+        freed = 0
+        if self.blob_dir.exists():
+            for blob in self.blob_dir.iterdir():
+                if blob.name not in referenced:
+                    freed += blob.stat().st_size
+                    blob.unlink()
+                    blobs_removed += 1
+        return len(entries) - len(kept), blobs_removed, freed
+
+    def disk_usage(self):
+        if not self.blob_dir.exists():
+            return 0
+        return sum(blob.stat().st_size for blob in self.blob_dir.iterdir())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List, restore and prune workbook backups')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help=f'Backup store directory (default: {DEFAULT_STORE_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help='Show the backups, newest last')
+    list_parser.add_argument('--source', help='Only backups of this file')
+
+    restore_parser = commands.add_parser('restore', help='Restore a backup by (a prefix of) its hash')
+    restore_parser.add_argument('ref', help='Hash or hash prefix, as shown by list')
+    restore_parser.add_argument('--to', help='Restore to this path (default: the file it was taken from)')
+
+    prune_parser = commands.add_parser('prune', help='Drop old backups and unreferenced blobs')
+    prune_parser.add_argument('--keep', type=int, help='Newest backups kept per file')
+    prune_parser.add_argument('--max-age-days', type=int, help='Drop backups older than this (the newest per file is always kept)')
+
+    args = parser.parse_args()
+    store = BackupStore(args.store)
+
+    if args.command == 'list':
+        entries = store.load_index()
+        if args.source:
+            entries = [entry for entry in entries if entry['source'] == str(Path(args.source).resolve())]
+        for entry in entries:
+            print(f"{entry['digest'][:12]}  {entry['created']}  {entry['size'] / 1024:8.0f} KB  {entry['source']}")
+        blobs = len({entry['blob'] for entry in entries})
+        print(f"\n📦 {len(entries)} backups, {blobs} distinct, {store.disk_usage() / 1024 / 1024:.1f} MB on disk")
+
+    elif args.command == 'restore':
+        try:
+            entry, target = store.restore(args.ref, args.to)
+        except KeyError as e:
+            print(f"❌ Error: {e.args[0]}")
+            return 1
+        print(f"✅ Restored {entry['digest'][:12]} ({entry['created']}) to {target}")
+
+    elif args.command == 'prune':
+        if args.keep is None and args.max_age_days is None:
+            print("❌ Error: give --keep and/or --max-age-days")
+            return 1
+        entries, blobs, freed = store.prune(args.keep, args.max_age_days)
+        print(f"🧹 Removed {entries} backups and {blobs} blobs ({freed / 1024 / 1024:.1f} MB freed)")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
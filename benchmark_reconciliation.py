@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+RECONCILIATION BENCHMARK
+Times every stage of the four reconciliation scripts on synthetic data
+
+Generates (or reuses) data from generate_synthetic_data.py at each size and
+times the load, match, compare and write stages of CustomerMatcher,
+ExcelUpdater, DataReconciliation and ReconciliationReport. The best of
+--repeat runs is reported per stage. tests/test_benchmark.py times the same
+stages with pytest-benchmark.
+
+Usage:
+    python benchmark_reconciliation.py --rows 1000 10000 100000 --json benchmark_results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from data_reconciliation import DataReconciliation
+from fuzzy_match_customers import CustomerMatcher, MATCH_ROUTES
+from generate_reconciliation_report import ReconciliationReport
+from generate_synthetic_data import generate
+from update_excel_customers import ExcelUpdater
+
+RECONCILIATION_ROUTES = [
+    'rijnsburg_morning', 'aalsmeer_morning', 'naaldwijk_morning',
+    'rijnsburg_evening', 'aalsmeer_evening', 'naaldwijk_evening'
+]
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+        self.errors = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a stage, silencing the scripts' progress output"""
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+        self.timings[name] = time.perf_counter() - start
+
+    def run(self, name, bench, *args):
+        """Run one script's benchmark, recording a failure instead of aborting"""
+        try:
+            return bench(*args)
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            return None
+
+
+def bench_matcher(timer, api_path, excel_path, work_dir):
+    matcher = CustomerMatcher()
+    with timer.stage('matcher.load_api_customers'):
+        matcher.load_api_customers(api_path)
+    with timer.stage('matcher.load_excel_customers'):
+        matcher.load_excel_customers(excel_path)
+    with timer.stage('matcher.match_customers'):
+        matcher.match_customers()
+    mapping_path = work_dir / 'customer_mapping.csv'
+    with timer.stage('matcher.save_mapping'):
+        matcher.save_mapping(mapping_path)
+    return mapping_path
+
+
+def bench_updater(timer, excel_path, mapping_path, work_dir):
+    updated_path = work_dir / 'Planningstabel_UPDATED.xlsx'
+    shutil.copy2(excel_path, updated_path)
+    updater = ExcelUpdater(updated_path, mapping_path)
+    with timer.stage('updater.load_mapping'):
+        updater.load_mapping()
+    with timer.stage('updater.update_excel'):
+        updater.update_excel(auto_update_high_confidence=True, review_required=False)
+    return updated_path
+
+
+def bench_reconciliation(timer, api_path, excel_path, work_dir):
+    reconciler = DataReconciliation(str(excel_path), str(api_path), '2026-02-09')
+    with timer.stage('reconciliation.load_excel_data'):
+        reconciler.load_excel_data()
+    with timer.stage('reconciliation.load_api_data'):
+        reconciler.load_api_data()
+    with timer.stage('reconciliation.compare_routes'):
+        for route_key in RECONCILIATION_ROUTES:
+            reconciler.compare_route(route_key)
+    with timer.stage('reconciliation.generate_report'):
+        reconciler.generate_report(str(work_dir / 'reconciliation_report.xlsx'))
+
+
+def bench_report(timer, api_path, excel_before, excel_after, work_dir):
+    reporter = ReconciliationReport()
+    with timer.stage('report.load_api_data'):
+        reporter.load_api_data(api_path)
+    with timer.stage('report.load_excel_data'):
+        before = reporter.load_excel_data(excel_before, 'Excel (Before)')
+        after = reporter.load_excel_data(excel_after, 'Excel (After)')
+    with timer.stage('report.count_matches'):
+        for route in MATCH_ROUTES:
+            reporter.count_matches(before.get(route, []), reporter.api_stats.get(route, []))
+            reporter.count_matches(after.get(route, []), reporter.api_stats.get(route, []))
+    with timer.stage('report.generate_report'):
+        reporter.generate_report(api_path, excel_before, excel_after, str(work_dir / 'before_after_report.xlsx'))
+
+
+def run_benchmark(rows, data_dir, seed=42):
+    """Run every stage once for one data size, returning (timings, errors)"""
+    api_path = Path(data_dir) / f'api_orders_export_{rows}.csv'
+    excel_path = Path(data_dir) / f'Planningstabel_{rows}.xlsx'
+    if not api_path.exists() or not excel_path.exists():
+        api_path, excel_path = generate(rows, data_dir, seed)
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        mapping_path = timer.run('matcher', bench_matcher, timer, str(api_path), str(excel_path), work_dir)
+        updated_path = None
+        if mapping_path:
+            updated_path = timer.run('updater', bench_updater, timer, excel_path, mapping_path, work_dir)
+        timer.run('reconciliation', bench_reconciliation, timer, api_path, excel_path, work_dir)
+        timer.run('report', bench_report, timer, str(api_path), str(excel_path), str(updated_path or excel_path), work_dir)
+    return timer.timings, timer.errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the reconciliation scripts on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='API export sizes (default: 1000 10000 100000)')
+    parser.add_argument('--output-dir', '--data-dir', dest='data_dir', default='synthetic_data', help='Where synthetic data is generated/reused, as generate_synthetic_data.py --output-dir (default: synthetic_data)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per size; the best time per stage is kept (default: 1)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for generated data (default: 42)')
+    parser.add_argument('--json', help='Write results to this JSON file')
+
+    args = parser.parse_args()
+
+    print("="*80)
+    print("RECONCILIATION BENCHMARK")
+    print("="*80)
+
+    results = {}
+    failures = {}
+    for rows in args.rows:
+        print(f"\n⏱️  {rows} rows...")
+        best = {}
+        errors = {}
+        for _ in range(args.repeat):
+            timings, run_errors = run_benchmark(rows, args.data_dir, args.seed)
+            for stage, seconds in timings.items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+            errors.update(run_errors)
+        results[rows] = best
+        if errors:
+            failures[rows] = errors
+
+        for stage, seconds in best.items():
+            print(f"   {stage:40} {seconds:9.3f}s")
+        for script, error in errors.items():
+            print(f"   ❌ {script} failed: {error}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({str(rows): timings for rows, timings in results.items()}, f, indent=2)
+        print(f"\n💾 Saved results to: {args.json}")
+
+    if failures:
+        print(f"\n❌ {sum(len(errors) for errors in failures.values())} script run(s) failed, timings are incomplete")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+CART ENGINE
+FUST, carts and trucks for whole days of order rows, mirroring js/cart-calculation.js
+
+Port of calculateBundlesPerFust(), calculateFustForOrderrow(),
+calculateCartsForPeriod(), calculateCarts() and calculateTrucks(), with
+getCartCapacity() and usesDanishCarts() from js/route-mapping.js. Order rows
+are flattened into one frame and computed column-wise: the bundles-per-FUST
+priority chain (L11/L13 -> nr_base_product -> bundles_per_fust > 1 ->
+default 5) is a set of masks, and FUST is summed per route, FUST type and cart
+type with one bincount per cart type. Sums run in row order like the JS loop,
+so the totals agree to the last bit and not only to a rounding.
+
+Raw API order rows are enriched with customer names and their delivery
+location's route first, like js/api.js does, and get their period as
+separateOrdersByClientMatch() decides it (florinet_orders.iter_orders).
+Rows that already carry a route and period keep them. The route stays the
+delivery location's: the client-name route mapping is not applied.
+The JS behaviours that look odd are kept on purpose (see carts_from_fust):
+this engine reproduces what the dashboard shows.
+
+--check-js runs the JS itself under node on generated rows and compares
+both results.
+
+Usage:
+    python cart_engine.py orderrows_2026-02-09.json --output carts_2026-02-09.csv
+    python cart_engine.py --check-js
+"""
+
+import argparse
+import json
+import math
+import re
+import shutil
+import subprocess
+import tempfile
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from florinet_orders import ROUTE_DISPLAY_NAMES, iter_orders, js_or, js_parse_int_value, js_string_value, js_truthy
+
+# Routes calculateCartsForPeriod() seeds its FUST maps with, in its order
+ROUTES = ['aalsmeer', 'naaldwijk', 'rijnsburg']
+
+# Fallback route from delivery_location_id (LOCATION_ID_TO_ROUTE)
+LOCATION_ID_TO_ROUTE = {'32': 'aalsmeer', '34': 'naaldwijk', '36': 'rijnsburg'}
+DEFAULT_ROUTE = 'rijnsburg'
+
+DEFAULT_FUST_TYPE = '612'
+DEFAULT_BUNDLES_PER_FUST = 5
+STEMS_PER_BUNDLE = 10  # nr_base_product is stems per container
+CARTS_PER_TRUCK = 17
+
+# getCartCapacity() in js/route-mapping.js
+DANISH_CART_CAPACITY = {'902': 24, '996': 32, '612': 68, '614': 68}
+DEFAULT_DANISH_CAPACITY = 24
+STANDARD_CART_CAPACITY = {'612': 72, '614': 72, '575': 32, '902': 40, '588': 40, '996': 32, '856': 20, '821': 40}
+DEFAULT_STANDARD_CAPACITY = 72
+
+# CART_CAPACITIES in js/data.js, which calculateCartsNeeded() in js/carts.js uses per order
+ORDER_CART_CAPACITY = {'612': 72, '575': 32, '902': 40, '588': 40, '996': 32, '856': 20}
+ORDER_DANISH_CAPACITY = 24
+
+# DANISH_CART_CLIENTS in js/route-mapping.js
+DANISH_CART_CLIENTS = ['Superflora', 'Flamingo', 'Flamingo Flowers', 'Flower Trade Consult', 'MM Flowers', 'Dijk Flora', 'Dijkflora']
+
+# calculateBundlesPerFust() methods, plus 'zero' for rows without an assembly amount
+METHODS = ['L11_L13', 'nr_base_product', 'bundles_per_fust', 'default_5', 'zero']
+
+# Flat order row layout; the values are the raw JS values, before parseInt()
+ORDERROW_COLUMNS = [
+    'order_id', 'customer_name', 'customer_id', 'delivery_location_id', 'route', 'period',
+    'assembly_amount', 'fust_type', 'l11', 'l13', 'nr_base_product', 'bundles_per_fust'
+]
+
+# infer_dtype() results that cannot include booleans
+CLEAN_INFERRED_TYPES = {'empty', 'string', 'integer', 'floating', 'mixed-integer-float', 'decimal'}
+# Keys a JS object lists first, in ascending numeric order (array indices)
+_ARRAY_INDEX = re.compile(r'0|[1-9]\d*')
+
+
+def distinct_values(values):
+    """(codes, distinct values) of a column, or None if it mixes booleans in
+
+    pandas takes True for 1 when it hashes values, String() does not, so such
+    a column is converted value by value instead.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    if uniques.dtype == object and pd.api.types.infer_dtype(uniques, skipna=True) not in CLEAN_INFERRED_TYPES:
+        if any(isinstance(value, (bool, np.bool_)) for value in uniques):
+            return None
+    return codes, uniques
+
+
+def map_distinct(values, func, dtype=object):
+    """func of every value, called once per distinct value"""
+    factorized = distinct_values(values)
+    if factorized is None:
+        return np.array([func(value) for value in values], dtype=dtype)
+    codes, uniques = factorized
+    return np.array([func(value) for value in uniques], dtype=dtype)[codes]
+
+
+def is_number_column(values):
+    return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+
+def js_strings(values):
+    """String() of every value, missing values as None"""
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values) and not values.hasnans:
+        return pd.Series(values.to_numpy().astype(str), index=values.index, dtype=object)
+    return pd.Series(map_distinct(values, js_string_value), index=values.index, dtype=object)
+
+
+def js_truthy_mask(values):
+    """Boolean mask of the values JavaScript treats as truthy"""
+    values = pd.Series(values)
+    if pd.api.types.is_bool_dtype(values):
+        return values.fillna(False).to_numpy(dtype=bool)
+    if pd.api.types.is_numeric_dtype(values):
+        return (values.notna() & (values != 0)).to_numpy(dtype=bool)
+    if pd.api.types.is_string_dtype(values) and values.dtype != object:
+        return (values.notna() & (values != '')).to_numpy(dtype=bool)
+    return map_distinct(values, js_truthy, bool)
+
+
+def js_number_value(value):
+    """`value || 0` coerced to a number the way `>` and `/` coerce it"""
+    if not js_truthy(value):
+        return 0.0
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return 0.0
+        try:
+            return float(text) if text.lower().lstrip('+-') not in ('inf', 'nan', 'infinity') else math.nan
+        except ValueError:
+            return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def js_numbers(values):
+    """`value || 0` of every value as float64 (NaN where JS gets NaN)"""
+    values = pd.Series(values)
+    if is_number_column(values):
+        return values.astype(float).fillna(0).to_numpy()
+    return map_distinct(values, js_number_value, float)
+
+
+def js_parse_int(values):
+    """parseInt() of every value as float64"""
+    values = pd.Series(values)
+    if is_number_column(values):
+        return np.trunc(values.astype(float).to_numpy())
+    return map_distinct(values, js_parse_int_value, float)
+
+
+def js_to_fixed2(value):
+    """parseFloat(value.toFixed(2)): half-up on the exact binary value"""
+    return float(Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+def js_key_order(keys):
+    """Keys in the order a JS object lists them: array indices ascending, then insertion order"""
+    keys = list(keys)
+    indices = sorted((key for key in keys if _ARRAY_INDEX.fullmatch(key) and int(key) < 2**32 - 1), key=int)
+    index_set = set(indices)
+    return indices + [key for key in keys if key not in index_set]
+
+
+def property_value(properties, code, default):
+    """`p?.pivot?.value || p?.value || default` of the first property with code; None if absent"""
+    for prop in properties:
+        if prop.get('code') == code:
+            return js_or((prop.get('pivot') or {}).get('value'), prop.get('value'), default)
+    return None
+
+
+def orderrow_record(row):
+    """One order row record as a flat ORDERROW_COLUMNS dict"""
+    order = row.get('order') or {}
+    properties = row.get('properties') or []
+    return {
+        'order_id': js_or(row.get('order_id'), order.get('id'), order.get('order_id'), row.get('id')),
+        'customer_name': js_or(row.get('customer_name'), order.get('customer_name'), ''),
+        'customer_id': js_or(row.get('customer_id'), order.get('customer_id')),
+        'delivery_location_id': js_or(row.get('delivery_location_id'), order.get('delivery_location_id')),
+        'route': row.get('route'),
+        'period': row.get('period'),
+        'assembly_amount': row.get('assembly_amount'),
+        'fust_type': property_value(properties, '901', DEFAULT_FUST_TYPE) or DEFAULT_FUST_TYPE,
+        'l11': property_value(properties, 'L11', '0'),
+        'l13': property_value(properties, 'L13', '0'),
+        'nr_base_product': row.get('nr_base_product'),
+        'bundles_per_fust': row.get('bundles_per_fust')
+    }
+
+
+def orderrow_frame(records):
+    """Flatten order row records (api/orderrows.js payloads) into one frame"""
+    return pd.DataFrame.from_records((orderrow_record(row) for row in records), columns=ORDERROW_COLUMNS)
+
+
+def read_orderrows(path, lookup_dir=None):
+    """Order rows from JSON/JSONL records, or a CSV/Parquet file already in the flat layout
+
+    Raw API records are enriched first (florinet_orders.iter_orders), as the
+    dashboard does before it calculates carts.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == '.parquet':
+        return pd.read_parquet(path)
+    if suffix == '.csv':
+        return pd.read_csv(path, dtype=object)
+    return orderrow_frame(iter_orders(path, lookup_dir))
+
+
+def bundles_per_fust(df):
+    """calculateBundlesPerFust() of every row: (bundles per FUST, method)"""
+    l11 = js_parse_int(df['l11'])
+    l13 = js_parse_int(df['l13'])
+    nr_base_product = js_parse_int(df['nr_base_product'])
+    bundles = js_parse_int(df['bundles_per_fust'])
+
+    # Each step only applies where no earlier one did; NaN compares False
+    by_l11_l13 = (l11 > 0) & (l13 > 0)
+    by_nr_base_product = ~by_l11_l13 & (nr_base_product > 0)
+    by_bundles = ~by_l11_l13 & ~by_nr_base_product & (bundles > 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.select(
+            [by_l11_l13, by_nr_base_product, by_bundles],
+            [l13 / l11, nr_base_product / STEMS_PER_BUNDLE, bundles],
+            DEFAULT_BUNDLES_PER_FUST
+        ).astype(float)
+    methods = np.select([by_l11_l13, by_nr_base_product, by_bundles], METHODS[:3], METHODS[3])
+    return values, methods
+
+
+def fust_per_row(df):
+    """calculateFustForOrderrow() of every row: bundles_per_fust, fust and method columns"""
+    assembly = js_numbers(df['assembly_amount'])
+    values, methods = bundles_per_fust(df)
+    zero = assembly == 0
+    return pd.DataFrame({
+        'bundles_per_fust': np.where(zero, 0.0, values),
+        'fust': np.where(zero, 0.0, assembly / values),
+        'method': np.where(zero, 'zero', methods)
+    }, index=df.index)
+
+
+def is_danish_client(name):
+    """usesDanishCarts(): the name contains a Danish cart client's name or is part of one"""
+    name = (js_string_value(name) or '').lower()
+    return bool(name) and any(client.lower() in name or name in client.lower() for client in DANISH_CART_CLIENTS)
+
+
+def uses_danish_carts(names):
+    """usesDanishCarts() of every customer name, checked once per distinct name"""
+    return map_distinct(pd.Series(names), is_danish_client, bool)
+
+
+def cart_capacity(fust_type, danish):
+    """getCartCapacity(): FUST of one type that fit on a Danish or standard cart"""
+    if danish:
+        return DANISH_CART_CAPACITY.get(fust_type, DEFAULT_DANISH_CAPACITY)
+    return STANDARD_CART_CAPACITY.get(fust_type, DEFAULT_STANDARD_CAPACITY)
+
+
+def calculate_trucks(total_carts):
+    """calculateTrucks(): 17 carts per truck"""
+    if not total_carts or total_carts <= 0:
+        return 0
+    return math.ceil(total_carts / CARTS_PER_TRUCK)
+
+
+def route_value(value):
+    """A row's own route as getRoute() reads it (lowercased), None if it has none"""
+    return js_string_value(value).lower() if js_truthy(value) else None
+
+
+def location_route(value):
+    """Route of a delivery_location_id, the fallback of getRoute()"""
+    return LOCATION_ID_TO_ROUTE.get(js_string_value(value), DEFAULT_ROUTE)
+
+
+def period_value(value):
+    """`order.period || 'morning'`"""
+    return js_string_value(value) if js_truthy(value) else 'morning'
+
+
+def row_routes(df):
+    """getRoute() of every row: its route lowercased, else the delivery location's route"""
+    routes = map_distinct(df['route'], route_value)
+    no_route = pd.isna(routes)
+    if no_route.any():
+        routes[no_route] = map_distinct(df['delivery_location_id'][no_route], location_route)
+    return routes
+
+
+def fust_type_value(value):
+    """getFustType()'s code as the object key the JS sums it under"""
+    return js_string_value(value) if js_truthy(value) else DEFAULT_FUST_TYPE
+
+
+def row_fust_types(df):
+    """getFustType() of every row"""
+    return map_distinct(df['fust_type'], fust_type_value)
+
+
+def fust_maps(routes, fust_types, fust, danish):
+    """FUST summed per route and type, as calculateCartsForPeriod()'s (standard, Danish) maps
+
+    Both maps start with the three routes; routes and types are added in
+    order of first appearance and listed in JS object key order. Each sum
+    adds its rows in row order, as the JS loop does.
+    """
+    route_codes, route_keys = pd.factorize(np.asarray(routes, dtype=object))
+    type_codes, type_keys = pd.factorize(np.asarray(fust_types, dtype=object))
+    groups = route_codes * len(type_keys) + type_codes
+    fust = np.asarray(fust, dtype=float)
+    danish = np.asarray(danish, dtype=bool)
+
+    maps = []
+    for side in (~danish, danish):
+        side_groups = groups[side]
+        sums = np.bincount(side_groups, weights=fust[side], minlength=len(route_keys) * len(type_keys))
+        present, first = np.unique(side_groups, return_index=True)
+        fust_map = {route: {} for route in ROUTES}
+        for group in present[np.argsort(first, kind='stable')]:
+            route, fust_type = route_keys[group // len(type_keys)], type_keys[group % len(type_keys)]
+            fust_map.setdefault(route, {})[fust_type] = float(sums[group])
+        maps.append({
+            route: {fust_type: fust_map[route][fust_type] for fust_type in js_key_order(fust_map[route])}
+            for route in js_key_order(fust_map)
+        })
+    return maps[0], maps[1]
+
+
+def carts_from_fust(standard, danish, period):
+    """Carts per route and FUST type from the FUST maps, as calculateCartsForPeriod() derives them
+
+    Kept as the JS has it: only the standard map's routes and types are
+    visited, so Danish FUST of a route/type without standard FUST gets no
+    cart, and the Danish FUST is subtracted from the standard FUST even
+    though the standard map never contained it.
+    """
+    period = period or 'morning'
+    carts_by_route = dict.fromkeys(ROUTES, 0)
+    total_standard = 0
+    total_danish = 0
+    breakdown = []
+
+    for route, fust_types in standard.items():
+        route_total = 0
+        route_standard = 0
+        route_danish = 0
+        fust_breakdown = []
+
+        for fust_type, total_fust in fust_types.items():
+            danish_fust = danish.get(route, {}).get(fust_type, 0)
+            standard_fust = total_fust - danish_fust
+
+            if danish_fust > 0:
+                capacity = cart_capacity(fust_type, True)
+                carts = math.ceil(danish_fust / capacity)
+                route_total += carts
+                route_danish += carts
+                fust_breakdown.append({'fustType': f"{fust_type} (Danish)", 'totalFust': js_to_fixed2(danish_fust), 'capacity': capacity, 'carts': carts})
+
+            if standard_fust > 0:
+                capacity = cart_capacity(fust_type, False)
+                carts = math.ceil(standard_fust / capacity)
+                route_total += carts
+                route_standard += carts
+                fust_breakdown.append({'fustType': f"{fust_type} (Standard)", 'totalFust': js_to_fixed2(standard_fust), 'capacity': capacity, 'carts': carts})
+
+        carts_by_route[route] = route_total
+        total_standard += route_standard
+        total_danish += route_danish
+        breakdown.append({
+            'route': ROUTE_DISPLAY_NAMES.get(route, route),
+            'routeKey': f"{route}_{period}",
+            'period': period,
+            'carts': route_total,
+            'standardCarts': route_standard,
+            'danishCarts': route_danish,
+            'fustBreakdown': fust_breakdown
+        })
+
+    total = total_standard + total_danish
+    return {
+        'period': period,
+        'total': total,
+        'standard': total_standard,
+        'danish': total_danish,
+        'trucks': calculate_trucks(total),
+        'byRoute': {ROUTE_DISPLAY_NAMES[route]: carts_by_route[route] for route in ROUTES},
+        'byRouteInternal': carts_by_route,
+        'breakdown': breakdown
+    }
+
+
+def unique_order_ids(order_ids):
+    """String() of the distinct truthy order ids"""
+    order_ids = pd.Series(order_ids)[js_truthy_mask(order_ids)]
+    factorized = distinct_values(order_ids)
+    return set(js_strings(order_ids if factorized is None else pd.Series(factorized[1])).to_numpy())
+
+
+def calculate_carts_for_period(df, period):
+    """calculateCartsForPeriod() over a frame of order rows already matched to this period
+
+    Returns the JS result's keys (without the row lists) plus methodCounts.
+    """
+    valid = (js_numbers(df['assembly_amount']) > 0) & js_truthy_mask(df['delivery_location_id']) & js_truthy_mask(df['customer_id'])
+    rows = df[valid]
+
+    fust = fust_per_row(rows)
+    standard, danish = fust_maps(row_routes(rows), row_fust_types(rows), fust['fust'], uses_danish_carts(rows['customer_name']))
+
+    result = carts_from_fust(standard, danish, period)
+    order_ids = unique_order_ids(rows['order_id'])
+    result['matchedOrdersCount'] = len(order_ids)
+    result['uniqueOrderIds'] = order_ids
+    result['methodCounts'] = {method: int((fust['method'] == method).sum()) for method in METHODS}
+    return result
+
+
+def calculate_carts(df):
+    """calculateCarts(): morning and evening results and their sums
+
+    Aalsmeer evening rows go to the unmatched rows, like the JS filter does;
+    rows with another period than morning/evening are counted in neither.
+    """
+    # Object columns holding only numbers or only strings take the typed paths
+    df = df.infer_objects()
+    periods = map_distinct(df['period'], period_value)
+    aalsmeer_evening = (map_distinct(df['route'], route_value) == 'aalsmeer') & (periods == 'evening')
+
+    morning = calculate_carts_for_period(df[~aalsmeer_evening & (periods == 'morning')], 'morning')
+    evening = calculate_carts_for_period(df[~aalsmeer_evening & (periods == 'evening')], 'evening')
+
+    return {
+        'total': morning['total'] + evening['total'],
+        'standard': morning['standard'] + evening['standard'],
+        'danish': morning['danish'] + evening['danish'],
+        'trucks': morning['trucks'] + evening['trucks'],
+        'byRoute': {name: morning['byRoute'][name] + evening['byRoute'][name] for name in morning['byRoute']},
+        'byRouteInternal': {route: morning['byRouteInternal'][route] + evening['byRouteInternal'][route] for route in ROUTES},
+        'breakdown': [],
+        'morning': morning,
+        'evening': evening,
+        'matchedOrdersCount': len(morning['uniqueOrderIds'] | evening['uniqueOrderIds']),
+        'unmatchedOrdersCount': len(unique_order_ids(df.loc[aalsmeer_evening, 'order_id']))
+    }
+
+
+def order_carts(df):
+    """calculateCartsNeeded() of js/carts.js for every API export row: the carts its own FUST Count needs
+
+    Danish rows (by 'Cart Type', or by customer name if the export has no
+    such column) need one cart per 24 FUST, standard rows use the
+    CART_CAPACITIES of their FUST Type, 612's for unknown types. Rows without
+    FUST need no carts. Like `order.cartType === 'danish'` in the JS, only
+    the exact value 'danish' (as assignCartType() writes it) is Danish.
+    """
+    fust = pd.to_numeric(df['FUST Count'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    if 'Cart Type' in df.columns:
+        danish = map_distinct(df['Cart Type'], lambda value: js_string_value(value) == 'danish', bool)
+    elif 'Customer Name' in df.columns:
+        danish = uses_danish_carts(df['Customer Name'])
+    else:
+        danish = np.zeros(len(df), dtype=bool)
+    if 'FUST Type' in df.columns:
+        fust_types = js_strings(df['FUST Type'])
+    else:
+        fust_types = pd.Series(DEFAULT_FUST_TYPE, index=df.index, dtype=object)
+    default = ORDER_CART_CAPACITY[DEFAULT_FUST_TYPE]
+    standard = map_distinct(fust_types, lambda fust_type: ORDER_CART_CAPACITY.get(fust_type, default), float)
+    capacity = np.where(danish, ORDER_DANISH_CAPACITY, standard)
+    return np.where(fust > 0, np.ceil(fust / capacity), 0)
+
+
+def breakdown_frame(result, source=''):
+    """One row per route, FUST type and cart type of a calculate_carts result"""
+    rows = []
+    for period in ['morning', 'evening']:
+        for route in result[period]['breakdown']:
+            for fust in route['fustBreakdown']:
+                fust_type, _, cart_type = fust['fustType'].rpartition(' ')
+                rows.append({
+                    'Source': source,
+                    'Route Key': route['routeKey'],
+                    'Route': route['route'],
+                    'Period': period.upper(),
+                    'FUST Type': fust_type,
+                    'Cart Type': cart_type.strip('()'),
+                    'FUST': fust['totalFust'],
+                    'Capacity': fust['capacity'],
+                    'Carts': fust['carts']
+                })
+    return pd.DataFrame(rows, columns=['Source', 'Route Key', 'Route', 'Period', 'FUST Type', 'Cart Type', 'FUST', 'Capacity', 'Carts'])
+
+
+# Loads the dashboard scripts in a sandbox whose global object is `window`,
+# with console silenced and a memory-backed localStorage, and prints the
+# calculateCarts() result for the rows in argv[3] as JSON.
+JS_HARNESS = r"""
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const [jsDir, rowsPath] = process.argv.slice(2);
+const noop = () => {};
+const storage = {};
+const sandbox = {
+    console: {log: noop, info: noop, warn: noop, error: noop, debug: noop, assert: noop, group: noop, groupEnd: noop, table: noop},
+    localStorage: {getItem: key => (key in storage ? storage[key] : null), setItem: (key, value) => { storage[key] = String(value); }, removeItem: key => { delete storage[key]; }},
+    setTimeout, clearTimeout
+};
+sandbox.window = sandbox;
+vm.createContext(sandbox);
+for (const file of ['route-mapping.js', 'cart-calculation.js']) {
+    vm.runInContext(fs.readFileSync(path.join(jsDir, file), 'utf8'), sandbox, {filename: file});
+}
+// Rows carry their route and period already; skip the client-name matching
+delete sandbox.RouteMapping.separateOrdersByClientMatch;
+
+const rows = JSON.parse(fs.readFileSync(rowsPath, 'utf8'));
+const result = sandbox.CartCalculation.calculateCarts(rows);
+const pick = r => ({
+    total: r.total, standard: r.standard, danish: r.danish, trucks: r.trucks,
+    byRoute: r.byRoute, byRouteInternal: r.byRouteInternal, breakdown: r.breakdown,
+    matchedOrdersCount: r.matchedOrdersCount
+});
+process.stdout.write(JSON.stringify({
+    ...pick(result),
+    unmatchedOrdersCount: result.unmatchedOrdersCount,
+    morning: pick(result.morning),
+    evening: pick(result.evening)
+}));
+"""
+
+PARITY_KEYS = ['total', 'standard', 'danish', 'trucks', 'byRoute', 'byRouteInternal', 'breakdown', 'matchedOrdersCount']
+
+
+def synthetic_orderrows(count, seed=42):
+    """Order row records that exercise every branch of the JS calculation"""
+    rng = np.random.default_rng(seed)
+    names = ['Superflora B.V.', 'MM FLOWERS', 'flamingo', 'Dijk', 'Flower Trade Consult Bleiswijk', 'Bloemenhandel Jansen',
+             'Kwekerij de Vries', 'Fleur Bakker', 'Tuincentrum Smit', '', None]
+    routes = ['aalsmeer', 'Naaldwijk', 'RIJNSBURG', 'rijnsburg', 'export', '7']
+    periods = ['morning', 'evening', 'evening', None, 'Evening']
+    fust_types = ['612', '614', '902', '996', '575', '588', '856', '821', '999', '0612', 'doos', 902, None]
+    counts = [None, 0, 1, 3, 12, '20', '7.9', ' 15 ', '', 'x1']
+
+    def maybe_property(code, values):
+        value = values[rng.integers(len(values))]
+        if value is None:
+            return []
+        if rng.random() < 0.2:
+            return [{'code': code, 'value': '', 'pivot': {'value': value}}]
+        return [{'code': code, 'value': value}]
+
+    records = []
+    for i in range(count):
+        properties = maybe_property('901', fust_types)
+        if rng.random() < 0.5:
+            properties += maybe_property('L11', [None, 0, 5, '10', 20, '25x'])
+            properties += maybe_property('L13', [None, 0, '50', 60, 100, 72.5])
+        rng.shuffle(properties)
+        order = {'id': int(rng.integers(1, count // 3 + 2)), 'customer_id': int(rng.integers(0, 40))}
+        if rng.random() < 0.9:
+            order['delivery_location_id'] = [32, 34, 36, 12, 0][rng.integers(5)]
+        record = {
+            'id': 100000 + i,
+            'properties': properties,
+            'order': order,
+            'assembly_amount': [0, 1, 2, 4, 7, 10, 25, 40, 80, 3.5, None][rng.integers(11)],
+            'nr_base_product': counts[rng.integers(len(counts))],
+            'bundles_per_fust': counts[rng.integers(len(counts))],
+            'customer_name': names[rng.integers(len(names))],
+            'route': routes[rng.integers(len(routes))],
+            'period': periods[rng.integers(len(periods))]
+        }
+        if rng.random() < 0.7:
+            record['order_id'] = order['id']
+        if not record['customer_name'] and rng.random() < 0.5:
+            # Unnamed rows have no client-name route either: the location decides
+            record['route'] = None
+        records.append({key: value for key, value in record.items() if value is not None})
+    return records
+
+
+def run_js(records, js_dir):
+    """calculateCarts() of the records as node computes it, or None without node"""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Path(tmp) / 'harness.js'
+        rows = Path(tmp) / 'rows.json'
+        harness.write_text(JS_HARNESS, encoding='utf-8')
+        rows.write_text(json.dumps(records), encoding='utf-8')
+        completed = subprocess.run([node, str(harness), str(js_dir), str(rows)], capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout)
+
+
+def differences(expected, actual, path='result'):
+    """Paths where two JSON-like values differ"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        found = []
+        for key in dict.fromkeys(list(expected) + list(actual)):
+            found += differences(expected.get(key), actual.get(key), f"{path}.{key}")
+        return found
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        found = []
+        for i, (left, right) in enumerate(zip(expected, actual)):
+            found += differences(left, right, f"{path}[{i}]")
+        return found
+    return [] if expected == actual else [(path, expected, actual)]
+
+
+def check_js_parity(records, js_dir=Path(__file__).parent / 'js'):
+    """Compare the engine with js/cart-calculation.js on the records
+
+    Returns the differing (path, js value, engine value) triples, or None
+    when node is not installed.
+    """
+    js_result = run_js(records, js_dir)
+    if js_result is None:
+        return None
+    result = calculate_carts(orderrow_frame(records))
+    engine = {key: result[key] for key in PARITY_KEYS + ['unmatchedOrdersCount']}
+    for period in ['morning', 'evening']:
+        engine[period] = {key: result[period][key] for key in PARITY_KEYS}
+    return differences(js_result, engine)
+
+
+def print_result(result, source):
+    print(f"\n🛒 {source}")
+    for period in ['morning', 'evening']:
+        period_result = result[period]
+        routes = ', '.join(f"{name} {carts}" for name, carts in period_result['byRoute'].items())
+        print(f"   {period:8} {period_result['total']:5} carts ({period_result['standard']} standard, {period_result['danish']} Danish), "
+              f"{period_result['trucks']} trucks | {routes}")
+        methods = ', '.join(f"{method} {count}" for method, count in period_result['methodCounts'].items() if count)
+        print(f"            {period_result['matchedOrdersCount']} orders, bundles per FUST from: {methods or '-'}")
+    print(f"   total    {result['total']:5} carts, {result['trucks']} trucks, {result['unmatchedOrdersCount']} Aalsmeer evening orders excluded")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FUST, carts and trucks per route from Florinet order rows')
+    parser.add_argument('orderrows', nargs='*', help='Order rows as JSON/JSONL records, or CSV/Parquet in the flat layout (one day per file)')
+    parser.add_argument('--output', help='Write the per route/FUST type breakdown of every file to this CSV')
+    parser.add_argument('--lookup-dir', help='Directory with the customers/locations payloads for raw order rows (default: next to each file or one up)')
+    parser.add_argument('--check-js', action='store_true', help='Compare the engine with js/cart-calculation.js under node on generated rows')
+    parser.add_argument('--check-rows', type=int, default=5000, help='Generated rows for --check-js (default: 5000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for --check-js (default: 42)')
+
+    args = parser.parse_args()
+
+    if args.check_js:
+        failures = check_js_parity(synthetic_orderrows(args.check_rows, args.seed))
+        if failures is None:
+            print("❌ node not found, cannot run js/cart-calculation.js")
+            return 1
+        for path, expected, actual in failures[:20]:
+            print(f"❌ {path}: JS {expected!r}, engine {actual!r}")
+        if failures:
+            print(f"❌ {len(failures)} differences from js/cart-calculation.js")
+            return 1
+        print(f"✅ Engine matches js/cart-calculation.js on {args.check_rows} generated rows")
+        if not args.orderrows:
+            return 0
+
+    if not args.orderrows:
+        parser.error('give order row files or --check-js')
+
+    frames = []
+    for path in args.orderrows:
+        if not Path(path).exists():
+            print(f"❌ Error: order rows file not found: {path}")
+            return 1
+        try:
+            result = calculate_carts(read_orderrows(path, args.lookup_dir))
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            return 1
+        print_result(result, path)
+        frames.append(breakdown_frame(result, Path(path).name))
+
+    if args.output:
+        pd.concat(frames, ignore_index=True).to_csv(args.output, index=False)
+        print(f"\n💾 Saved breakdown to: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
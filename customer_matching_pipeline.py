@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+CUSTOMER MATCHING PIPELINE
+Fuzzy matching, Excel update and reconciliation report in one process
+
+Runs CustomerMatcher, ExcelUpdater and ReconciliationReport back to back and
+hands the results over in memory: the mapping goes to the updater as a
+DataFrame, and the report reuses the API and Excel customer lists the
+matcher already read plus the updater's resulting sheets. The API export and
+workbook are parsed once and nothing is written to disk except the updated
+workbook (and, when asked for, the mapping CSV and the report).
+
+--policy answers the workflow's questions: 'ask' prompts like
+run_customer_matching.sh did, 'apply' updates the workbook (high confidence
+updates and additions only) and writes the report without asking, 'skip'
+stops after matching.
+
+Usage:
+    python customer_matching_pipeline.py --api api_orders_export_2026-02-09.csv --excel Planningstabel_2_0__2_.xlsx --date 2026-02-09 --policy apply
+"""
+
+import argparse
+from pathlib import Path
+
+from fuzzy_match_customers import matcher_from_args
+from generate_reconciliation_report import ReconciliationReport
+from score_cache import DEFAULT_MAX_ENTRIES
+from stage_profiler import StageProfiler, add_profile_arguments, profiler_from_args
+from update_excel_customers import ExcelUpdater
+
+POLICIES = ['ask', 'apply', 'skip']
+
+
+class CustomerPipeline:
+    def __init__(self, matcher, policy='ask', backup_dir=None, sort=False, streamed=None, profiler=None):
+        self.matcher = matcher
+        self.policy = policy
+        self.backup_dir = backup_dir
+        self.sort = sort
+        self.streamed = streamed
+        self.mapping_df = None
+        self.updater = None
+        self.profiler = profiler or StageProfiler(enabled=False)
+
+    def confirm(self, question):
+        """Answer a yes/no question from the policy, prompting only for 'ask'"""
+        if self.policy != 'ask':
+            return self.policy == 'apply'
+        try:
+            return input(f"\n{question} (yes/no): ").strip().lower() in ['yes', 'y']
+        except EOFError:
+            return False
+
+    def match(self, api_path, excel_path, threshold_high=90, threshold_medium=70, mapping_output=None):
+        """Step 1: match the API customers against the workbook's, keeping the mapping in memory"""
+        with self.profiler.stage('load_api_customers') as counts:
+            self.matcher.load_api_customers(api_path)
+            counts['customers'] = sum(len(c) for c in self.matcher.api_customers.values())
+        with self.profiler.stage('load_excel_customers') as counts:
+            self.matcher.load_excel_customers(excel_path)
+            counts['customers'] = sum(len(c) for c in self.matcher.excel_customers.values())
+        with self.profiler.stage('match_customers') as counts:
+            self.matcher.match_customers(threshold_high, threshold_medium)
+            self.mapping_df = self.matcher.mapping_frame()
+            counts.update(rows=len(self.mapping_df), pairs_total=self.matcher.pair_stats['total'], pairs_scored=self.matcher.pair_stats['scored'])
+
+        summary = self.matcher.generate_summary()
+        print(f"\n✅ Matching complete: {summary['total_matches']} rows, {summary['update_excel']} to update, "
+              f"{summary['add_to_excel']} to add, {summary['needs_review']} to review")
+        if mapping_output:
+            with self.profiler.stage('save_mapping') as counts:
+                self.matcher.save_mapping(mapping_output)
+                counts['rows'] = len(self.mapping_df)
+        return self.mapping_df
+
+    def update(self, excel_path, output_path):
+        """Step 2: apply the mapping to the workbook; False if it was declined"""
+        self.updater = ExcelUpdater(excel_path, self.mapping_df, self.backup_dir, self.profiler)
+        return self.updater.update_excel(
+            auto_update_high_confidence=self.policy != 'ask',
+            review_required=self.policy == 'ask',
+            output_path=output_path,
+            sort=self.sort,
+            streamed=self.streamed
+        )
+
+    def report(self, output_path):
+        """Step 3: before/after report from the lists already in memory"""
+        reporter = ReconciliationReport(profiler=self.profiler)
+        reporter.api_stats = self.matcher.api_customers
+        reporter.before_stats = dict(self.matcher.excel_customers)
+        reporter.after_stats = {
+            route: self.updater.sheet_customers.get(route, customers)
+            for route, customers in reporter.before_stats.items()
+        }
+        return reporter.write_report(output_path)
+
+    def run(self, api_path, excel_path, output_path, report_path=None, threshold_high=90, threshold_medium=70, mapping_output=None):
+        """Run the steps the policy allows; returns the files written"""
+        written = []
+
+        print("\n" + "="*80)
+        print("STEP 1: Fuzzy Matching")
+        print("="*80)
+        self.match(api_path, excel_path, threshold_high, threshold_medium, mapping_output)
+        if mapping_output:
+            written.append(mapping_output)
+
+        print("\n" + "="*80)
+        print("STEP 2: Update Excel")
+        print("="*80)
+        if self.policy == 'skip':
+            print("⏭️  Skipping Excel update")
+            return written
+        if not self.update(excel_path, output_path):
+            return None
+        written.append(output_path)
+
+        if report_path and self.confirm("Generate reconciliation report?"):
+            print("\n" + "="*80)
+            print("STEP 3: Generate Report")
+            print("="*80)
+            self.report(report_path)
+            written.append(report_path)
+
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match customers, update the Excel file and report, in one process')
+    parser.add_argument('--api', required=True, help='Path to API export CSV or Florinet orders JSON/JSONL')
+    parser.add_argument('--excel', required=True, help='Path to Excel file')
+    parser.add_argument('--date', help='Date (YYYY-MM-DD) used in the default output names')
+    parser.add_argument('--output', help='Updated Excel file (default: <excel>_UPDATED_<date>.xlsx)')
+    parser.add_argument('--report', help='Reconciliation report (default: reconciliation_report_<date>.xlsx)')
+    parser.add_argument('--no-report', action='store_true', help='Do not write the reconciliation report')
+    parser.add_argument('--mapping-output', help='Also save the mapping CSV (default: kept in memory only)')
+    parser.add_argument('--policy', choices=POLICIES, default='ask', help="'ask' prompts, 'apply' updates and reports without prompting, 'skip' only matches (default: ask)")
+    parser.add_argument('--threshold-high', type=float, default=90, help='High confidence threshold (default: 90)')
+    parser.add_argument('--threshold-medium', type=float, default=70, help='Medium confidence threshold (default: 70)')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel workers used to score the match matrix (-1 = all cores, default: 1)')
+    parser.add_argument('--pool', choices=['threads', 'processes'], default='threads', help='Run workers as cdist threads or as a process pool (default: threads)')
+    parser.add_argument('--blocking', type=float, metavar='MIN_SHARE', help='Only score pairs sharing this fraction (0-1) of n-gram keys (default: score all pairs)')
+    parser.add_argument('--cache', help='SQLite score cache reused between runs (requires rapidfuzz)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES, help=f'Max cached pair scores before LRU eviction (default: {DEFAULT_MAX_ENTRIES})')
+    parser.add_argument('--parse-cache', metavar='DIR', help='Directory of Parquet copies of the parsed API export and workbook (requires pyarrow)')
+    parser.add_argument('--compact', action='store_true', help='Read API names and route keys as categoricals (less memory on large exports)')
+    parser.add_argument('--backup-dir', help='Backup store used when the workbook is overwritten in place')
+    parser.add_argument('--sort', action='store_true', help='Re-sort each evening sheet alphabetically by customer after the changes')
+    parser.add_argument('--streamed', action='store_true', help='Stream the workbook into a new file instead of patching it in place (cell formatting is not kept)')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+
+    print("="*80)
+    print("CUSTOMER MATCHING PIPELINE")
+    print("="*80)
+
+    # Validate files
+    if not Path(args.api).exists():
+        print(f"❌ Error: API file not found: {args.api}")
+        return 1
+
+    if not Path(args.excel).exists():
+        print(f"❌ Error: Excel file not found: {args.excel}")
+        return 1
+
+    suffix = f"_{args.date}" if args.date else ''
+    output_path = args.output or f"{str(Path(args.excel).with_suffix(''))}_UPDATED{suffix}.xlsx"
+    report_path = None if args.no_report else args.report or f"reconciliation_report{suffix}.xlsx"
+
+    matcher = matcher_from_args(args)
+    if matcher is None:
+        return 1
+    profiler = profiler_from_args(args, 'customer_matching_pipeline')
+    pipeline = CustomerPipeline(matcher, args.policy, args.backup_dir, args.sort, args.streamed or None, profiler)
+
+    try:
+        written = pipeline.run(args.api, args.excel, output_path, report_path, args.threshold_high, args.threshold_medium, args.mapping_output)
+    finally:
+        if matcher.cache is not None:
+            matcher.cache.close()
+    profiler.finish()
+
+    if written is None:
+        print("\n❌ Update failed or cancelled")
+        return 1
+
+    print("\n" + "="*80)
+    print("✅ WORKFLOW COMPLETE!")
+    print("="*80)
+    if written:
+        print("\nFiles created:")
+        for path in written:
+            print(f"  - {path}")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
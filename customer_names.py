@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+CUSTOMER NAME NORMALIZATION
+Canonical customer-name key shared by the matching and reconciliation scripts
+
+Port of normalizeName() in js/route-mapping.js, so the Python tools and the
+dashboard agree on what "the same customer" means. Patterns are compiled once;
+normalize_name() is the memoized scalar path and normalize_series() normalizes
+a whole pandas column in one pass. tests/test_customer_names.py checks both
+against the keys the JS gives.
+"""
+
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+# Steps mirror normalizeName() in js/route-mapping.js, in order. The legal
+# suffix alternations (e.g. "\s+b\.v\.|bv|b\s*v\s*$") are kept exactly as in
+# the JS - including their precedence - so both sides produce the same key.
+# re.ASCII matches JavaScript's ASCII-only \w and \b.
+_WHITESPACE = re.compile(r'\s+')
+_QUANTITY_PREFIX = re.compile(r'^\d+x\s*', re.IGNORECASE)
+_BRACKETED = [
+    (re.compile(r'\([^)]*\)'), ' '),
+    (re.compile(r'\[[^\]]*\]'), ' '),
+    (re.compile(r'\{[^\}]*\}'), ' '),
+]
+_BUSINESS_TERMS = [
+    (re.compile(r'\bbloemenhandel\b', re.IGNORECASE | re.ASCII), ' '),
+    (re.compile(r'\bbloemenexp\.?\b', re.IGNORECASE | re.ASCII), ' '),
+    (re.compile(r'\bbloemen\s+en\s+planten\b', re.IGNORECASE | re.ASCII), ' '),
+    (re.compile(r'\bbl\.?\s*exp\b', re.IGNORECASE | re.ASCII), ' '),
+    (re.compile(r'\bvd\b', re.IGNORECASE | re.ASCII), ' van der '),
+    (re.compile(r'\bvh\b', re.IGNORECASE | re.ASCII), ' voorheen '),
+    (re.compile(r'\bzn\.?\b', re.IGNORECASE | re.ASCII), ' zonen '),
+    (re.compile(r'\b&\s*co\.?\b', re.IGNORECASE | re.ASCII), ' '),
+    (re.compile(r'\bgmbh\b', re.IGNORECASE | re.ASCII), ' '),
+]
+_LEGAL_SUFFIXES = [
+    (re.compile(r'\s+b\.v\.|bv|b\s*v\s*$', re.IGNORECASE), ''),
+    (re.compile(r'\s+v\.o\.f\.|vof\s*$', re.IGNORECASE), ''),
+    (re.compile(r'\s+webshop\s*$', re.IGNORECASE), ' '),
+    (re.compile(r'\s+retail\s*$', re.IGNORECASE), ' '),
+    (re.compile(r'\s+export\s*$', re.IGNORECASE), ' '),
+    (re.compile(r'\s+holding\s*$', re.IGNORECASE), ' '),
+    (re.compile(r'\s+group\s*$', re.IGNORECASE), ' '),
+    (re.compile(r'\s+s\.r\.o\.|sro\s*$', re.IGNORECASE), ''),
+]
+_PUNCTUATION = [
+    (re.compile(r'\.'), ''),
+    (re.compile(r'&'), ' en '),
+    (re.compile(r'-'), ' '),
+    (re.compile(r'/'), ' '),
+    (re.compile(r'[^\w\s]', re.ASCII), ' '),
+]
+_LOCATION_SUFFIX = re.compile(
+    r'\s+(naaldwijk|aalsmeer|rijnsburg|villa|klondike|koolhaas|houter|zuidplas)\s*$',
+    re.IGNORECASE
+)
+
+_REPLACEMENTS = _BRACKETED + _BUSINESS_TERMS + _LEGAL_SUFFIXES + _PUNCTUATION
+
+
+@lru_cache(maxsize=65536)
+def _normalize_text(text):
+    normalized = _WHITESPACE.sub(' ', text.lower().strip())
+    normalized = _QUANTITY_PREFIX.sub('', normalized)
+    for pattern, replacement in _REPLACEMENTS:
+        normalized = pattern.sub(replacement, normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+@lru_cache(maxsize=65536)
+def _base_text(text):
+    return _LOCATION_SUFFIX.sub('', _normalize_text(text))
+
+
+def normalize_name(name):
+    """Return the canonical comparison key for a customer name"""
+    if name is None or (not isinstance(name, str) and pd.isna(name)) or name == '':
+        return ''
+    return _normalize_text(str(name))
+
+
+def get_base_name(name):
+    """Canonical key without a trailing location/variant suffix"""
+    if name is None or (not isinstance(name, str) and pd.isna(name)) or name == '':
+        return ''
+    return _base_text(str(name))
+
+
+def normalize_series(names):
+    """Normalize a whole column of names in one vectorized pass
+
+    Missing values become ''. Equivalent to names.map(normalize_name).
+    """
+    names = pd.Series(names, copy=False)
+    missing = names.isna()
+    normalized = names.astype(object).where(~missing, '').astype(str)
+
+    normalized = normalized.str.lower().str.strip().str.replace(_WHITESPACE, ' ', regex=True)
+    normalized = normalized.str.replace(_QUANTITY_PREFIX, '', regex=True)
+    for pattern, replacement in _REPLACEMENTS:
+        normalized = normalized.str.replace(pattern, replacement, regex=True)
+    return normalized.str.replace(_WHITESPACE, ' ', regex=True).str.strip()
+
+
+def base_name_series(names):
+    """Vectorized get_base_name() for a whole column"""
+    return normalize_series(names).str.replace(_LOCATION_SUFFIX, '', regex=True)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+DATA LOADERS
+Shared ingestion of the API order export and the Planningstabel workbook
+
+The API export is the CSV written by js/data-export.js or Florinet order
+JSON/JSONL (see florinet_orders.py), which yields the same columns.
+
+Only the columns a caller needs are parsed, as strings, and the per-route
+customer lists are built with vectorized filtering and drop_duplicates
+instead of walking the frame row by row. The workbook is opened once in
+openpyxl read-only mode and only the customer column of each wanted sheet
+is streamed.
+
+In compact mode the low-cardinality text columns of the export are loaded
+as pandas categoricals (one small dictionary of names plus integer codes
+per row) and the counts as the narrowest integer dtype that holds them.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from florinet_orders import JSON_SUFFIXES, iter_orders_json_chunks, read_orders_json
+
+API_CUSTOMER_COLUMNS = ['Customer Name', 'Route Key']
+
+# Export columns with few distinct values, kept as categoricals in compact mode
+CATEGORY_COLUMNS = [
+    'Customer Name', 'Route Key', 'Route', 'Period', 'City', 'Delivery Date',
+    'Delivery Time', 'FUST Type', 'Cart Type', 'Status', 'Matched'
+]
+
+# Export count columns, narrowed to the smallest integer dtype in compact mode
+COUNT_COLUMNS = ['Row #', 'FUST Count', 'Total Stems', 'Carts Needed']
+
+# Nullable integer dtypes tried in order (the CSV writes 0 as an empty cell)
+COUNT_DTYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+# Customer names that don't identify a real customer
+MISSING_CUSTOMERS = ['', 'nan', 'Unknown']
+
+# Strings pandas reads as missing when parsing a sheet
+EMPTY_CELL_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+# Header terms that mark the customer column of a Planningstabel sheet
+CUSTOMER_COLUMN_TERMS = ['klant', 'customer', 'client', 'naam', 'name']
+
+EVENING_SHEETS = {
+    'Avond. Aalsmeer': 'aalsmeer_evening',
+    'Avond. Naaldwijk': 'naaldwijk_evening',
+    'Avond. Rijnsburg': 'rijnsburg_evening'
+}
+
+MORNING_SHEETS = {
+    'Rijnsburg': 'rijnsburg_morning',
+    'Aalsmeer': 'aalsmeer_morning',
+    'Naaldwijk': 'naaldwijk_morning'
+}
+
+
+def is_orders_json(api_path):
+    """True for Florinet order JSON/JSONL rather than the CSV export"""
+    return Path(api_path).suffix.lower() in JSON_SUFFIXES
+
+
+def narrow_counts(values):
+    """A count column as the smallest nullable integer dtype, or float32 if not whole"""
+    values = pd.to_numeric(values, errors='coerce')
+    present = values.dropna()
+    if not (present % 1 == 0).all():
+        return values.astype('float32')
+    low, high = (present.min(), present.max()) if len(present) else (0, 0)
+    for dtype in COUNT_DTYPES:
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def compact_export(df):
+    """Categorical text columns and narrow integer counts (values unchanged)"""
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in COUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = narrow_counts(df[col])
+    return df
+
+
+def read_api_export(api_path, columns=None, dtype=str, cache=None, compact=False):
+    """Read the API export, parsing only the given columns (as strings by default)
+
+    With compact=True the CATEGORY_COLUMNS are read as categoricals and the
+    COUNT_COLUMNS narrowed. With a ParseCache the parsed frame is reused
+    while the file is unchanged.
+    """
+    usecols = None if columns is None else (lambda col: col in columns)
+
+    def parse():
+        if is_orders_json(api_path):
+            df = read_orders_json(api_path, columns)
+            df = df.astype(str) if dtype is str else df
+        elif compact and dtype is str:
+            # String columns can go straight into categoricals while parsing
+            dtypes = {col: 'category' if col in CATEGORY_COLUMNS else str for col in pd.read_csv(api_path, nrows=0).columns}
+            df = pd.read_csv(api_path, usecols=usecols, dtype=dtypes, engine='c')
+        elif compact:
+            df = pd.read_csv(api_path, usecols=usecols, dtype=dtype, engine='c')
+        else:
+            return pd.read_csv(api_path, usecols=usecols, dtype=dtype, engine='c')
+        return compact_export(df) if compact else df
+
+    if cache is None:
+        return parse()
+    dtype_name = dtype.__name__ if dtype else 'inferred'
+    mode = 'compact:' if compact else ''
+    df = cache.frame(api_path, f"{mode}csv:{dtype_name}:{','.join(columns or ['*'])}", parse)
+    # Parquet does not bring back every categorical (e.g. numeric categories)
+    return compact_export(df) if compact else df
+
+
+def iter_api_export(api_path, chunksize, columns=None, dtype=None):
+    """Yield the API export in frames of up to chunksize rows, parsing only the given columns"""
+    if is_orders_json(api_path):
+        yield from iter_orders_json_chunks(api_path, chunksize, columns)
+        return
+    usecols = None if columns is None else (lambda col: col in columns)
+    yield from pd.read_csv(api_path, usecols=usecols, dtype=dtype, chunksize=chunksize)
+
+
+def customers_by_route(df):
+    """Return {route_key: sorted unique customer names} from an export frame
+
+    Same rules as the old row-by-row loops: names and route keys are
+    stripped, and empty/'nan'/'Unknown' customers are skipped. Rows are
+    deduplicated before any string work, on the integer codes when the
+    columns are categorical.
+    """
+    if 'Customer Name' not in df.columns:
+        return {}
+
+    route_column = df['Route Key'] if 'Route Key' in df.columns else pd.Series('', index=df.index, dtype=object)
+    pairs = pd.DataFrame({'route': route_column, 'customer': df['Customer Name']}).drop_duplicates()
+
+    customers = pairs['customer'].astype(object).where(pairs['customer'].notna(), 'nan').str.strip()
+    routes = pairs['route'].astype(object).where(pairs['route'].notna(), 'nan').str.strip()
+
+    keep = ~customers.isin(MISSING_CUSTOMERS)
+    pairs = pd.DataFrame({'route': routes[keep], 'customer': customers[keep]}).drop_duplicates()
+
+    return {route: sorted(names) for route, names in pairs.groupby('route', sort=False)['customer']}
+
+
+def load_api_customers(api_path, cache=None, compact=False):
+    """Read the API export and return {route_key: sorted unique customer names}"""
+    return customers_by_route(read_api_export(api_path, API_CUSTOMER_COLUMNS, cache=cache, compact=compact))
+
+
+def header_labels(header):
+    """Column labels as pandas would give them (empty headers become 'Unnamed: n')"""
+    return [f"Unnamed: {i}" if value is None else str(cell_value(value)) for i, value in enumerate(header)]
+
+
+def find_customer_column(header):
+    """Index of the customer column in a header row, falling back to the first column"""
+    labels = header_labels(header)
+    for i, label in enumerate(labels):
+        if any(term in label.lower() for term in CUSTOMER_COLUMN_TERMS):
+            return i
+    return 0 if labels else None
+
+
+def cell_value(value):
+    """Cell value as pandas would read it (whole floats become ints)"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def read_sheets(excel_path, sheet_names, cache=None):
+    """Parse the given sheets (as pd.read_excel would) with the workbook opened at most once
+
+    Returns ({sheet_name: DataFrame} for the sheets that exist, all sheet
+    names in the workbook). With a ParseCache, sheets of an unchanged
+    workbook are read back from Parquet and the workbook is only opened when
+    a sheet is missing from the cache.
+    """
+    if cache is None:
+        with pd.ExcelFile(excel_path) as xls:
+            frames = {name: xls.parse(name) for name in sheet_names if name in xls.sheet_names}
+            return frames, xls.sheet_names
+
+    opened = []
+
+    def workbook():
+        if not opened:
+            opened.append(pd.ExcelFile(excel_path))
+        return opened[0]
+
+    try:
+        available = cache.sheet_names(excel_path, lambda: workbook().sheet_names)
+        frames = {}
+        for name in sheet_names:
+            if name in available:
+                frames[name] = cache.frame(excel_path, f"sheet:{name}", lambda name=name: workbook().parse(name))
+        return frames, available
+    finally:
+        for xls in opened:
+            xls.close()
+
+
+def frame_customers(df):
+    """Sorted customer names from a parsed sheet, using the header-sniffed customer column"""
+    column = find_customer_column(list(df.columns))
+    if column is None:
+        return []
+    names = [str(value).strip() for value in df.iloc[:, column].dropna().unique()]
+    return sorted(name for name in names if name and name.lower() != 'nan')
+
+
+def column_customers(values):
+    """Sorted customer names from the cell values of a customer column (blank and 'nan' skipped)"""
+    values = dict.fromkeys(cell_value(value) for value in values if value is not None and value not in EMPTY_CELL_VALUES)
+    names = [str(value).strip() for value in values]
+    return sorted(name for name in names if name and name.lower() != 'nan')
+
+
+def read_sheet_customers(excel_path, sheets, cache=None):
+    """Read the customer column of each wanted sheet in a single workbook pass
+
+    sheets maps sheet name -> route key. Returns {route_key: sorted customer
+    names}; sheets that are missing from the workbook are left out. Same
+    rules as reading the sheet with pandas: the customer column is sniffed
+    from the header row, and blank or 'nan' values are skipped. With a
+    ParseCache the cached sheets are used instead of streaming the column.
+    """
+    if cache is not None:
+        frames, _ = read_sheets(excel_path, list(sheets), cache)
+        return {sheets[name]: frame_customers(df) for name, df in frames.items()}
+
+    workbook = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        customers = {}
+        for sheet_name, route_key in sheets.items():
+            if sheet_name not in workbook.sheetnames:
+                continue
+            ws = workbook[sheet_name]
+
+            header = next(ws.iter_rows(max_row=1, values_only=True), ())
+            column = find_customer_column(header)
+            if column is None:
+                customers[route_key] = []
+                continue
+
+            customers[route_key] = column_customers(
+                row[0] for row in ws.iter_rows(min_row=2, min_col=column + 1, max_col=column + 1, values_only=True) if row
+            )
+        return customers
+    finally:
+        workbook.close()
@@ -7,40 +7,68 @@ Usage:
     python data_reconciliation.py --date 2026-02-09 --excel Planningstabel_2_0__2_.xlsx --api-export api_orders_export.csv
 """
 
+import numpy as np
 import pandas as pd
 import argparse
 import json
 import sys
 from datetime import datetime
 from pathlib import Path
-import re
+
+from cart_engine import order_carts
+from customer_names import normalize_name, normalize_series
+from data_loaders import CUSTOMER_COLUMN_TERMS, EVENING_SHEETS, MORNING_SHEETS, is_orders_json, iter_api_export, read_api_export, read_sheets
+from parse_cache import ParseCache, PARQUET_AVAILABLE
+from stage_profiler import StageProfiler, add_profile_arguments, profiler_from_args
+
+# Outer-merge indicator -> reconciliation status, and the order statuses are listed in
+MERGE_STATUS = {'left_only': 'Missing in API', 'right_only': 'Extra in API', 'both': 'Common'}
+STATUS_ORDER = {'Missing in API': 0, 'Extra in API': 1, 'Common': 2}
+
+API_ROUTES = [
+    'rijnsburg_morning', 'aalsmeer_morning', 'naaldwijk_morning',
+    'rijnsburg_evening', 'aalsmeer_evening', 'naaldwijk_evening'
+]
+
+# Rows read per chunk when streaming the API export
+STREAM_CHUNK_ROWS = 100_000
+
+# Columns kept when streaming; the rest of the export is never materialized
+STREAM_COLUMNS = ['Customer Name', 'Route Key', 'FUST Count', 'Carts Needed']
+
+# Export columns the cart check reads
+CART_CHECK_COLUMNS = ['FUST Type', 'Cart Type']
 
 class DataReconciliation:
-    def __init__(self, excel_path, api_export_path, date):
+    def __init__(self, excel_path, api_export_path, date, parse_cache=None, stream=False, chunksize=STREAM_CHUNK_ROWS,
+                 compact=False, profiler=None, check_carts=False):
         self.excel_path = excel_path
         self.api_export_path = api_export_path
         self.date = date
         self.excel_data = {}
         self.api_data = {}
+        self.parse_cache = parse_cache
+        self.stream = stream
+        self.chunksize = chunksize
+        self.api_totals = {}
+        self.compact = compact
+        self.api_names = None
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.check_carts = check_carts
+        self.cart_checks = {}
         
     def load_excel_data(self):
         """Load data from Excel file (Planningstabel format)"""
         print(f"📖 Loading Excel data from {self.excel_path}...")
         
         try:
-            # Read evening route sheets
-            evening_sheets = {
-                'Avond. Aalsmeer': 'aalsmeer_evening',
-                'Avond. Naaldwijk': 'naaldwijk_evening',
-                'Avond. Rijnsburg': 'rijnsburg_evening'
-            }
-            
-            xls = pd.ExcelFile(self.excel_path)
-            print(f"   Available sheets: {xls.sheet_names}")
+            # Parse every route sheet with the workbook opened once
+            frames, sheet_names = read_sheets(self.excel_path, list(EVENING_SHEETS) + list(MORNING_SHEETS), self.parse_cache)
+            print(f"   Available sheets: {sheet_names}")
             
-            for sheet_name, route_key in evening_sheets.items():
-                if sheet_name in xls.sheet_names:
-                    df = pd.read_excel(self.excel_path, sheet_name=sheet_name)
+            for sheet_name, route_key in EVENING_SHEETS.items():
+                if sheet_name in frames:
+                    df = frames[sheet_name]
                     self.excel_data[route_key] = df
                     print(f"   ✅ Loaded {sheet_name}: {len(df)} rows")
                 else:
@@ -48,15 +76,9 @@ class DataReconciliation:
                     self.excel_data[route_key] = pd.DataFrame()
             
             # Also try morning routes if needed
-            morning_sheets = {
-                'Rijnsburg': 'rijnsburg_morning',
-                'Aalsmeer': 'aalsmeer_morning',
-                'Naaldwijk': 'naaldwijk_morning'
-            }
-            
-            for sheet_name, route_key in morning_sheets.items():
-                if sheet_name in xls.sheet_names:
-                    df = pd.read_excel(self.excel_path, sheet_name=sheet_name)
+            for sheet_name, route_key in MORNING_SHEETS.items():
+                if sheet_name in frames:
+                    df = frames[sheet_name]
                     self.excel_data[route_key] = df
                     print(f"   ✅ Loaded {sheet_name}: {len(df)} rows")
                     
@@ -65,26 +87,42 @@ class DataReconciliation:
             raise
     
     def load_api_data(self):
-        """Load data from API export (CSV or Excel)"""
+        """Load data from API export (CSV, Florinet JSON/JSONL or Excel)"""
         print(f"📖 Loading API data from {self.api_export_path}...")
         
         try:
             path = Path(self.api_export_path)
+            row_export = path.suffix == '.csv' or is_orders_json(path)
             
-            if path.suffix == '.csv':
+            if row_export and self.stream:
+                self.stream_api_data()
+                
+            elif row_export:
                 # Load all data
-                df_all = pd.read_csv(self.api_export_path)
+                df_all = read_api_export(self.api_export_path, dtype=None, cache=self.parse_cache, compact=self.compact)
                 
                 # Group by route
-                for route_key in ['rijnsburg_morning', 'aalsmeer_morning', 'naaldwijk_morning',
-                                 'rijnsburg_evening', 'aalsmeer_evening', 'naaldwijk_evening']:
-                    route_df = df_all[df_all['Route Key'] == route_key].copy()
+                if self.compact:
+                    # One pass over the integer route codes instead of a string scan per route
+                    groups = dict(iter(df_all.groupby('Route Key', observed=True, sort=False)))
+                    if 'Customer Name' in df_all.columns:
+                        # Every distinct name is normalized once, routes look them up by code
+                        self.api_names = normalize_series(df_all['Customer Name'].cat.categories).to_numpy()
+                    memory = df_all.memory_usage(deep=True).sum() / 1024 / 1024
+                    print(f"   Compact frame: {len(df_all)} rows in {memory:.1f} MB")
+                for route_key in API_ROUTES:
+                    if self.compact:
+                        route_df = groups.get(route_key, df_all.iloc[:0])
+                    else:
+                        route_df = df_all[df_all['Route Key'] == route_key].copy()
                     self.api_data[route_key] = route_df
                     print(f"   ✅ {route_key}: {len(route_df)} orders")
                     
             elif path.suffix in ['.xlsx', '.xls']:
+                if self.stream:
+                    print("   ⚠️  Streaming only applies to CSV and JSON exports, loading the workbook")
+                
                 # Load from Excel sheets
-                xls = pd.ExcelFile(self.api_export_path)
                 sheet_mapping = {
                     'Rijnsburg Morning': 'rijnsburg_morning',
                     'Aalsmeer Morning': 'aalsmeer_morning',
@@ -95,140 +133,282 @@ class DataReconciliation:
                     'Unmatched Orders': 'unmatched'
                 }
                 
+                frames, _ = read_sheets(self.api_export_path, list(sheet_mapping), self.parse_cache)
                 for sheet_name, route_key in sheet_mapping.items():
-                    if sheet_name in xls.sheet_names:
-                        df = pd.read_excel(self.api_export_path, sheet_name=sheet_name)
+                    if sheet_name in frames:
+                        df = frames[sheet_name]
                         self.api_data[route_key] = df
                         print(f"   ✅ {sheet_name}: {len(df)} orders")
             else:
                 raise ValueError(f"Unsupported file format: {path.suffix}")
+            
+            if self.check_carts and not self.api_totals:
+                self.check_route_carts()
                 
         except Exception as e:
             print(f"❌ Error loading API data: {e}")
             raise
     
+    def stream_api_data(self):
+        """Aggregate the CSV/JSON export chunk by chunk, keeping only per-route totals
+        
+        Memory stays flat in the number of rows: per route only the order
+        count, the FUST/cart sums and the set of normalized customers are kept.
+        """
+        dtype = {'Customer Name': str, 'Route Key': str}
+        columns = STREAM_COLUMNS + CART_CHECK_COLUMNS if self.check_carts else STREAM_COLUMNS
+        
+        totals = {route_key: {'orders': 0, 'customers': set(), 'fust': 0, 'carts': 0} for route_key in API_ROUTES}
+        seen = {route_key: set() for route_key in API_ROUTES}
+        rows = 0
+        
+        for chunk in iter_api_export(self.api_export_path, self.chunksize, columns, dtype):
+            rows += len(chunk)
+            chunk = chunk[chunk['Route Key'].isin(API_ROUTES)]
+            
+            for route_key, group in chunk.groupby('Route Key', sort=False):
+                route = totals[route_key]
+                route['orders'] += len(group)
+                
+                if 'Customer Name' in group.columns:
+                    # Only names not seen in an earlier chunk need normalizing
+                    new_names = [name for name in group['Customer Name'].dropna().unique() if name not in seen[route_key]]
+                    seen[route_key].update(new_names)
+                    route['customers'].update(normalize_series(new_names))
+                if 'FUST Count' in group.columns:
+                    route['fust'] += pd.to_numeric(group['FUST Count'], errors='coerce').sum()
+                if 'Carts Needed' in group.columns:
+                    route['carts'] += pd.to_numeric(group['Carts Needed'], errors='coerce').sum()
+                if self.check_carts and 'FUST Count' in group.columns:
+                    self.add_cart_check(route_key, group)
+        
+        for route_key, route in totals.items():
+            route['customers'].discard('')
+            print(f"   ✅ {route_key}: {route['orders']} orders")
+        print(f"   Streamed {rows} rows in chunks of {self.chunksize}")
+        
+        self.api_totals = totals
+        if self.check_carts:
+            self.check_route_carts()
+        return totals
+    
+    def add_cart_check(self, route_key, df):
+        """Add export rows to a route's cart check: their FUST, their Carts Needed,
+        the carts the cart engine gives each row and the rows where those two differ"""
+        carts = pd.to_numeric(df['Carts Needed'], errors='coerce') if 'Carts Needed' in df.columns else pd.Series(0, index=df.index)
+        engine = order_carts(df)
+        check = self.cart_checks.setdefault(route_key, {'fust': 0, 'carts': 0, 'engine_carts': 0, 'rows_off': 0})
+        check['fust'] += pd.to_numeric(df['FUST Count'], errors='coerce').sum()
+        check['carts'] += carts.sum()
+        check['engine_carts'] += int(engine.sum())
+        check['rows_off'] += int((carts.fillna(0).to_numpy(dtype=float) != engine).sum())
+    
+    def check_route_carts(self):
+        """Each route's Carts Needed next to the carts the cart engine derives from the same rows
+        
+        Every export row is one order, so cart_engine recomputes its carts
+        the way calculateCartsNeeded() in js/carts.js does: the row's FUST
+        Count over the capacity of its FUST Type and cart type, rounded up.
+        Summed per route this is the same quantity as the summed Carts Needed,
+        and rows_off counts the orders whose Carts Needed does not follow from
+        their FUST Count. Streaming adds the chunks as they are read; without
+        it the loaded route frames are checked here.
+        """
+        if not self.api_totals:
+            for route_key in API_ROUTES:
+                api_df = self.api_data.get(route_key)
+                if api_df is not None and 'FUST Count' in api_df.columns:
+                    self.add_cart_check(route_key, api_df)
+        
+        if not self.cart_checks:
+            print("   ⚠️  No 'FUST Count' column in the API export, skipping the cart check")
+        return self.cart_checks
+    
+    def api_route_customers(self, api_df):
+        """Normalized customer names of one route's API orders
+        
+        In compact mode the route only collects the distinct integer codes it
+        uses and looks up the names normalized once for the whole export.
+        """
+        names = api_df['Customer Name']
+        if self.api_names is not None and isinstance(names.dtype, pd.CategoricalDtype):
+            codes = np.unique(names.cat.codes.to_numpy())
+            customers = set(self.api_names[codes[codes >= 0]])
+        else:
+            customers = set(normalize_series(names.dropna().unique()))
+        customers.discard('')
+        return customers
+    
     def normalize_customer_name(self, name):
         """Normalize customer name for comparison"""
-        if pd.isna(name) or name == '':
-            return ''
-        
-        name = str(name).lower().strip()
-        # Remove common suffixes
-        name = re.sub(r'\s+(bv|b\.v\.|vof|v\.o\.f\.|gmbh|webshop|retail|export)\s*$', '', name)
-        # Remove punctuation
-        name = re.sub(r'[^\w\s]', ' ', name)
-        # Normalize whitespace
-        name = re.sub(r'\s+', ' ', name)
-        return name.strip()
+        return normalize_name(name)
     
-    def extract_customers_from_excel(self, df, route_key):
-        """Extract customer names from Excel sheet"""
-        customers = set()
+    def excel_name_frame(self, routes):
+        """Raw Excel customer values of all routes as one (route, source, raw) frame
         
-        # Try common column names
-        customer_columns = ['Klant', 'Customer', 'Client', 'Naam', 'Name', 'Customer Name']
+        source is 'match' for values from columns whose header looks like a
+        customer column and 'first' for the first column, which
+        customer_frames falls back to for routes where those give no names.
+        """
+        parts = []
+        for route_key in routes:
+            df = self.excel_data.get(route_key)
+            if df is None or len(df.columns) == 0:
+                continue
+            columns = [col for col in df.columns if any(term in str(col).lower() for term in CUSTOMER_COLUMN_TERMS)]
+            for source, cols in [('match', columns), ('first', [df.columns[0]])]:
+                for col in cols:
+                    values = df[col].dropna()
+                    parts.append(pd.DataFrame({'route': route_key, 'source': source, 'raw': values.to_numpy(dtype=object)}))
+        if not parts:
+            return pd.DataFrame(columns=['route', 'source', 'raw'], dtype=object)
+        return pd.concat(parts, ignore_index=True)
+    
+    def api_name_frame(self, routes):
+        """API customers of all routes: raw names as (route, raw), or (route, customer) when already normalized"""
+        if self.api_totals:
+            rows = [(route_key, customer) for route_key in routes for customer in self.api_totals.get(route_key, {}).get('customers', ())]
+            return pd.DataFrame(rows, columns=['route', 'customer'], dtype=object)
         
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if any(term in col_lower for term in ['klant', 'customer', 'client', 'naam', 'name']):
-                # Get unique non-empty values
-                unique_values = df[col].dropna().unique()
-                for val in unique_values:
-                    normalized = self.normalize_customer_name(val)
-                    if normalized:
-                        customers.add(normalized)
+        if self.api_names is not None:
+            # Compact mode: names were normalized once at load time, routes look them up by code
+            rows = [(route_key, customer) for route_key in routes if route_key in self.api_data
+                    for customer in self.api_route_customers(self.api_data[route_key])]
+            return pd.DataFrame(rows, columns=['route', 'customer'], dtype=object)
         
-        # If no customer column found, use first column (usually customer names)
-        if len(customers) == 0 and len(df.columns) > 0:
-            first_col = df.columns[0]
-            unique_values = df[first_col].dropna().unique()
-            for val in unique_values:
-                normalized = self.normalize_customer_name(val)
-                if normalized:
-                    customers.add(normalized)
+        parts = []
+        for route_key in routes:
+            api_df = self.api_data.get(route_key)
+            if api_df is None or 'Customer Name' not in api_df.columns:
+                continue
+            names = api_df['Customer Name'].dropna().unique()
+            parts.append(pd.DataFrame({'route': route_key, 'raw': np.asarray(names, dtype=object)}))
+        if not parts:
+            return pd.DataFrame(columns=['route', 'raw'], dtype=object)
+        return pd.concat(parts, ignore_index=True)
+    
+    def normalize_frames(self, frames):
+        """Add the normalized 'customer' to frames with a 'raw' column
         
-        return customers
+        Every distinct raw value across all frames is normalized once, so a
+        name on both the Excel and the API side costs one normalization.
+        """
+        raw_frames = [frame for frame in frames if 'raw' in frame.columns]
+        if raw_frames:
+            codes, uniques = pd.factorize(pd.concat([frame['raw'] for frame in raw_frames], ignore_index=True))
+            normalized = normalize_series(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)[codes]
+            start = 0
+            for frame in raw_frames:
+                frame['customer'] = normalized[start:start + len(frame)]
+                start += len(frame)
+        return frames
     
-    def compare_route(self, route_key):
-        """Compare Excel vs API data for a specific route"""
-        excel_df = self.excel_data.get(route_key, pd.DataFrame())
-        api_df = self.api_data.get(route_key, pd.DataFrame())
+    def customer_frames(self, routes):
+        """Normalized (route, customer) frames for the Excel and the API side"""
+        excel, api = self.normalize_frames([self.excel_name_frame(routes), self.api_name_frame(routes)])
+        
+        excel = excel[excel['customer'] != '']
+        # Routes whose customer-like columns gave no names fall back to the first column
+        matched_routes = excel.loc[excel['source'] == 'match', 'route'].unique()
+        excel = excel[(excel['source'] == 'match') | ~excel['route'].isin(matched_routes)]
+        api = api[api['customer'] != '']
         
-        # Extract customers
-        excel_customers = self.extract_customers_from_excel(excel_df, route_key)
-        api_customers = set()
+        return (excel[['route', 'customer']].drop_duplicates(ignore_index=True),
+                api[['route', 'customer']].drop_duplicates(ignore_index=True))
+    
+    def order_counts(self, routes):
+        """(Excel order count, API order count) per route"""
+        counts = {}
+        for route_key in routes:
+            totals = self.api_totals.get(route_key)
+            api_orders = totals['orders'] if totals is not None else len(self.api_data.get(route_key, ()))
+            counts[route_key] = (len(self.excel_data.get(route_key, ())), api_orders)
+        return counts
+    
+    def reconcile(self, routes=API_ROUTES):
+        """Compare Excel and API customers of every route in one outer merge
         
-        if 'Customer Name' in api_df.columns:
-            api_customers = set(
-                self.normalize_customer_name(name) 
-                for name in api_df['Customer Name'].dropna().unique()
-            )
+        Returns (comparisons, merged): a comparison dict per route (as
+        compare_route returns) and the merged (route, customer, status)
+        frame, where status is 'Missing in API', 'Extra in API' or 'Common'.
+        """
+        routes = list(routes)
+        excel, api = self.customer_frames(routes)
+        merged = excel.merge(api, on=['route', 'customer'], how='outer', indicator=True)
+        merged['status'] = merged['_merge'].map(MERGE_STATUS).astype(object)
+        merged = merged.drop(columns='_merge')
         
-        # Count orders
-        excel_order_count = len(excel_df)
-        api_order_count = len(api_df)
+        counts = merged.groupby(['route', 'status']).size().unstack(fill_value=0)
+        counts = counts.reindex(index=routes, columns=list(STATUS_ORDER), fill_value=0)
+        issues = {key: set(names) for key, names in merged[merged['status'] != 'Common'].groupby(['route', 'status'])['customer']}
+        orders = self.order_counts(routes)
         
-        # Find differences
-        missing_in_api = excel_customers - api_customers
-        extra_in_api = api_customers - excel_customers
-        common = excel_customers & api_customers
+        comparisons = []
+        for route_key in routes:
+            missing, extra, common = (int(n) for n in counts.loc[route_key])
+            excel_orders, api_orders = orders[route_key]
+            comparison = {
+                'route': route_key,
+                'excel_orders': excel_orders,
+                'api_orders': api_orders,
+                'excel_customers': missing + common,
+                'api_customers': extra + common,
+                'common_customers': common,
+                'missing_in_api': issues.get((route_key, 'Missing in API'), set()),
+                'extra_in_api': issues.get((route_key, 'Extra in API'), set()),
+                'order_diff': api_orders - excel_orders,
+                'customer_diff': extra - missing
+            }
+            totals = self.api_totals.get(route_key)
+            if totals is not None:
+                comparison['api_fust'] = totals['fust']
+                comparison['api_carts'] = totals['carts']
+            check = self.cart_checks.get(route_key)
+            if check is not None:
+                comparison['api_fust'] = check['fust']
+                comparison['api_carts'] = check['carts']
+                comparison['engine_carts'] = check['engine_carts']
+                comparison['cart_rows_off'] = check['rows_off']
+            comparisons.append(comparison)
         
-        return {
-            'route': route_key,
-            'excel_orders': excel_order_count,
-            'api_orders': api_order_count,
-            'excel_customers': len(excel_customers),
-            'api_customers': len(api_customers),
-            'common_customers': len(common),
-            'missing_in_api': missing_in_api,
-            'extra_in_api': extra_in_api,
-            'order_diff': api_order_count - excel_order_count,
-            'customer_diff': len(api_customers) - len(excel_customers)
-        }
+        # Routes in the given order, missing before extra before common, then by name
+        merged = merged.assign(
+            route_order=merged['route'].map({route: i for i, route in enumerate(routes)}),
+            status_order=merged['status'].map(STATUS_ORDER)
+        )
+        merged = merged.sort_values(['route_order', 'status_order', 'customer'], ignore_index=True)
+        return comparisons, merged.drop(columns=['route_order', 'status_order'])
+    
+    def compare_route(self, route_key):
+        """Compare Excel vs API data for a specific route"""
+        comparisons, _ = self.reconcile([route_key])
+        return comparisons[0]
     
     def generate_report(self, output_path='reconciliation_report.xlsx'):
         """Generate comprehensive reconciliation report"""
         print("\n📊 Generating reconciliation report...")
         
-        comparisons = []
-        details = []
+        # Compare every route at once
+        with self.profiler.stage('reconcile') as counts:
+            comparisons, merged = self.reconcile(API_ROUTES)
+            counts['customers'] = len(merged)
+        orders = {comp['route']: (comp['excel_orders'], comp['api_orders']) for comp in comparisons}
         
-        # Compare each route
-        routes = [
-            'rijnsburg_morning', 'aalsmeer_morning', 'naaldwijk_morning',
-            'rijnsburg_evening', 'aalsmeer_evening', 'naaldwijk_evening'
-        ]
-        
-        for route_key in routes:
-            comp = self.compare_route(route_key)
-            comparisons.append(comp)
-            
-            # Add details
-            if comp['missing_in_api']:
-                for customer in comp['missing_in_api']:
-                    details.append({
-                        'Route': route_key,
-                        'Issue': 'Missing in API',
-                        'Customer': customer,
-                        'Excel Orders': comp['excel_orders'],
-                        'API Orders': comp['api_orders']
-                    })
-            
-            if comp['extra_in_api']:
-                for customer in comp['extra_in_api']:
-                    details.append({
-                        'Route': route_key,
-                        'Issue': 'Extra in API',
-                        'Customer': customer,
-                        'Excel Orders': comp['excel_orders'],
-                        'API Orders': comp['api_orders']
-                    })
+        # Details: one row per missing/extra customer, straight from the merge
+        issues = merged[merged['status'] != 'Common']
+        details_df = pd.DataFrame({
+            'Route': issues['route'],
+            'Issue': issues['status'],
+            'Customer': issues['customer'],
+            'Excel Orders': issues['route'].map({route: counts[0] for route, counts in orders.items()}),
+            'API Orders': issues['route'].map({route: counts[1] for route, counts in orders.items()})
+        })
         
         # Create summary DataFrame
         summary_data = []
         for comp in comparisons:
             status = '✅ MATCH' if comp['order_diff'] == 0 else '❌ MISMATCH'
-            summary_data.append({
+            row = {
                 'Route': comp['route'],
                 'Excel Orders': comp['excel_orders'],
                 'API Orders': comp['api_orders'],
@@ -239,38 +419,33 @@ class DataReconciliation:
                 'Missing in API': len(comp['missing_in_api']),
                 'Extra in API': len(comp['extra_in_api']),
                 'Status': status
-            })
+            }
+            if 'api_fust' in comp:
+                row['API FUST'] = comp['api_fust']
+                row['API Carts'] = comp['api_carts']
+            if 'engine_carts' in comp:
+                row['Engine Carts'] = comp['engine_carts']
+                row['Carts Diff'] = comp['api_carts'] - comp['engine_carts']
+                row['Cart Rows Off'] = comp['cart_rows_off']
+            summary_data.append(row)
         
         # Write to Excel
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Summary sheet
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Details sheet
-            if details:
-                details_df = pd.DataFrame(details)
-                details_df.to_excel(writer, sheet_name='Details', index=False)
-            
-            # Per-route comparisons
-            for comp in comparisons:
-                if comp['missing_in_api'] or comp['extra_in_api']:
-                    route_details = []
-                    if comp['missing_in_api']:
-                        route_details.extend([
-                            {'Type': 'Missing in API', 'Customer': c} 
-                            for c in comp['missing_in_api']
-                        ])
-                    if comp['extra_in_api']:
-                        route_details.extend([
-                            {'Type': 'Extra in API', 'Customer': c} 
-                            for c in comp['extra_in_api']
-                        ])
-                    
-                    if route_details:
-                        route_df = pd.DataFrame(route_details)
-                        sheet_name = comp['route'].replace('_', ' ').title()[:31]  # Excel sheet name limit
-                        route_df.to_excel(writer, sheet_name=sheet_name, index=False)
+        with self.profiler.stage('write_report') as counts:
+            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+                # Summary sheet
+                summary_df = pd.DataFrame(summary_data)
+                summary_df.to_excel(writer, sheet_name='Summary', index=False)
+                
+                # Details sheet
+                if len(details_df):
+                    details_df.to_excel(writer, sheet_name='Details', index=False)
+                
+                # Per-route comparisons
+                for route_key, route_issues in details_df.groupby('Route', sort=False):
+                    route_df = pd.DataFrame({'Type': route_issues['Issue'], 'Customer': route_issues['Customer']})
+                    sheet_name = route_key.replace('_', ' ').title()[:31]  # Excel sheet name limit
+                    route_df.to_excel(writer, sheet_name=sheet_name, index=False)
+            counts['rows'] = len(summary_df) + len(details_df)
         
         print(f"✅ Report saved to {output_path}")
         
@@ -282,18 +457,27 @@ class DataReconciliation:
             status_icon = '✅' if comp['order_diff'] == 0 else '❌'
             print(f"{status_icon} {comp['route']:25} | Excel: {comp['excel_orders']:3} | API: {comp['api_orders']:3} | Diff: {comp['order_diff']:+3}")
             if comp['missing_in_api']:
-                print(f"   Missing in API ({len(comp['missing_in_api'])}): {', '.join(list(comp['missing_in_api'])[:5])}")
+                print(f"   Missing in API ({len(comp['missing_in_api'])}): {', '.join(sorted(comp['missing_in_api'])[:5])}")
             if comp['extra_in_api']:
-                print(f"   Extra in API ({len(comp['extra_in_api'])}): {', '.join(list(comp['extra_in_api'])[:5])}")
+                print(f"   Extra in API ({len(comp['extra_in_api'])}): {', '.join(sorted(comp['extra_in_api'])[:5])}")
+            if comp.get('cart_rows_off'):
+                print(f"   Carts Needed {comp['api_carts']:g} vs {comp['engine_carts']} from FUST Count (cart engine), "
+                      f"{comp['cart_rows_off']} orders differ")
         
         return output_path
 
 def main():
     parser = argparse.ArgumentParser(description='Reconcile Excel and API data')
     parser.add_argument('--excel', required=True, help='Path to Excel planning file')
-    parser.add_argument('--api-export', required=True, help='Path to API export CSV/Excel file')
+    parser.add_argument('--api-export', required=True, help='Path to API export CSV/Excel file or Florinet orders JSON/JSONL')
     parser.add_argument('--date', required=True, help='Date in YYYY-MM-DD format')
     parser.add_argument('--output', default='reconciliation_report.xlsx', help='Output report file')
+    parser.add_argument('--parse-cache', metavar='DIR', help='Directory of Parquet copies of the parsed inputs, reused while the files are unchanged (requires pyarrow)')
+    parser.add_argument('--stream', action='store_true', help='Stream a CSV/JSON export in chunks, keeping only per-route totals (flat memory for very large exports)')
+    parser.add_argument('--chunksize', type=int, default=STREAM_CHUNK_ROWS, help=f'Rows per chunk with --stream (default: {STREAM_CHUNK_ROWS})')
+    parser.add_argument('--compact', action='store_true', help='Load the export with categorical names/routes and narrow integer counts (less memory on large exports)')
+    parser.add_argument('--check-carts', action='store_true', help="Check every order's Carts Needed against the carts cart_engine derives from its FUST Count")
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
@@ -307,10 +491,29 @@ def main():
     print()
     
     try:
-        reconciler = DataReconciliation(args.excel, args.api_export, args.date)
-        reconciler.load_excel_data()
-        reconciler.load_api_data()
-        reconciler.generate_report(args.output)
+        parse_cache = None
+        if args.parse_cache:
+            if PARQUET_AVAILABLE:
+                parse_cache = ParseCache(args.parse_cache)
+            else:
+                print("⚠️  --parse-cache requires pyarrow, parsing the input files directly")
+        
+        profiler = profiler_from_args(args, 'data_reconciliation')
+        reconciler = DataReconciliation(args.excel, args.api_export, args.date, parse_cache,
+                                        stream=args.stream, chunksize=args.chunksize, compact=args.compact,
+                                        profiler=profiler, check_carts=args.check_carts)
+        with profiler.stage('load_excel_data') as counts:
+            reconciler.load_excel_data()
+            counts['rows'] = sum(len(df) for df in reconciler.excel_data.values())
+        with profiler.stage('load_api_data') as counts:
+            reconciler.load_api_data()
+            if reconciler.api_totals:
+                counts['orders'] = sum(route['orders'] for route in reconciler.api_totals.values())
+            else:
+                counts['orders'] = sum(len(df) for df in reconciler.api_data.values())
+        with profiler.stage('generate_report'):
+            reconciler.generate_report(args.output)
+        profiler.finish()
         
         print("\n✅ Reconciliation complete!")
         
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+FLORINET BULK FETCHER
+Pulls orders/orderrows for a date range straight from the Florinet API
+
+One request per endpoint per delivery date, run concurrently with asyncio
+over a pool of keep-alive HTTP connections (at most --concurrency in flight).
+Failed requests (connection errors, 429 and 5xx) are retried with
+exponential backoff; a 401 re-authenticates once, like js/api.js does.
+Paginated responses ({"data": [...], "last_page": n}) are followed page by
+page. The raw API records are streamed to one JSONL file per endpoint, in
+date order; --format parquet also converts them to Parquet.
+
+The raw order rows only carry customer and location ids, so the customers
+and locations lookups js/api.js loads are fetched too, into customers.jsonl
+and locations.jsonl next to them, where florinet_orders.py finds them to
+fill in customer names and routes.
+
+--cache keeps responses in an on-disk cache (response_cache.py): delivery
+days that are over are served from it without a request, today's and
+future days are revalidated with If-None-Match / If-Modified-Since.
+
+Credentials come from FLORINET_USERNAME / FLORINET_PASSWORD (as in
+api/authenticate.js) or a ready token in FLORINET_TOKEN.
+
+Usage:
+    python florinet_fetch.py --start 2026-02-01 --end 2026-02-28 --output-dir florinet_data
+    python florinet_stub_server.py &    # offline, serves fixtures/florinet
+    python florinet_fetch.py --start 2026-02-09 --end 2026-02-10 --base-url http://127.0.0.1:8765/api/v1 --token stub-token
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import queue
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import pandas as pd
+
+from parse_cache import PARQUET_AVAILABLE
+from response_cache import DEFAULT_MAX_BYTES, ResponseCache
+
+DEFAULT_BASE_URL = 'https://summit.florinet.nl/api/v1'
+
+ENDPOINTS = {
+    'orders': '/external/orders',
+    'orderrows': '/external/orderrows'
+}
+
+# Lookups loadLookupData() in js/api.js fetches once, without dates
+LOOKUP_ENDPOINTS = {
+    'customers': '/external/customers',
+    'locations': '/external/locations'
+}
+
+# Statuses worth retrying: rate limiting and server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A request that failed for good (after retries, or with a non-retryable status)"""
+
+
+class ConnectionPool:
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+
+    def acquire(self):
+        """Reuse an idle keep-alive connection, or open a new one"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            self.opened += 1
+            return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, params=None, headers=None, body=None):
+        """Blocking request on a pooled connection, returning (status, headers, body)"""
+        url = self.prefix + path + (f"?{urlencode(params)}" if params else '')
+        conn = self.acquire()
+        try:
+            conn.request(method, url, body=body, headers=headers or {})
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self.idle.put(conn)
+        return response.status, response.headers, data
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+class FlorinetFetcher:
+    def __init__(self, base_url=DEFAULT_BASE_URL, token=None, username=None, password=None,
+                 concurrency=8, retries=4, backoff=0.5, timeout=60, cache=None, refresh=False):
+        self.base_url = base_url
+        self.pool = ConnectionPool(base_url, timeout)
+        self.token = token
+        self.username = username
+        self.password = password
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.refresh = refresh
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.semaphore = None
+        self.auth_lock = None
+        self.stats = {'requests': 0, 'retries': 0, 'records': 0}
+        self.warnings = []
+
+    async def call(self, method, path, params=None, headers=None, body=None):
+        """Run one pooled request in the executor, bounded by the concurrency limit"""
+        async with self.semaphore:
+            self.stats['requests'] += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.pool.request, method, path, params, headers, body)
+
+    async def send(self, method, path, params=None, headers=None, body=None):
+        """Pooled request, retried with backoff on connection errors, 429 and 5xx"""
+        attempt = 0
+        while True:
+            try:
+                status, response_headers, data = await self.call(method, path, params, headers, body)
+            except (OSError, http.client.HTTPException) as e:
+                status, response_headers, data = None, {}, str(e).encode()
+
+            if (status is None or status in RETRY_STATUSES) and attempt < self.retries:
+                retry_after = response_headers.get('Retry-After', '')
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+                attempt += 1
+                self.stats['retries'] += 1
+                await asyncio.sleep(delay * (1 + random.random() / 4))
+                continue
+            if status is None:
+                raise FetchError(f"{method} {path} {params or ''}: connection failed ({data.decode()})")
+            return status, response_headers, data
+
+    async def authenticate(self, stale_token=None):
+        """Get a token (once, even when many requests hit a 401 together)"""
+        async with self.auth_lock:
+            if self.token and self.token != stale_token:
+                return self.token
+            if not (self.username and self.password):
+                raise FetchError("No token and no FLORINET_USERNAME/FLORINET_PASSWORD to authenticate with")
+
+            body = json.dumps({'username': self.username, 'password': self.password})
+            headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+            status, _, data = await self.send('POST', '/authenticate', body=body, headers=headers)
+            if status != 200:
+                raise FetchError(f"Authentication failed: HTTP {status} {data[:200]!r}")
+            self.token = json.loads(data).get('token')
+            if not self.token:
+                raise FetchError("No token in authentication response")
+            return self.token
+
+    async def get_json(self, path, params, validators=None):
+        """Authenticated GET, re-authenticating once on a 401 like js/api.js
+
+        Returns (payload, response headers); the payload is None when a
+        conditional request (validators as request headers) got a 304.
+        """
+        reauthenticated = False
+        while True:
+            token = self.token or await self.authenticate()
+            headers = {'Authorization': f"Bearer {token}", 'Accept': 'application/json', **(validators or {})}
+            status, response_headers, data = await self.send('GET', path, params, headers)
+
+            if status == 401 and not reauthenticated:
+                reauthenticated = True
+                await self.authenticate(stale_token=token)
+                continue
+            if status == 304 and validators:
+                return None, response_headers
+            if status != 200:
+                raise FetchError(f"GET {path} {params}: HTTP {status} {data[:200]!r}")
+            return json.loads(data), response_headers
+
+    async def fetch_day(self, endpoint, day, slim=False):
+        """All records of one endpoint for one delivery date, following pagination"""
+        params = {'deliveryStartDate': day, 'deliveryEndDate': day}
+        if slim:
+            params['slim'] = 1
+
+        cached = None
+        if self.cache:
+            key = ResponseCache.make_key(self.base_url, endpoint, day, params)
+            cached = None if self.refresh else self.cache.get(key)
+            if cached and cached[3]:
+                self.cache.hits += 1
+                return cached[0]
+
+        validators = {}
+        if cached and cached[1]:
+            validators['If-None-Match'] = cached[1]
+        if cached and cached[2]:
+            validators['If-Modified-Since'] = cached[2]
+        payload, headers = await self.get_json(ENDPOINTS[endpoint], params, validators)
+
+        if payload is None:
+            # 304: the first page is unchanged, so the cached day still stands
+            self.cache.revalidated += 1
+            if ResponseCache.is_complete(day):
+                self.cache.mark_immutable(key)
+            return cached[0]
+
+        complete = True
+        if isinstance(payload, list):
+            records = payload
+        else:
+            records = list(payload.get('data', []))
+            last_page = payload.get('last_page') or payload.get('total_pages') or 1
+            for page in range(2, last_page + 1):
+                try:
+                    page_payload, _ = await self.get_json(ENDPOINTS[endpoint], {**params, 'page': page})
+                except FetchError as e:
+                    # The API has been seen to 500 on page params; keep what we have (as js/api.js does)
+                    self.warnings.append(f"{endpoint} {day}: stopped at page {page - 1}/{last_page} ({e})")
+                    complete = False
+                    break
+                records.extend(page_payload.get('data', []) if isinstance(page_payload, dict) else page_payload)
+
+        if self.cache:
+            self.cache.misses += 1
+            # A day cut short by a failing page is not cached, so the next run retries it
+            if complete:
+                self.cache.put(key, endpoint, day, records, headers.get('ETag'), headers.get('Last-Modified'),
+                               immutable=ResponseCache.is_complete(day))
+        return records
+
+    async def fetch_lookup(self, endpoint):
+        """All records of a lookup endpoint (customers, locations); these take no dates"""
+        payload, _ = await self.get_json(LOOKUP_ENDPOINTS[endpoint], None)
+        records = payload if isinstance(payload, list) else payload.get('data')
+        if not isinstance(records, list):
+            raise FetchError(f"GET {LOOKUP_ENDPOINTS[endpoint]}: response is not an array")
+        return records
+
+    async def fetch_range(self, endpoints, days, writers, slim=False, record_dir=None, lookups=()):
+        """Fetch every (endpoint, day) and lookup concurrently, writing each endpoint's days in date order"""
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.auth_lock = asyncio.Lock()
+        if not self.token:
+            await self.authenticate()
+
+        tasks = {
+            (endpoint, None): asyncio.create_task(self.fetch_lookup(endpoint))
+            for endpoint in lookups
+        }
+        tasks.update({
+            (endpoint, day): asyncio.create_task(self.fetch_day(endpoint, day, slim))
+            for endpoint in endpoints for day in days
+        })
+        try:
+            # Awaiting in order writes days in date order while later days keep downloading
+            for (endpoint, day), task in tasks.items():
+                records = await task
+                writers[endpoint].write(records)
+                self.stats['records'] += len(records)
+                if record_dir:
+                    save_fixture(record_dir, endpoint, day, records)
+                print(f"   ✅ {endpoint}{f' {day}' if day else ''}: {len(records)} records")
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+    def write(self, records):
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+def save_fixture(record_dir, endpoint, day, records):
+    """Save one day's records (or a lookup's, for day None) in the layout florinet_stub_server.py serves"""
+    path = Path(record_dir) / (f"{endpoint}.json" if day is None else f"{endpoint}/{day}.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(records, ensure_ascii=False, indent=1), encoding='utf-8')
+
+
+def jsonl_to_parquet(jsonl_path, parquet_path):
+    """Convert a fetched JSONL file to Parquet; nested values are kept as JSON strings"""
+    df = pd.json_normalize([json.loads(line) for line in open(jsonl_path, encoding='utf-8')])
+    for col in df.columns:
+        if df[col].map(lambda v: isinstance(v, (list, dict))).any():
+            df[col] = df[col].map(lambda v: json.dumps(v) if isinstance(v, (list, dict)) else v)
+    df.to_parquet(parquet_path, index=False)
+    return len(df)
+
+
+def date_range(start, end):
+    """ISO dates from start to end, inclusive"""
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+async def fetch(args):
+    days = date_range(args.start, args.end)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    fetcher = FlorinetFetcher(
+        args.base_url,
+        token=args.token or os.environ.get('FLORINET_TOKEN'),
+        username=os.environ.get('FLORINET_USERNAME', '').strip(),
+        password=os.environ.get('FLORINET_PASSWORD', '').strip(),
+        concurrency=args.concurrency,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout,
+        cache=ResponseCache(args.cache, args.cache_size * 1024 * 1024) if args.cache else None,
+        refresh=args.refresh
+    )
+    lookups = [] if args.no_lookups else list(LOOKUP_ENDPOINTS)
+    writers = {endpoint: JsonlWriter(output_dir / f"{endpoint}_{args.start}_{args.end}.jsonl") for endpoint in args.endpoints}
+    writers.update({endpoint: JsonlWriter(output_dir / f"{endpoint}.jsonl") for endpoint in lookups})
+    try:
+        await fetcher.fetch_range(args.endpoints, days, writers, args.slim, args.record, lookups)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        fetcher.close()
+        if fetcher.cache:
+            fetcher.cache.close()
+    return fetcher, writers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch Florinet orders/orderrows for a date range')
+    parser.add_argument('--start', required=True, help='First delivery date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last delivery date, inclusive (default: --start)')
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS), help='Endpoints to fetch (default: orders orderrows)')
+    parser.add_argument('--output-dir', default='florinet_data', help='Directory for the JSONL output (default: florinet_data)')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl', help='Also convert the JSONL to Parquet (requires pyarrow) (default: jsonl)')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help=f'API base URL (default: {DEFAULT_BASE_URL})')
+    parser.add_argument('--token', help='Bearer token (default: $FLORINET_TOKEN, else authenticate)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Max requests in flight / pooled connections (default: 8)')
+    parser.add_argument('--retries', type=int, default=4, help='Retries per request on connection errors, 429 and 5xx (default: 4)')
+    parser.add_argument('--backoff', type=float, default=0.5, help='First retry delay in seconds, doubled per retry (default: 0.5)')
+    parser.add_argument('--timeout', type=float, default=60, help='Socket timeout in seconds (default: 60)')
+    parser.add_argument('--no-lookups', action='store_true', help='Skip the customers/locations lookups (florinet_orders.py then cannot resolve raw order rows)')
+    parser.add_argument('--slim', action='store_true', help='Ask for slim records (drops location data needed for route mapping)')
+    parser.add_argument('--cache', metavar='PATH', help='On-disk response cache (SQLite file) shared between runs, e.g. .florinet_cache.sqlite')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help=f'Cache size limit in MB, least recently used days are evicted (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached responses and fetch everything again (the cache is updated)')
+    parser.add_argument('--record', metavar='FIXTURE_DIR', help='Also save each day as a fixture for florinet_stub_server.py')
+
+    args = parser.parse_args()
+    args.end = args.end or args.start
+
+    print("="*80)
+    print("FLORINET BULK FETCH")
+    print("="*80)
+    print(f"Dates: {args.start} .. {args.end}  Endpoints: {', '.join(args.endpoints)}  Concurrency: {args.concurrency}")
+    print()
+
+    start = time.perf_counter()
+    try:
+        fetcher, writers = asyncio.run(fetch(args))
+    except (FetchError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    for warning in fetcher.warnings:
+        print(f"   ⚠️  {warning}")
+    if args.format == 'parquet' and not PARQUET_AVAILABLE:
+        print("   ⚠️  --format parquet requires pyarrow, keeping the JSONL only")
+    elif args.format == 'parquet':
+        for writer in writers.values():
+            count = jsonl_to_parquet(writer.path, writer.path.with_suffix('.parquet'))
+            print(f"   💾 {writer.path.with_suffix('.parquet')}: {count} records")
+
+    print(f"\n✅ Fetched {fetcher.stats['records']} records in {elapsed:.1f}s "
+          f"({fetcher.stats['requests']} requests, {fetcher.stats['retries']} retries, {fetcher.pool.opened} connections)")
+    if fetcher.cache:
+        cache = fetcher.cache
+        print(f"   Cache: {cache.hits} hits, {cache.revalidated} revalidated, {cache.misses} fetched ({args.cache})")
+    for writer in writers.values():
+        print(f"   {writer.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+FLORINET ORDERS
+Direct ingest of Florinet order records as JSON or JSONL, without the browser CSV export
+
+Reads a JSON array (the api/orders.js and api/orderrows.js payloads, or a
+{"data": [...]} page) or JSONL with one order per line. Records are parsed
+incrementally and each one is turned into a row of the same layout
+js/data-export.js writes: Customer Name, Route Key and the other export columns
+are derived with formatOrderForExport()'s rules, rows are grouped by route in
+the export's order and numbered per route. Numbers keep their type, unlike
+the CSV, which writes 0 as an empty cell.
+
+Raw API records only carry customer_id and delivery_location_id. They are
+enriched first as enrichOrderrow() in js/api.js does, with the customers and
+locations payloads saved next to the orders file (or in --lookup-dir):
+customer and location names, the route from mapLocationToRoute() and the
+FUST count. Without those payloads such a file is refused instead of
+exporting every order as customer 'Unknown' on route '_morning'.
+
+Orders without a period get the one separateOrdersByClientMatch() in
+js/route-mapping.js gives them before they are exported: a customer found in
+only the morning or only the evening list of CLIENT_ROUTE_MAPPING (the
+Planningstabel route lists, read from js/route-mapping.js) takes that period,
+anyone else the one inferPeriodFromOrder() reads from the delivery time or the
+customer name. Route Key, Period and Delivery Time then match the dashboard.
+
+Usage:
+    python florinet_orders.py orders_2026-02-09.jsonl --output api_orders_export_2026-02-09.csv
+"""
+
+import argparse
+import json
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from customer_names import normalize_name
+
+JSON_SUFFIXES = ['.json', '.jsonl', '.ndjson']
+
+EXPORT_COLUMNS = [
+    'Row #', 'Order ID', 'Customer Name', 'Route', 'Route Key', 'Period',
+    'City', 'Delivery Date', 'Delivery Time', 'FUST Type', 'FUST Count',
+    'Total Stems', 'Carts Needed', 'Cart Type', 'Status', 'Matched', 'Notes'
+]
+
+NUMERIC_COLUMNS = ['Row #', 'FUST Count', 'Total Stems', 'Carts Needed']
+
+# Groups in the order groupOrdersByRoute() builds them; other keys go to 'unmatched'
+EXPORT_GROUPS = [
+    'rijnsburg_morning', 'aalsmeer_morning', 'naaldwijk_morning',
+    'rijnsburg_evening', 'aalsmeer_evening', 'naaldwijk_evening', 'unmatched'
+]
+
+ROUTE_DISPLAY_NAMES = {'rijnsburg': 'Rijnsburg', 'aalsmeer': 'Aalsmeer', 'naaldwijk': 'Naaldwijk'}
+DEFAULT_TIMES = {'morning': '09:00', 'evening': '18:00'}
+
+# mapLocationToRoute() in js/api.js: delivery_location_id first, then words in the location name
+LOCATION_ROUTES = {32: 'aalsmeer', 34: 'naaldwijk', 36: 'rijnsburg'}
+LOCATION_NAME_ROUTES = [
+    ('aalsmeer', ['aalsmeer', 'alsmeer']),
+    ('naaldwijk', ['naaldwijk', 'nldwijk', 'zuidplas', 'kwekerij', 'klondike'])
+]
+DEFAULT_ROUTE = 'rijnsburg'
+
+# getFustCapacity() in js/api.js
+FUST_CAPACITIES = {'612': 72, '614': 72, '575': 32, '902': 40, '588': 40, '996': 32, '856': 20, '821': 40}
+DEFAULT_FUST_CAPACITY = 72
+
+# Lookup payloads loadLookupData() fetches, looked for next to the orders file and one directory up
+LOOKUP_ENDPOINTS = ['customers', 'locations']
+
+# CLIENT_ROUTE_MAPPING in js/route-mapping.js holds the Planningstabel route lists
+ROUTE_MAPPING_JS = Path(__file__).parent / 'js' / 'route-mapping.js'
+_CLIENT_ROUTE_MAPPING = re.compile(r'^const CLIENT_ROUTE_MAPPING = \{$(.*?)^\};', re.MULTILINE | re.DOTALL)
+_ROUTE_LIST = re.compile(r"^\s*'(\w+)':\s*\[(.*?)\]", re.MULTILINE | re.DOTALL)
+_LIST_ENTRY = re.compile(r"^\s*'([^'\\]*)',?", re.MULTILINE)
+
+# isKnownClient(): words that send a customer to the late delivery route
+LATE_DELIVERY_WORDS = ['rheinmaas', 'plantion', 'algemeen']
+
+# inferPeriodFromOrder(): delivery times from 15:00 on are evening routes
+EVENING_FROM_HOUR = 15
+EVENING_NAME_HINTS = ['avond', 'zaterdag', 'evening', 'afternoon']
+_ISO_TIME = re.compile(r'T(\d{1,2}):(\d{2})')
+_TIME = re.compile(r'(\d{1,2}):(\d{2})')
+
+# Leading integer as parseInt() reads it
+_PARSE_INT = re.compile(r'\s*([+-]?\d+)')
+
+# Bytes read at a time while decoding a JSON array
+READ_BLOCK = 1 << 16
+
+
+def js_truthy(value):
+    """JavaScript truthiness: None, False, 0, NaN and '' are falsy, [] and {} are not"""
+    if value is None or value is False or value == '':
+        return False
+    if isinstance(value, (int, float)) and (value == 0 or math.isnan(value)):
+        return False
+    return True
+
+
+def js_or(*values):
+    """a || b || ... as JavaScript evaluates it"""
+    for value in values[:-1]:
+        if js_truthy(value):
+            return value
+    return values[-1]
+
+
+def js_string_value(value):
+    """String(value) for the JSON values order rows hold; None for null/undefined"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return 'true' if value else 'false'
+    if isinstance(value, (float, np.floating)) and value.is_integer() and abs(value) < 1e21:
+        return str(int(value))
+    return str(value)
+
+
+def js_parse_int_value(value):
+    """parseInt(value), NaN where it gives NaN"""
+    match = _PARSE_INT.match(js_string_value(value) or '')
+    return float(match.group(1)) if match else math.nan
+
+
+def map_location_to_route(location_name, delivery_location_id):
+    """mapLocationToRoute() in js/api.js: the route of a delivery location"""
+    if isinstance(delivery_location_id, (int, float)) and not isinstance(delivery_location_id, bool):
+        if delivery_location_id in LOCATION_ROUTES:
+            return LOCATION_ROUTES[delivery_location_id]
+    if not js_truthy(location_name):
+        return DEFAULT_ROUTE
+    location = str(location_name).lower()
+    for route, words in LOCATION_NAME_ROUTES:
+        if any(word in location for word in words):
+            return route
+    return DEFAULT_ROUTE
+
+
+@lru_cache(maxsize=None)
+def client_route_lists(path=ROUTE_MAPPING_JS):
+    """CLIENT_ROUTE_MAPPING from js/route-mapping.js: {route key: client names}, in the JS order"""
+    block = _CLIENT_ROUTE_MAPPING.search(Path(path).read_text(encoding='utf-8'))
+    if block is None:
+        raise ValueError(f"no CLIENT_ROUTE_MAPPING found in {path}")
+    return {key: _LIST_ENTRY.findall(entries) for key, entries in _ROUTE_LIST.findall(block.group(1))}
+
+
+@lru_cache(maxsize=None)
+def client_route_words(path=ROUTE_MAPPING_JS):
+    """[(route key, normalized name, meaningful words)] per client of CLIENT_ROUTE_MAPPING"""
+    clients = []
+    for key, names in client_route_lists(path).items():
+        for name in names:
+            normalized = normalize_name(name)
+            clients.append((key, normalized, [word for word in normalized.split() if len(word) > 2]))
+    return clients
+
+
+def period_hint(name_lower):
+    """getPeriodHintFromName() in js/route-mapping.js"""
+    return 'evening' if 'avond' in name_lower or 'zaterdag' in name_lower else 'morning'
+
+
+def special_client_route(name_lower):
+    """The route isKnownClient() gives the problem names it checks before normalizing, else None"""
+    if 'superflora' in name_lower or 'astrafund' in name_lower or 'astra fund' in name_lower or 'goldman' in name_lower:
+        return 'naaldwijk'
+    if ('h. star' in name_lower or 'h star' in name_lower) and 'naaldwijk' in name_lower:
+        return 'naaldwijk'
+    if 'l&m' in name_lower or 'lm ' in name_lower or 'l en m' in name_lower:
+        return 'rijnsburg'
+    if 'st.gabriel' in name_lower or 'st gabriel' in name_lower or 'stgabriel' in name_lower:
+        return 'rijnsburg'
+    if 'klok' in name_lower:
+        return next((route for route in ['aalsmeer', 'naaldwijk', 'rijnsburg'] if route in name_lower), 'aalsmeer')
+    if 'eflowers' in name_lower or 'e flowers' in name_lower or name_lower == 'e- flowers':
+        return 'naaldwijk'
+    return None
+
+
+def words_match(api_word, excel_word):
+    return api_word == excel_word or api_word.startswith(excel_word) or excel_word.startswith(api_word)
+
+
+@lru_cache(maxsize=None)
+def known_client(customer_name):
+    """isKnownClient() in js/route-mapping.js: (route, period) of a known client, None otherwise
+
+    A client is known when the name is one of the special cases, a late
+    delivery name, or matches an entry of CLIENT_ROUTE_MAPPING exactly or
+    word for word after normalize_name().
+    """
+    if not customer_name:
+        return None
+    name_lower = customer_name.lower()
+    route = special_client_route(name_lower)
+    if route:
+        return route, period_hint(name_lower)
+
+    normalized = normalize_name(customer_name)
+    if not normalized:
+        return None
+    api_words = normalized.split()
+    if any(word.startswith(late) for late in LATE_DELIVERY_WORDS for word in api_words):
+        return 'late_delivery', None
+
+    meaningful_api_words = [word for word in api_words if len(word) > 2]
+    for key, client, excel_words in client_route_words():
+        # Every meaningful word of the list entry must be in the API name, which may have more
+        if normalized != client and not (excel_words and all(
+            any(words_match(api_word, word) for api_word in meaningful_api_words) for word in excel_words
+        )):
+            continue
+        period = 'evening' if '_evening' in key else 'morning'
+        return key.replace('_morning', '').replace('_evening', ''), period
+    return None
+
+
+def infer_period(order):
+    """inferPeriodFromOrder() in js/route-mapping.js: 'evening' or 'morning' for an order
+
+    The first delivery time found decides (15:00 or later is evening), then
+    evening hints in the customer name, then an evening list entry for the
+    customer.
+    """
+    nested = order.get('order') if isinstance(order.get('order'), dict) else {}
+    candidates = [
+        order.get('delivery_time'), nested.get('delivery_time'), order.get('delivery_date'), nested.get('delivery_date'),
+        order.get('deliveryDate'), order.get('time'), nested.get('time')
+    ]
+    for candidate in filter(js_truthy, candidates):
+        match = _ISO_TIME.search(js_string_value(candidate)) or _TIME.search(js_string_value(candidate))
+        if match:
+            return 'evening' if int(match.group(1)) >= EVENING_FROM_HOUR else 'morning'
+
+    customer_name = str(js_or(order.get('customer_name'), order.get('customer'), '')).lower()
+    if any(hint in customer_name for hint in EVENING_NAME_HINTS):
+        return 'evening'
+    client = known_client(customer_name)
+    return 'evening' if client and client[1] == 'evening' else 'morning'
+
+
+def order_period(order):
+    """The period separateOrdersByClientMatch() in js/route-mapping.js gives an order
+
+    A known client that is only in the morning or only in the evening list
+    of its route gets that period; one in both lists, in neither, or not
+    known at all gets infer_period().
+    """
+    nested = order.get('order') if isinstance(order.get('order'), dict) else {}
+    customer_name = js_or(order.get('customer_name'), nested.get('customer_name'), '')
+    return list_period(str(customer_name)) or infer_period(order)
+
+
+@lru_cache(maxsize=None)
+def list_period(customer_name):
+    """'morning'/'evening' for a known client in only that list of its route, else None"""
+    client = known_client(customer_name)
+    if client is None:
+        return None
+    normalized = normalize_name(customer_name)
+    lists = {key for key, name, _ in client_route_words() if name == normalized}
+    in_morning = f"{client[0]}_morning" in lists
+    in_evening = f"{client[0]}_evening" in lists
+    if in_morning == in_evening:
+        return None
+    return 'evening' if in_evening else 'morning'
+
+
+def extract_properties(row):
+    """extractProperties() in js/api.js: the packaging properties of an order row"""
+    props = {}
+    for prop in row.get('properties') or []:
+        code = prop.get('code')
+        value = (prop.get('pivot') or {}).get('value')
+        if code == 'L11':
+            props['stems_per_bundle'] = js_parse_int_value(value)
+        elif code == 'L13':
+            props['stems_per_container'] = js_parse_int_value(value)
+        elif code == 'L14':
+            props['bundles_per_fust'] = js_parse_int_value(value)
+        elif code == '901':
+            props['fust_code'] = value
+    return props
+
+
+def fust_count(row, props):
+    """calculateFustCount() in js/api.js: FUST (containers) of an order row"""
+    bundles = props.get('bundles_per_fust')
+    if js_truthy(row.get('assembly_amount')) and js_truthy(bundles) and bundles > 0:
+        return row['assembly_amount'] / bundles
+    if js_truthy(row.get('amount_of_transport_carriers')):
+        fust_code = js_or(props.get('fust_code'), row.get('container_code'), '612')
+        return row['amount_of_transport_carriers'] * FUST_CAPACITIES.get(fust_code, DEFAULT_FUST_CAPACITY)
+    if js_truthy(row.get('amount_of_plates')):
+        return row['amount_of_plates']
+    return js_or(row.get('assembly_amount'), 0)
+
+
+def total_stems(row, props):
+    """calculateTotalStems() in js/api.js: stems of an order row"""
+    if js_truthy(props.get('stems_per_bundle')) and js_truthy(row.get('assembly_amount')):
+        return props['stems_per_bundle'] * row['assembly_amount']
+    if js_truthy(row.get('nr_base_product')) and js_truthy(row.get('amount_of_plates')):
+        return js_parse_int_value(row['nr_base_product']) * row['amount_of_plates']
+    if js_truthy(props.get('stems_per_container')) and js_truthy(row.get('amount_of_plates')):
+        return props['stems_per_container'] * row['amount_of_plates']
+    return js_or(row.get('assembly_amount'), 0)
+
+
+def api_order(record):
+    """The order of a raw API record (nested in an order row, or the order itself)
+
+    None for orders the dashboard has already enriched, which carry their
+    customer name and route.
+    """
+    if 'route' in record or 'customer_name' in record:
+        return None
+    order = record['order'] if isinstance(record.get('order'), dict) else record
+    return order if 'customer_id' in order or 'delivery_location_id' in order else None
+
+
+def enrich_orderrow(row, customers, locations):
+    """enrichOrderrow() in js/api.js: customer and location names, route and FUST of a raw API record
+
+    customers and locations map ids to the /external/customers and
+    /external/locations records. Ids missing from them give the same
+    'customer <id>' / 'Location <id>' names as the dashboard.
+    """
+    order = api_order(row)
+    customer_id = order.get('customer_id')
+    location_id = order.get('delivery_location_id')
+    customer = customers.get(customer_id)
+    location = locations.get(location_id)
+    props = extract_properties(row)
+
+    enriched = dict(row)
+    if customer:
+        enriched['customer_name'] = js_or(customer.get('name'), customer.get('company_name'), f"Customer {customer_id}")
+    else:
+        enriched['customer_name'] = f"customer {customer_id}"
+    enriched['location_name'] = location.get('name') if location else f"Location {location_id}"
+    enriched['route'] = map_location_to_route(enriched['location_name'], location_id)
+    enriched['bundles_per_fust'] = props.get('bundles_per_fust')
+    enriched['fust_code'] = props.get('fust_code')
+    enriched['fust_count'] = fust_count(row, props)
+    enriched['total_stems'] = total_stems(row, props)
+    enriched['delivery_date'] = order.get('delivery_date')
+    enriched['transport_date'] = order.get('transport_date')
+    enriched['delivery_location_id'] = location_id
+    enriched['customer_id'] = customer_id
+    enriched['order_id'] = js_or(row.get('order_id'), order.get('id'), order.get('order_id'))
+    return enriched
+
+
+def read_lookups(path, lookup_dir=None):
+    """({id: customer}, {id: location}) from the customers/locations payloads for an orders file
+
+    They are read from lookup_dir, or else from the orders file's directory
+    or the one above it (where florinet_fetch.py and the fixtures keep them).
+    """
+    dirs = [Path(lookup_dir)] if lookup_dir else [Path(path).parent, Path(path).parent.parent]
+    lookups = []
+    for endpoint in LOOKUP_ENDPOINTS:
+        found = [d / f"{endpoint}{suffix}" for d in dirs for suffix in JSON_SUFFIXES if (d / f"{endpoint}{suffix}").exists()]
+        if not found:
+            raise ValueError(
+                f"{path} holds raw API order rows with only customer and location ids, and no "
+                f"{endpoint}.json(l) was found in {' or '.join(str(d) for d in dirs)} to resolve them "
+                f"(florinet_fetch.py saves the /external/{endpoint} payload there)"
+            )
+        lookups.append({record['id']: record for record in iter_order_records(found[0]) if js_truthy(record.get('id'))})
+    return tuple(lookups)
+
+
+def iter_orders(path, lookup_dir=None):
+    """Order records as the dashboard exports them
+
+    Raw API records are enriched first, and orders without a period get
+    order_period().
+    """
+    lookups = None
+    for record in iter_order_records(path):
+        if api_order(record) is not None:
+            if lookups is None:
+                lookups = read_lookups(path, lookup_dir)
+            record = enrich_orderrow(record, *lookups)
+        if not js_truthy(record.get('period')):
+            record = dict(record, period=order_period(record))
+        yield record
+
+
+def route_key(order):
+    """Route key as exportToCSV derives it: '<route lowercased>_<period or morning>'"""
+    return f"{str(js_or(order.get('route'), '')).lower()}_{js_or(order.get('period'), 'morning')}"
+
+
+def export_row(order, index):
+    """One export row for an order, following formatOrderForExport() in js/data-export.js"""
+    route = str(js_or(order.get('route'), '')).lower()
+    period = js_or(order.get('period'), 'morning')
+    return {
+        'Row #': index + 1,
+        'Order ID': js_or(order.get('order_id'), order.get('id'), 'N/A'),
+        'Customer Name': js_or(order.get('customer_name'), order.get('customer'), 'Unknown'),
+        'Route': f"{ROUTE_DISPLAY_NAMES.get(route, route)} ({str(period).upper()})",
+        'Route Key': route_key(order),
+        'Period': str(period).upper(),
+        'City': js_or(order.get('location_name'), order.get('deliveryLocation'), 'N/A'),
+        'Delivery Date': js_or(order.get('delivery_date'), order.get('date'), 'N/A'),
+        'Delivery Time': js_or(order.get('delivery_time'), DEFAULT_TIMES.get(order.get('period'), '09:00')),
+        'FUST Type': js_or(order.get('fust_type'), order.get('fustType'), 'N/A'),
+        'FUST Count': js_or(order.get('fust_count'), order.get('fustCount'), 0),
+        'Total Stems': js_or(order.get('total_stems'), order.get('quantity'), 0),
+        'Carts Needed': js_or(order.get('cartsNeeded'), 0),
+        'Cart Type': js_or(order.get('cartType'), 'Standard'),
+        'Status': js_or(order.get('status'), 'Active'),
+        'Matched': 'No' if order.get('matched') is False else 'Yes',
+        'Notes': js_or(order.get('notes'), '')
+    }
+
+
+def iter_json_array(f):
+    """Yield the items of a top-level JSON array one at a time"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(READ_BLOCK).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("not a JSON array")
+    pos = 1
+    eof = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            item = None
+            end = None
+        # A value that runs up to the end of the buffer may be cut off mid-way
+        if end is None or (end == len(buffer) and not eof):
+            block = f.read(READ_BLOCK)
+            eof = not block
+            buffer = buffer[pos:] + block
+            pos = 0
+            continue
+        yield item
+        pos = end
+
+
+def iter_order_records(path):
+    """Yield order records from a JSONL file, a JSON array or a {"data": [...]} page"""
+    with open(path, encoding='utf-8') as f:
+        first = f.read(READ_BLOCK).lstrip()[:1]
+        f.seek(0)
+
+        if first == '[':
+            yield from iter_json_array(f)
+            return
+
+        if first == '{' and not str(path).endswith(('.jsonl', '.ndjson')):
+            # A single JSON document: a paginated page wraps the records in "data"
+            try:
+                payload = json.load(f)
+            except json.JSONDecodeError:
+                f.seek(0)  # more than one document: JSONL under a .json name
+            else:
+                yield from payload.get('data', [payload])
+                return
+
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_export_rows(path, lookup_dir=None):
+    """Yield (group, export row) per order, numbering rows per export group"""
+    counters = dict.fromkeys(EXPORT_GROUPS, 0)
+    for order in iter_orders(path, lookup_dir):
+        key = route_key(order)
+        group = key if key in counters else 'unmatched'
+        yield group, export_row(order, counters[group])
+        counters[group] += 1
+
+
+def export_frame(rows, columns=None):
+    """Typed export frame from export rows, keeping only the given columns"""
+    columns = [col for col in EXPORT_COLUMNS if columns is None or col in columns]
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def read_orders_json(path, columns=None, lookup_dir=None):
+    """Read Florinet order records into a frame with the CSV export layout
+
+    Rows are ordered by route group as exportToCSV writes them. Only the
+    given columns are kept per record while parsing.
+    """
+    wanted = [col for col in EXPORT_COLUMNS if columns is None or col in columns]
+    groups = {group: [] for group in EXPORT_GROUPS}
+    for group, row in iter_export_rows(path, lookup_dir):
+        groups[group].append([row[col] for col in wanted])
+
+    return export_frame(
+        (dict(zip(wanted, values)) for group in EXPORT_GROUPS for values in groups[group]),
+        wanted
+    )
+
+
+def iter_orders_json_chunks(path, chunksize, columns=None, lookup_dir=None):
+    """Yield export frames of up to chunksize orders, in file order"""
+    wanted = [col for col in EXPORT_COLUMNS if columns is None or col in columns]
+    rows = []
+    for _, row in iter_export_rows(path, lookup_dir):
+        rows.append({col: row[col] for col in wanted})
+        if len(rows) == chunksize:
+            yield export_frame(rows, wanted)
+            rows = []
+    if rows:
+        yield export_frame(rows, wanted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert Florinet order JSON/JSONL to the API export CSV')
+    parser.add_argument('orders', help='Orders as a JSON array, {"data": [...]} page or JSONL')
+    parser.add_argument('--output', required=True, help='Output CSV path')
+    parser.add_argument('--lookup-dir', help='Directory with the customers.json(l) and locations.json(l) payloads for raw order rows (default: next to the orders file or one up)')
+
+    args = parser.parse_args()
+
+    try:
+        df = read_orders_json(args.orders, lookup_dir=args.lookup_dir)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    df.to_csv(args.output, index=False)
+    print(f"✅ Wrote {len(df)} orders to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
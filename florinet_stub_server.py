@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+FLORINET STUB SERVER
+Local stand-in for the Florinet API, serving recorded fixtures for offline runs
+
+Serves POST <prefix>/authenticate and GET <prefix>/external/orders and
+<prefix>/external/orderrows from a fixture directory laid out as
+<endpoint>/<YYYY-MM-DD>.json (a JSON array of records per delivery date, as
+saved by florinet_fetch.py --record), and the customers and locations
+lookups from customers.json and locations.json. Requests need the stub's
+bearer token.
+--page-size answers with {"data": [...], "last_page": n} pages, and
+--fail-rate / --latency make it flaky and slow to exercise the fetcher's
+retries and concurrency. Responses carry an ETag and Last-Modified and
+conditional requests get a 304, like a caching-aware API would.
+
+Usage:
+    python florinet_stub_server.py --fixtures fixtures/florinet --port 8765
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from datetime import date, timedelta
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+STUB_TOKEN = 'stub-token'
+
+ENDPOINTS = ['orders', 'orderrows']
+LOOKUP_ENDPOINTS = ['customers', 'locations']
+
+
+def load_fixtures(fixture_dir):
+    """{endpoint: {date: [records]}} from <fixture_dir>/<endpoint>/<date>.json,
+    and {lookup: [records]} from <fixture_dir>/<lookup>.json"""
+    fixtures = {}
+    for endpoint in ENDPOINTS:
+        fixtures[endpoint] = {
+            path.stem: json.loads(path.read_text(encoding='utf-8'))
+            for path in sorted((Path(fixture_dir) / endpoint).glob('*.json'))
+        }
+    for endpoint in LOOKUP_ENDPOINTS:
+        path = Path(fixture_dir) / f"{endpoint}.json"
+        fixtures[endpoint] = json.loads(path.read_text(encoding='utf-8')) if path.exists() else []
+    return fixtures
+
+
+def records_between(by_date, start, end):
+    """Fixture records for every delivery date from start to end, inclusive"""
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    records = []
+    for i in range((last - first).days + 1):
+        records.extend(by_date.get((first + timedelta(days=i)).isoformat(), []))
+    return records
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so the fetcher's pooling is exercised
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def not_modified(self, etag):
+        """True when the request's validators still match the response"""
+        if 'If-None-Match' in self.headers:
+            return etag in [tag.strip() for tag in self.headers['If-None-Match'].split(',')]
+        if 'If-Modified-Since' in self.headers:
+            try:
+                return parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp() >= int(self.server.loaded_at)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_cacheable_json(self, payload):
+        """200 with ETag / Last-Modified, or 304 when the client's copy is current"""
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.not_modified(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(self.server.loaded_at, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def flaky(self):
+        """Apply the configured latency, and fail some requests with a 503"""
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if server.fail_rate and random.random() < server.fail_rate:
+            self.send_json(503, {'error': 'Service temporarily unavailable (stub)'})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if not urlsplit(self.path).path.endswith('/authenticate'):
+            return self.send_json(404, {'error': 'Not found'})
+        if self.flaky():
+            return
+        self.send_json(200, {'token': STUB_TOKEN, 'expires_at': None})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        if '/external/' not in url.path or endpoint not in ENDPOINTS + LOOKUP_ENDPOINTS:
+            return self.send_json(404, {'error': 'Not found'})
+        if self.headers.get('Authorization') != f"Bearer {STUB_TOKEN}":
+            return self.send_json(401, {'error': 'Token expired', 'needsRefresh': True})
+        if self.flaky():
+            return
+        if endpoint in LOOKUP_ENDPOINTS:
+            # Lookups take no dates and, as js/api.js expects, come as one array
+            return self.send_cacheable_json(self.server.fixtures[endpoint])
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        start = query.get('deliveryStartDate') or query.get('deliveryDate')
+        end = query.get('deliveryEndDate') or start
+        if not start:
+            return self.send_json(400, {'error': 'deliveryStartDate is required'})
+        try:
+            records = records_between(self.server.fixtures[endpoint], start, end)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+
+        page_size = self.server.page_size
+        if not page_size:
+            return self.send_cacheable_json(records)
+
+        last_page = max(1, -(-len(records) // page_size))
+        page = int(query.get('page', 1))
+        self.send_cacheable_json({
+            'data': records[(page - 1) * page_size:page * page_size],
+            'current_page': page,
+            'last_page': last_page,
+            'total': len(records)
+        })
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(fixture_dir, port=8765, host='127.0.0.1', page_size=0, fail_rate=0.0, latency=0.0, quiet=False):
+    """Create (but don't start) a stub server; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.fixtures = load_fixtures(fixture_dir)
+    server.loaded_at = time.time()
+    server.page_size = page_size
+    server.fail_rate = fail_rate
+    server.latency = latency
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded Florinet fixtures as a local API')
+    parser.add_argument('--fixtures', default='fixtures/florinet', help='Fixture directory (default: fixtures/florinet)')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port (default: 8765)')
+    parser.add_argument('--page-size', type=int, default=0, help='Paginate responses with this many records per page (default: plain arrays)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with a 503 (default: 0)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request (default: 0)')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests')
+
+    args = parser.parse_args()
+
+    server = make_server(args.fixtures, args.port, args.host, args.page_size, args.fail_rate, args.latency, args.quiet)
+    counts = {endpoint: sum(len(records) for records in server.fixtures[endpoint].values()) for endpoint in ENDPOINTS}
+    counts.update({endpoint: len(server.fixtures[endpoint]) for endpoint in LOOKUP_ENDPOINTS})
+    print(f"🧪 Florinet stub on http://{args.host}:{server.server_address[1]}/api/v1 (token: {STUB_TOKEN})")
+    print(f"   Fixtures: {', '.join(f'{endpoint} {count}' for endpoint, count in counts.items())}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -8,83 +8,266 @@ Usage:
 """
 
 import pandas as pd
+import numpy as np
 import argparse
-import re
+import math
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import json
+import os
+
+from customer_names import normalize_name, get_base_name
+from data_loaders import EVENING_SHEETS, load_api_customers, read_sheet_customers
+from parse_cache import ParseCache, PARQUET_AVAILABLE
+from score_cache import ScoreCache, DEFAULT_MAX_ENTRIES
+from stage_profiler import add_profile_arguments, profiler_from_args
 
 try:
     from rapidfuzz import fuzz, process
+    import rapidfuzz
     USE_RAPIDFUZZ = True
 except ImportError:
     try:
         from fuzzywuzzy import fuzz, process
         USE_RAPIDFUZZ = False
     except ImportError:
-        print("⚠️  Warning: Neither rapidfuzz nor fuzzywuzzy installed. Using basic matching.")
+        print("⚠️  Warning: Neither rapidfuzz nor fuzzywuzzy installed. Using NumPy bigram matching.")
         print("   Install with: pip install rapidfuzz (recommended) or pip install fuzzywuzzy")
         USE_RAPIDFUZZ = None
 
-class CustomerMatcher:
+# Rows of the Excel x API score matrix scored per cdist call; bounds peak
+# memory on very large routes (2048 x 10k float64 is ~160 MB)
+MATRIX_CHUNK_ROWS = 2048
+
+# Smallest chunk of Excel names sent to a worker process as one task
+PROCESS_CHUNK_ROWS = 64
+
+MATCH_ROUTES = ['aalsmeer_evening', 'naaldwijk_evening', 'rijnsburg_evening']
+
+
+def score_matrix(excel_names, api_names, score_cutoff=None, workers=1):
+    """Score every Excel name against every API name in one cdist pass
+    
+    With score_cutoff, scores below it are 0 (as with extractOne).
+    """
+    return process.cdist(
+        excel_names,
+        api_names,
+        scorer=fuzz.WRatio,
+        score_cutoff=score_cutoff,
+        dtype=np.float64,
+        workers=workers
+    )
+
+
+def best_two(scores):
+    """Return best index/score and runner-up index/score for each matrix row"""
+    rows = np.arange(scores.shape[0])
+    best_idx = scores.argmax(axis=1)
+    best_score = scores[rows, best_idx]
+    
+    if scores.shape[1] < 2:
+        runner_idx = np.full(len(rows), -1)
+        return best_idx, best_score, runner_idx, np.zeros(len(rows))
+    
+    masked = scores.copy()
+    masked[rows, best_idx] = -1
+    runner_idx = masked.argmax(axis=1)
+    runner_score = masked[rows, runner_idx]
+    return best_idx, best_score, runner_idx, runner_score
+
+
+def presence_matrix(id_arrays, width):
+    """Dense 0/1 matrix with one row per array of column ids"""
+    matrix = np.zeros((len(id_arrays), width), dtype=np.float32)
+    if id_arrays:
+        rows = np.repeat(np.arange(len(id_arrays)), [len(ids) for ids in id_arrays])
+        matrix[rows, np.concatenate(id_arrays)] = 1
+    return matrix
+
+
+class BigramVectors:
+    """Character-bigram vectors for the fallback scorer (no rapidfuzz/fuzzywuzzy)
+    
+    Each name is encoded once, from its normalized form, into the ids of the
+    padded character bigrams and the words it contains. A block of Excel x API
+    scores is then a few matrix products of presence vectors, calibrated to
+    WRatio's 0-100 scale:
+      - Dice coefficient of the bigram sets (WRatio's plain ratio)
+      - 0.95 x the share of the shorter name's words found in the other name
+        (WRatio's token set ratio)
+      - when lengths differ by 1.5x or more, both are replaced by their partial
+        forms: 0.9 x the share of the shorter name's bigrams found in the
+        longer one, and the word share scaled by 0.95 x 0.9
+    Equal base names score at least 85, as in the old character-overlap
+    fallback.
+    """
+    
     def __init__(self):
+        self.bigram_vocab = {}
+        self.word_vocab = {}
+        self.encoded = {}
+    
+    def encode(self, name):
+        """Return (bigram ids, word ids, normalized length, base name), cached per name"""
+        if name not in self.encoded:
+            normalized = normalize_name(name)
+            padded = f" {normalized} "
+            bigrams = {padded[i:i + 2] for i in range(len(padded) - 1)} if normalized else set()
+            words = set(normalized.split())
+            self.encoded[name] = (
+                np.array([self.bigram_vocab.setdefault(bigram, len(self.bigram_vocab)) for bigram in bigrams], dtype=np.int64),
+                np.array([self.word_vocab.setdefault(word, len(self.word_vocab)) for word in words], dtype=np.int64),
+                len(normalized),
+                get_base_name(name)
+            )
+        return self.encoded[name]
+    
+    def score(self, excel_names, api_names):
+        """Score matrix (0-100) for every Excel x API pair"""
+        excel = [self.encode(name) for name in excel_names]
+        api = [self.encode(name) for name in api_names]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            def similarity(position, vocab):
+                excel_ids = [encoded[position] for encoded in excel]
+                api_ids = [encoded[position] for encoded in api]
+                shared = presence_matrix(excel_ids, len(vocab)) @ presence_matrix(api_ids, len(vocab)).T
+                excel_sizes = np.array([len(ids) for ids in excel_ids], dtype=np.float64)[:, None]
+                api_sizes = np.array([len(ids) for ids in api_ids], dtype=np.float64)[None, :]
+                dice = np.nan_to_num(200 * shared / (excel_sizes + api_sizes))
+                overlap = np.nan_to_num(100 * shared / np.minimum(excel_sizes, api_sizes))
+                return dice, overlap
+            
+            dice, bigram_overlap = similarity(0, self.bigram_vocab)
+            _, word_overlap = similarity(1, self.word_vocab)
+            
+            excel_lengths = np.array([encoded[2] for encoded in excel], dtype=np.float64)[:, None]
+            api_lengths = np.array([encoded[2] for encoded in api], dtype=np.float64)[None, :]
+            length_ratio = np.maximum(excel_lengths, api_lengths) / np.minimum(excel_lengths, api_lengths)
+        
+        scores = np.where(
+            length_ratio >= 1.5,
+            np.maximum.reduce([dice, 0.9 * bigram_overlap, 0.95 * 0.9 * word_overlap]),
+            np.maximum(dice, 0.95 * word_overlap)
+        )
+        
+        # Same base name (e.g. two locations of one customer)
+        bases = [encoded[3] for encoded in excel + api]
+        codes, _ = pd.factorize(pd.Series(bases, dtype=object))
+        excel_codes, api_codes = codes[:len(excel)], codes[len(excel):]
+        same_base = (excel_codes[:, None] == api_codes[None, :]) & (np.array(bases[:len(excel)], dtype=object) != '')[:, None]
+        return np.where(same_base, np.maximum(scores, 85), scores)
+
+
+class CandidateIndex:
+    """Inverted n-gram index over API names used to block candidate pairs
+    
+    Every API name is keyed on the character trigrams of its normalized form
+    and on the tokens of its base name. An Excel name only reaches WRatio
+    scoring for API names that share at least min_share of the smaller key
+    set, so recall is traded for speed with a single knob.
+    """
+    
+    def __init__(self, api_names, normalize, base_name):
+        self.normalize = normalize
+        self.base_name = base_name
+        self.names = list(api_names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        
+        postings = defaultdict(list)
+        key_counts = []
+        for i, name in enumerate(self.names):
+            keys = self.name_keys(name)
+            key_counts.append(len(keys))
+            for key in keys:
+                postings[key].append(i)
+        
+        self.postings = {key: np.array(ids, dtype=np.int32) for key, ids in postings.items()}
+        self.key_counts = np.array(key_counts, dtype=np.int32)
+    
+    def name_keys(self, name):
+        """Trigrams of the padded normalized name plus base-name tokens"""
+        normalized = f" {self.normalize(name)} "
+        keys = {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+        keys.update('w:' + token for token in self.base_name(name).split())
+        return keys
+    
+    def candidates(self, name, min_share):
+        """Return ids of API names sharing enough keys with name"""
+        query_keys = self.name_keys(name)
+        keys = [key for key in query_keys if key in self.postings]
+        if not keys:
+            return np.array([], dtype=np.int32)
+        
+        shared = np.bincount(
+            np.concatenate([self.postings[key] for key in keys]),
+            minlength=len(self.names)
+        )
+        query_count = len(query_keys)
+        needed = np.ceil(min_share * np.minimum(query_count, self.key_counts))
+        return np.flatnonzero((shared > 0) & (shared >= needed))
+
+
+# Matcher of a worker process, set up once per worker by init_worker()
+_worker_matcher = None
+
+
+def init_worker(api_customers, blocking, index):
+    """Process pool initializer: receive every route's API names once per worker"""
+    global _worker_matcher
+    _worker_matcher = CustomerMatcher(blocking=blocking)
+    _worker_matcher.api_customers = api_customers
+    _worker_matcher.index = index
+
+
+def match_chunk(route_key, excel_names, threshold):
+    """Process pool task: match one chunk of a route's Excel names"""
+    matcher = _worker_matcher
+    matcher.runner_ups = {}
+    matcher.pair_stats = {'total': 0, 'scored': 0}
+    results = matcher.match_route(route_key, excel_names, matcher.api_customers.get(route_key, []), threshold)
+    return results, matcher.runner_ups, matcher.pair_stats
+
+
+class CustomerMatcher:
+    def __init__(self, workers=1, blocking=None, cache=None, pool='threads', parse_cache=None, compact=False):
         self.api_customers = {}
         self.excel_customers = {}
         self.matches = []
         self.unmatched_api = []
         self.unmatched_excel = []
+        self.runner_ups = {}
+        self.workers = workers
+        self.pool = pool
+        self.blocking = blocking
+        self.index = None
+        self.cache = cache
+        self.parse_cache = parse_cache
+        self.compact = compact
+        self.pair_stats = {'total': 0, 'scored': 0}
+        self.bigrams = BigramVectors()
+        self.carried_rows = {}
+        self.changes = []
+        self.change_summary = []
         
     def normalize_name(self, name):
         """Normalize customer name for comparison"""
-        if pd.isna(name) or name == '':
-            return ''
-        
-        name = str(name).strip()
-        
-        # Remove extra whitespace
-        name = ' '.join(name.split())
-        
-        # Common replacements
-        name = name.replace('&', 'en')
-        name = name.replace('.', '')
-        name = name.replace(',', '')
-        name = name.replace('-', ' ')
-        name = name.replace('/', ' ')
-        
-        # Remove common suffixes (for base name comparison)
-        name = re.sub(r'\s+(bv|b\.v\.|vof|v\.o\.f\.|gmbh|webshop|retail|export|holland)\s*$', '', name, flags=re.IGNORECASE)
-        
-        # Lowercase for comparison
-        return name.lower().strip()
+        return normalize_name(name)
     
     def get_base_name(self, name):
         """Get base name without location/variant suffixes"""
-        normalized = self.normalize_name(name)
-        
-        # Remove location indicators
-        normalized = re.sub(r'\s+(naaldwijk|aalsmeer|rijnsburg|villa|klondike|koolhaas|houter|zuidplas)\s*$', '', normalized, flags=re.IGNORECASE)
-        
-        return normalized
+        return get_base_name(name)
     
     def load_api_customers(self, api_path):
         """Load customers from API export CSV"""
         print("🔍 Reading API export...")
         
-        df = pd.read_csv(api_path)
-        
-        # Group by route and get unique customers
-        route_customers = defaultdict(set)
-        
-        for _, row in df.iterrows():
-            customer = str(row.get('Customer Name', '')).strip()
-            route_key = str(row.get('Route Key', '')).strip()
-            
-            if customer and customer != 'nan' and customer != 'Unknown':
-                route_customers[route_key].add(customer)
+        route_customers = load_api_customers(api_path, self.parse_cache, self.compact)
         
-        # Convert to dict
         for route_key, customers in route_customers.items():
-            self.api_customers[route_key] = sorted(list(customers))
+            self.api_customers[route_key] = customers
             print(f"   {route_key}: {len(customers)} unique customers")
         
         total = sum(len(c) for c in self.api_customers.values())
@@ -95,42 +278,16 @@ class CustomerMatcher:
         """Load customers from Excel file"""
         print("\n🔍 Reading Excel file...")
         
-        evening_sheets = {
-            'Avond. Aalsmeer': 'aalsmeer_evening',
-            'Avond. Naaldwijk': 'naaldwijk_evening',
-            'Avond. Rijnsburg': 'rijnsburg_evening'
-        }
-        
-        xls = pd.ExcelFile(excel_path)
+        customers = read_sheet_customers(excel_path, EVENING_SHEETS, self.parse_cache)
         
-        for sheet_name, route_key in evening_sheets.items():
-            if sheet_name not in xls.sheet_names:
+        for sheet_name, route_key in EVENING_SHEETS.items():
+            if route_key not in customers:
                 print(f"   ⚠️  Sheet '{sheet_name}' not found")
                 self.excel_customers[route_key] = []
                 continue
             
-            df = pd.read_excel(excel_path, sheet_name=sheet_name)
-            
-            # Find customer name column (usually column B or first text column)
-            customer_col = None
-            for col in df.columns:
-                col_lower = str(col).lower()
-                if any(term in col_lower for term in ['klant', 'customer', 'client', 'naam', 'name']):
-                    customer_col = col
-                    break
-            
-            # If no customer column found, use first column
-            if customer_col is None and len(df.columns) > 0:
-                customer_col = df.columns[0]
-            
-            if customer_col:
-                customers = df[customer_col].dropna().unique()
-                customers = [str(c).strip() for c in customers if str(c).strip() and str(c).strip().lower() != 'nan']
-                self.excel_customers[route_key] = sorted(customers)
-                print(f"   {sheet_name}: {len(customers)} customers")
-            else:
-                self.excel_customers[route_key] = []
-                print(f"   ⚠️  {sheet_name}: No customer column found")
+            self.excel_customers[route_key] = customers[route_key]
+            print(f"   {sheet_name}: {len(customers[route_key])} customers")
         
         total = sum(len(c) for c in self.excel_customers.values())
         print(f"✅ Found {total} total unique customers in Excel")
@@ -141,7 +298,12 @@ class CustomerMatcher:
         if not api_names:
             return None, 0
         
-        if USE_RAPIDFUZZ:
+        if USE_RAPIDFUZZ and self.cache is not None:
+            scores = self.score_block([excel_name], api_names, threshold)[0]
+            best = int(scores.argmax())
+            if scores[best] >= threshold:
+                return api_names[best], float(scores[best])
+        elif USE_RAPIDFUZZ:
             # Use rapidfuzz (faster, better)
             result = process.extractOne(
                 excel_name,
@@ -161,47 +323,332 @@ class CustomerMatcher:
             if result and result[1] >= threshold:
                 return result[0], result[1]
         else:
-            # Basic matching (fallback)
-            excel_normalized = self.normalize_name(excel_name)
-            best_match = None
-            best_score = 0
+            # NumPy bigram matching (fallback)
+            scores = self.bigrams.score([excel_name], api_names)[0]
+            best = int(scores.argmax())
+            if scores[best] > 0 and scores[best] >= threshold:
+                return api_names[best], float(scores[best])
+        
+        return None, 0
+    
+    def match_route(self, route_key, excel_names, api_names, threshold=70):
+        """Find the best API match for every Excel name of one route
+        
+        Returns a list of (excel_name, api_name or None, score) in Excel order.
+        With rapidfuzz the whole Excel x API matrix is scored by cdist, which
+        releases the GIL and spreads rows over self.workers threads; the
+        runner-up and margin per Excel name are kept in self.runner_ups.
+        """
+        self.pair_stats['total'] += len(excel_names) * len(api_names)
+        
+        if self.blocking is not None and excel_names and api_names:
+            return self.match_route_blocked(route_key, excel_names, api_names, threshold)
+        
+        self.pair_stats['scored'] += len(excel_names) * len(api_names)
+        
+        if USE_RAPIDFUZZ is False or not excel_names or not api_names:
+            results = []
+            for excel_name in excel_names:
+                match_name, score = self.fuzzy_match(excel_name, api_names, threshold)
+                results.append((excel_name, match_name, score))
+            return results
+        
+        results = []
+        for start in range(0, len(excel_names), MATRIX_CHUNK_ROWS):
+            scores = self.score_block(excel_names[start:start + MATRIX_CHUNK_ROWS], api_names, threshold)
+            best_idx, best_score, runner_idx, runner_score = best_two(scores)
             
-            for api_name in api_names:
-                api_normalized = self.normalize_name(api_name)
+            for i in range(len(best_idx)):
+                excel_name = excel_names[start + i]
+                score = float(best_score[i])
                 
-                # Simple similarity
-                if excel_normalized in api_normalized or api_normalized in excel_normalized:
-                    score = 90  # High score for substring match
-                elif self.get_base_name(excel_name) == self.get_base_name(api_name):
-                    score = 85  # High score for base name match
+                # Same acceptance rule as extractOne with score_cutoff
+                if score >= threshold:
+                    results.append((excel_name, api_names[best_idx[i]], score))
                 else:
-                    # Simple character overlap
-                    excel_chars = set(excel_normalized)
-                    api_chars = set(api_normalized)
-                    if excel_chars and api_chars:
-                        score = len(excel_chars & api_chars) / len(excel_chars | api_chars) * 100
-                    else:
-                        score = 0
+                    results.append((excel_name, None, 0))
                 
-                if score > best_score:
-                    best_score = score
-                    best_match = api_name
+                runner_name = api_names[runner_idx[i]] if runner_idx[i] >= 0 and runner_score[i] > 0 else None
+                runner = float(runner_score[i]) if runner_name else 0.0
+                self.runner_ups[(route_key, excel_name)] = (runner_name, runner, score - runner)
+        
+        return results
+    
+    def score_block(self, excel_names, api_names, threshold=70):
+        """Score one Excel x API block, consulting the score cache if enabled
+        
+        Only uncached pairs are scored: first whole columns for API names no
+        cached row knows yet, then the remaining gaps of the other rows.
+        Scores below threshold are zeroed, like cdist's score_cutoff.
+        """
+        if USE_RAPIDFUZZ is None:
+            scores = self.bigrams.score(excel_names, api_names)
+            scores[scores < threshold] = 0
+            return scores
+        
+        if self.cache is None:
+            return score_matrix(excel_names, api_names, threshold, self.workers)
+        
+        scores = self.cache.lookup(excel_names, api_names)
+        computed = np.isnan(scores)
+        
+        if computed.any():
+            missing = computed.copy()
+            new_cols = np.flatnonzero(missing.all(axis=0))
+            if len(new_cols):
+                scores[:, new_cols] = score_matrix(excel_names, [api_names[j] for j in new_cols], workers=self.workers)
+                missing[:, new_cols] = False
             
-            if best_score >= threshold:
-                return best_match, best_score
+            rows = np.flatnonzero(missing.any(axis=1))
+            if len(rows):
+                cols = np.flatnonzero(missing[rows].any(axis=0))
+                block = score_matrix([excel_names[i] for i in rows], [api_names[j] for j in cols], workers=self.workers)
+                gaps = missing[np.ix_(rows, cols)]
+                sub = scores[np.ix_(rows, cols)]
+                sub[gaps] = block[gaps]
+                scores[np.ix_(rows, cols)] = sub
+            
+            self.cache.store(excel_names, api_names, scores, computed)
         
-        return None, 0
+        scores[scores < threshold] = 0
+        return scores
+    
+    def build_index(self):
+        """Build the blocking index once over every route's API names"""
+        all_names = sorted({name for names in self.api_customers.values() for name in names})
+        self.index = CandidateIndex(all_names, normalize_name, get_base_name)
+        print(f"   Blocking index: {len(all_names)} API names, {len(self.index.postings)} keys")
+        return self.index
+    
+    def match_route_blocked(self, route_key, excel_names, api_names, threshold=70):
+        """Like match_route, but only score candidates from the blocking index"""
+        if self.index is None:
+            self.build_index()
+        
+        # Position of each global index id within this route, -1 if absent
+        route_pos = np.full(len(self.index.names), -1, dtype=np.int64)
+        for pos, name in enumerate(api_names):
+            route_pos[self.index.ids[name]] = pos
+        
+        results = []
+        for excel_name in excel_names:
+            positions = route_pos[self.index.candidates(excel_name, self.blocking)]
+            positions = np.sort(positions[positions >= 0])
+            candidates = [api_names[pos] for pos in positions]
+            self.pair_stats['scored'] += len(candidates)
+            
+            if not candidates:
+                results.append((excel_name, None, 0))
+                self.runner_ups[(route_key, excel_name)] = (None, 0.0, 0.0)
+                continue
+            
+            if USE_RAPIDFUZZ is not False:
+                scores = self.score_block([excel_name], candidates, threshold)
+                best_idx, best_score, runner_idx, runner_score = (values[0] for values in best_two(scores))
+                score = float(best_score)
+                match_name = candidates[best_idx] if score >= threshold else None
+                runner_name = candidates[runner_idx] if runner_idx >= 0 and runner_score > 0 else None
+                runner = float(runner_score) if runner_name else 0.0
+                self.runner_ups[(route_key, excel_name)] = (runner_name, runner, score - runner)
+                if match_name is None:
+                    score = 0
+            else:
+                match_name, score = self.fuzzy_match(excel_name, candidates, threshold)
+            
+            results.append((excel_name, match_name, score))
+        
+        return results
     
-    def match_customers(self, threshold_high=90, threshold_medium=70):
-        """Perform fuzzy matching between Excel and API customers"""
+    def build_match_row(self, route_key, excel_name, match_name, score, threshold_high, threshold_medium):
+        """Build the mapping row for a matched Excel/API pair"""
+        confidence = 'HIGH' if score >= threshold_high else 'MEDIUM' if score >= threshold_medium else 'LOW'
+        
+        # Determine action
+        if score >= threshold_high:
+            action = 'UPDATE_EXCEL'
+            notes = f"High confidence match ({score:.1f}%)"
+        elif score >= threshold_medium:
+            action = 'REVIEW'
+            notes = f"Medium confidence match ({score:.1f}%) - review needed"
+        else:
+            action = 'MANUAL_REVIEW'
+            notes = f"Low confidence match ({score:.1f}%) - manual review required"
+        
+        return {
+            'Route': route_key,
+            'Excel_Name': excel_name,
+            'API_Name': match_name,
+            'Match_Score': f"{score:.1f}%",
+            'Confidence': confidence,
+            'Action': action,
+            'Notes': notes
+        }
+    
+    def match_routes(self, routes, threshold=70):
+        """Match every route, returning {route: (results, pair stats)}
+        
+        In 'processes' pool mode the routes are split into chunks of Excel
+        names and scored on a ProcessPoolExecutor; results are merged back in
+        route and chunk order, so the output matches a sequential run.
+        """
+        if self.pool != 'processes' or self.workers == 1:
+            route_results = {}
+            for route_key in routes:
+                pairs_before = dict(self.pair_stats)
+                results = self.match_route(route_key, self.excel_customers.get(route_key, []), self.api_customers.get(route_key, []), threshold)
+                stats = {key: self.pair_stats[key] - pairs_before[key] for key in self.pair_stats}
+                route_results[route_key] = (results, stats)
+            return route_results
+        
+        workers = os.cpu_count() if self.workers < 1 else self.workers
+        if self.blocking is not None and self.index is None:
+            self.build_index()
+        
+        tasks = []
+        for route_key in routes:
+            excel_names = self.excel_customers.get(route_key, [])
+            chunk_rows = max(PROCESS_CHUNK_ROWS, math.ceil(len(excel_names) / workers))
+            for start in range(0, len(excel_names), chunk_rows):
+                tasks.append((route_key, excel_names[start:start + chunk_rows]))
+        
+        print(f"   Scoring {len(tasks)} chunks on {workers} worker processes")
+        route_results = {route_key: ([], {'total': 0, 'scored': 0}) for route_key in routes}
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(self.api_customers, self.blocking, self.index)) as executor:
+            futures = [executor.submit(match_chunk, route_key, excel_names, threshold) for route_key, excel_names in tasks]
+            
+            for (route_key, _), future in zip(tasks, futures):
+                results, runner_ups, stats = future.result()
+                route_results[route_key][0].extend(results)
+                self.runner_ups.update(runner_ups)
+                for key, value in stats.items():
+                    route_results[route_key][1][key] += value
+                    self.pair_stats[key] += value
+        
+        return route_results
+    
+    def load_previous_mapping(self, mapping_path):
+        """Load a previous customer_mapping CSV as {route: {'excel': {name: row}, 'api': names, 'rows': rows}}"""
+        print(f"\n🔍 Reading previous mapping {mapping_path}...")
+        df = pd.read_csv(mapping_path, dtype=str, keep_default_na=False)
+        
+        previous = {}
+        for row in df.to_dict('records'):
+            route = previous.setdefault(row['Route'], {'excel': {}, 'api': set(), 'rows': []})
+            route['rows'].append(row)
+            if row['Excel_Name']:
+                route['excel'][row['Excel_Name']] = row
+            if row['API_Name']:
+                route['api'].add(row['API_Name'])
+        
+        print(f"   Loaded {len(df)} rows for {len(previous)} routes")
+        return previous
+    
+    def match_route_incremental(self, route_key, excel_names, api_names, previous, threshold=70):
+        """Match one route, reusing the previous mapping's decisions
+        
+        Excel names that are new, or whose previous match left the API, are
+        scored against all API names. Every other Excel name keeps its
+        previous row unless one of the API names added since then beats its
+        previous score (ties go to the name that sorts first, as in a full
+        run). Carried rows are stored in self.carried_rows[route_key].
+        """
+        prev_rows = previous['excel']
+        current_api = set(api_names)
+        added_api = [name for name in api_names if name not in previous['api']]
+        removed_api = previous['api'] - current_api
+        api_pos = {name: i for i, name in enumerate(api_names)}
+        
+        rescore = []
+        carried = {}
+        for excel_name in excel_names:
+            row = prev_rows.get(excel_name)
+            if row is None or row['API_Name'] in removed_api:
+                rescore.append(excel_name)
+            else:
+                carried[excel_name] = row
+        
+        results = {}
+        for excel_name, match_name, score in self.match_route(route_key, rescore, api_names, threshold):
+            results[excel_name] = (excel_name, match_name, score)
+        
+        if added_api and carried:
+            for excel_name, match_name, score in self.match_route(route_key, list(carried), added_api, threshold):
+                if not match_name:
+                    continue
+                
+                row = carried[excel_name]
+                prev_score = float(row['Match_Score'].rstrip('%') or 0) if row['API_Name'] else 0
+                if (not row['API_Name'] or score > prev_score or
+                        (score == prev_score and api_pos[match_name] < api_pos[row['API_Name']])):
+                    del carried[excel_name]
+                    results[excel_name] = (excel_name, match_name, score)
+        
+        self.carried_rows[route_key] = carried
+        self.change_summary.append({
+            'Route': route_key,
+            'Excel_Added': sum(1 for name in excel_names if name not in prev_rows),
+            'Excel_Removed': len(set(prev_rows) - set(excel_names)),
+            'API_Added': len(added_api),
+            'API_Removed': len(removed_api),
+            'Rows_Carried': len(carried),
+            'Rows_Rescored': len(results)
+        })
+        return [results[name] if name in results else (name, carried[name]['API_Name'] or None, 0)
+                for name in excel_names]
+    
+    def diff_previous(self, route_key, previous, rows):
+        """Record rows whose decision differs from the previous mapping"""
+        def row_key(row):
+            return ('', row['API_Name']) if not row['Excel_Name'] else (row['Excel_Name'], '')
+        
+        old = {row_key(row): row for row in previous['rows']}
+        new = {row_key(row): row for row in rows}
+        
+        for key in sorted(set(old) | set(new)):
+            old_row, new_row = old.get(key), new.get(key)
+            if old_row and new_row and (old_row['API_Name'], old_row['Action']) == (new_row['API_Name'], new_row['Action']):
+                continue
+            self.changes.append({
+                'Route': route_key,
+                'Excel_Name': key[0],
+                'Change': 'ADDED' if old_row is None else 'REMOVED' if new_row is None else 'CHANGED',
+                'Old_API_Name': old_row['API_Name'] if old_row else '',
+                'New_API_Name': new_row['API_Name'] if new_row else '',
+                'Old_Action': old_row['Action'] if old_row else '',
+                'New_Action': new_row['Action'] if new_row else ''
+            })
+    
+    def match_customers(self, threshold_high=90, threshold_medium=70, previous=None):
+        """Perform fuzzy matching between Excel and API customers
+        
+        With previous (see load_previous_mapping) only the names that changed
+        since that mapping are rescored.
+        """
         print("\n🔄 Performing fuzzy matching...")
         
         all_matches = []
+        if previous is None:
+            route_results = self.match_routes(MATCH_ROUTES, threshold_medium)
+        else:
+            route_results = {}
+            empty = {'excel': {}, 'api': set(), 'rows': []}
+            for route_key in MATCH_ROUTES:
+                pairs_before = dict(self.pair_stats)
+                results = self.match_route_incremental(
+                    route_key,
+                    self.excel_customers.get(route_key, []),
+                    self.api_customers.get(route_key, []),
+                    previous.get(route_key, empty),
+                    threshold_medium
+                )
+                stats = {key: self.pair_stats[key] - pairs_before[key] for key in self.pair_stats}
+                route_results[route_key] = (results, stats)
         
         # Match for each route
-        for route_key in ['aalsmeer_evening', 'naaldwijk_evening', 'rijnsburg_evening']:
+        for route_key in MATCH_ROUTES:
             excel_customers = self.excel_customers.get(route_key, [])
             api_customers = self.api_customers.get(route_key, [])
+            results, route_pairs = route_results[route_key]
             
             print(f"\n   Matching {route_key}...")
             print(f"      Excel: {len(excel_customers)} customers")
@@ -209,35 +656,18 @@ class CustomerMatcher:
             
             # Track matched API customers
             matched_api = set()
+            route_start = len(all_matches)
+            carried = self.carried_rows.get(route_key, {})
             
             # Match each Excel customer
-            for excel_name in excel_customers:
-                match_name, score = self.fuzzy_match(excel_name, api_customers, threshold_medium)
-                
-                if match_name:
+            for excel_name, match_name, score in results:
+                if excel_name in carried:
+                    if match_name:
+                        matched_api.add(match_name)
+                    all_matches.append(carried[excel_name])
+                elif match_name:
                     matched_api.add(match_name)
-                    confidence = 'HIGH' if score >= threshold_high else 'MEDIUM' if score >= threshold_medium else 'LOW'
-                    
-                    # Determine action
-                    if score >= threshold_high:
-                        action = 'UPDATE_EXCEL'
-                        notes = f"High confidence match ({score:.1f}%)"
-                    elif score >= threshold_medium:
-                        action = 'REVIEW'
-                        notes = f"Medium confidence match ({score:.1f}%) - review needed"
-                    else:
-                        action = 'MANUAL_REVIEW'
-                        notes = f"Low confidence match ({score:.1f}%) - manual review required"
-                    
-                    all_matches.append({
-                        'Route': route_key,
-                        'Excel_Name': excel_name,
-                        'API_Name': match_name,
-                        'Match_Score': f"{score:.1f}%",
-                        'Confidence': confidence,
-                        'Action': action,
-                        'Notes': notes
-                    })
+                    all_matches.append(self.build_match_row(route_key, excel_name, match_name, score, threshold_high, threshold_medium))
                 else:
                     # No match found
                     all_matches.append({
@@ -263,8 +693,18 @@ class CustomerMatcher:
                     'Notes': 'Customer exists in API but not in Excel - needs to be added'
                 })
             
+            if self.blocking is not None:
+                route_total, route_scored = route_pairs['total'], route_pairs['scored']
+                print(f"      Blocking: scored {route_scored}/{route_total} pairs ({route_total - route_scored} pruned)")
             print(f"      Matched: {len(matched_api)}/{len(excel_customers)} Excel customers")
             print(f"      Unmatched API: {len(unmatched_api)} customers")
+            
+            if previous is not None:
+                route_changes = next(summary for summary in self.change_summary if summary['Route'] == route_key)
+                self.diff_previous(route_key, previous.get(route_key, empty), all_matches[route_start:])
+                print(f"      Incremental: {route_changes['Rows_Carried']} carried, {route_changes['Rows_Rescored']} rescored "
+                      f"(Excel +{route_changes['Excel_Added']}/-{route_changes['Excel_Removed']}, "
+                      f"API +{route_changes['API_Added']}/-{route_changes['API_Removed']})")
         
         self.matches = all_matches
         return all_matches
@@ -281,25 +721,72 @@ class CustomerMatcher:
             'not_in_api': len(df[df['Action'] == 'NOT_IN_API']),
             'add_to_excel': len(df[df['Action'] == 'ADD_TO_EXCEL']),
             'update_excel': len(df[df['Action'] == 'UPDATE_EXCEL']),
-            'needs_review': len(df[df['Action'].isin(['REVIEW', 'MANUAL_REVIEW'])])
+            'needs_review': len(df[df['Action'].isin(['REVIEW', 'MANUAL_REVIEW'])]),
+            'pairs_total': self.pair_stats['total'],
+            'pairs_scored': self.pair_stats['scored'],
+            'cache_hits': self.cache.hits if self.cache is not None else 0,
+            'cache_misses': self.cache.misses if self.cache is not None else 0
         }
         
         return summary
     
+    def mapping_frame(self):
+        """The mapping as a DataFrame, with the columns of the mapping CSV"""
+        return pd.DataFrame(self.matches)
+    
     def save_mapping(self, output_path):
         """Save mapping to CSV"""
-        df = pd.DataFrame(self.matches)
-        df.to_csv(output_path, index=False)
+        self.mapping_frame().to_csv(output_path, index=False)
         print(f"\n💾 Saved mapping to: {output_path}")
         return output_path
 
+def matcher_from_args(args):
+    """CustomerMatcher for the --workers, --pool, --blocking, --cache, --cache-size, --parse-cache and --compact options
+    
+    Caches that can't be used are left out with a warning. Returns None
+    after printing the error when --blocking is out of range. The caller
+    closes matcher.cache.
+    """
+    if args.blocking is not None and not 0 < args.blocking <= 1:
+        print(f"❌ Error: --blocking must be between 0 and 1, got {args.blocking}")
+        return None
+    
+    cache = None
+    if args.cache and args.pool == 'processes' and args.workers != 1:
+        print("⚠️  --cache is not shared with worker processes, scoring without cache")
+    elif args.cache:
+        if USE_RAPIDFUZZ:
+            cache = ScoreCache(args.cache, 'WRatio', f"rapidfuzz-{rapidfuzz.__version__}", args.cache_size)
+            print(f"🗄️  Score cache: {args.cache} ({len(cache)} cached scores)")
+        else:
+            print("⚠️  --cache requires rapidfuzz, scoring without cache")
+    
+    parse_cache = None
+    if args.parse_cache:
+        if PARQUET_AVAILABLE:
+            parse_cache = ParseCache(args.parse_cache)
+        else:
+            print("⚠️  --parse-cache requires pyarrow, parsing the input files directly")
+    
+    return CustomerMatcher(workers=args.workers, blocking=args.blocking, cache=cache, pool=args.pool, parse_cache=parse_cache, compact=args.compact)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Fuzzy match customers between API and Excel')
-    parser.add_argument('--api', required=True, help='Path to API export CSV')
+    parser.add_argument('--api', required=True, help='Path to API export CSV or Florinet orders JSON/JSONL')
     parser.add_argument('--excel', required=True, help='Path to Excel file')
     parser.add_argument('--output', default='customer_mapping.csv', help='Output mapping CSV')
     parser.add_argument('--threshold-high', type=float, default=90, help='High confidence threshold (default: 90)')
     parser.add_argument('--threshold-medium', type=float, default=70, help='Medium confidence threshold (default: 70)')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel workers used to score the match matrix (-1 = all cores, default: 1)')
+    parser.add_argument('--pool', choices=['threads', 'processes'], default='threads', help='Run workers as cdist threads or as a process pool over routes and chunks (default: threads)')
+    parser.add_argument('--incremental-from', metavar='PREVIOUS_MAPPING', help='Previous customer_mapping CSV; only rescore names added or removed since then')
+    parser.add_argument('--cache', help='SQLite score cache reused between runs (requires rapidfuzz)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES, help=f'Max cached pair scores before LRU eviction (default: {DEFAULT_MAX_ENTRIES})')
+    parser.add_argument('--parse-cache', metavar='DIR', help='Directory of Parquet copies of the parsed API export and workbook, reused while the files are unchanged (requires pyarrow)')
+    parser.add_argument('--compact', action='store_true', help='Read API names and route keys as categoricals and deduplicate on their codes (less memory on large exports)')
+    parser.add_argument('--blocking', type=float, metavar='MIN_SHARE', help='Only score pairs sharing this fraction (0-1) of n-gram keys; lower keeps more recall (default: score all pairs)')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
@@ -317,15 +804,33 @@ def main():
         print(f"❌ Error: Excel file not found: {args.excel}")
         return 1
     
+    if args.incremental_from and not Path(args.incremental_from).exists():
+        print(f"❌ Error: Previous mapping not found: {args.incremental_from}")
+        return 1
+    
     # Create matcher
-    matcher = CustomerMatcher()
+    matcher = matcher_from_args(args)
+    if matcher is None:
+        return 1
+    cache, parse_cache = matcher.cache, matcher.parse_cache
+    profiler = profiler_from_args(args, 'fuzzy_match_customers')
     
     # Load data
-    matcher.load_api_customers(args.api)
-    matcher.load_excel_customers(args.excel)
+    with profiler.stage('load_api_customers') as counts:
+        matcher.load_api_customers(args.api)
+        counts['customers'] = sum(len(c) for c in matcher.api_customers.values())
+    with profiler.stage('load_excel_customers') as counts:
+        matcher.load_excel_customers(args.excel)
+        counts['customers'] = sum(len(c) for c in matcher.excel_customers.values())
     
     # Perform matching
-    matches = matcher.match_customers(args.threshold_high, args.threshold_medium)
+    previous = None
+    if args.incremental_from:
+        with profiler.stage('load_previous_mapping'):
+            previous = matcher.load_previous_mapping(args.incremental_from)
+    with profiler.stage('match_customers') as counts:
+        matches = matcher.match_customers(args.threshold_high, args.threshold_medium, previous)
+        counts.update(rows=len(matches), pairs_total=matcher.pair_stats['total'], pairs_scored=matcher.pair_stats['scored'])
     
     # Generate summary
     summary = matcher.generate_summary()
@@ -341,10 +846,33 @@ def main():
     print(f"  ➕ Add to Excel: {summary['add_to_excel']}")
     print(f"  🔄 Update Excel: {summary['update_excel']}")
     print(f"  👀 Needs review: {summary['needs_review']}")
+    if args.blocking is not None:
+        pruned = summary['pairs_total'] - summary['pairs_scored']
+        print(f"  ✂️  Blocking pruned {pruned}/{summary['pairs_total']} pairs (min share {args.blocking})")
+    if parse_cache is not None:
+        print(f"  📦 Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses")
+    if cache is not None:
+        print(f"  🗄️  Score cache: {summary['cache_hits']} hits, {summary['cache_misses']} misses")
+    if previous is not None:
+        carried = sum(route['Rows_Carried'] for route in matcher.change_summary)
+        rescored = sum(route['Rows_Rescored'] for route in matcher.change_summary)
+        print(f"  ♻️  Incremental: {carried} rows carried over, {rescored} rescored, {len(matcher.changes)} decisions changed")
     print("="*80)
     
     # Save mapping
-    matcher.save_mapping(args.output)
+    with profiler.stage('save_mapping') as counts:
+        matcher.save_mapping(args.output)
+        counts['rows'] = len(matches)
+    
+    if previous is not None:
+        changes_path = str(Path(args.output).with_suffix('')) + '_changes.csv'
+        pd.DataFrame(matcher.changes, columns=['Route', 'Excel_Name', 'Change', 'Old_API_Name', 'New_API_Name', 'Old_Action', 'New_Action']).to_csv(changes_path, index=False)
+        print(f"💾 Saved change summary to: {changes_path}")
+    
+    if cache is not None:
+        cache.close()
+    
+    profiler.finish()
     
     print("\n✅ Matching complete!")
     print(f"📋 Review the mapping file: {args.output}")
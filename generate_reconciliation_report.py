@@ -3,6 +3,11 @@
 RECONCILIATION REPORT GENERATOR
 Generates before/after comparison report
 
+Each route's API, before and after customer lists are indexed once
+(name_index.NameIndex): equality checks are hash lookups and substring
+matches come from Aho-Corasick scans, so the report stays near-linear in
+the number of customers.
+
 Usage:
     python generate_reconciliation_report.py --api api_orders_export.csv --excel-before Planningstabel_2_0__2_.xlsx --excel-after Planningstabel_2_0__2_UPDATED.xlsx --output reconciliation_report.xlsx
 """
@@ -10,10 +15,17 @@ Usage:
 import pandas as pd
 import argparse
 from pathlib import Path
-from collections import defaultdict
+
+from customer_names import normalize_name
+from data_loaders import EVENING_SHEETS, load_api_customers, read_sheet_customers
+from name_index import NameIndex, first_containment_matches
+from parse_cache import ParseCache, PARQUET_AVAILABLE
+from stage_profiler import StageProfiler, add_profile_arguments, profiler_from_args
 
 class ReconciliationReport:
-    def __init__(self):
+    def __init__(self, parse_cache=None, profiler=None):
+        self.parse_cache = parse_cache
+        self.profiler = profiler or StageProfiler(enabled=False)
         self.before_stats = {}
         self.after_stats = {}
         self.api_stats = {}
@@ -22,17 +34,7 @@ class ReconciliationReport:
     def load_api_data(self, api_path):
         """Load API customer data"""
         print("🔍 Loading API data...")
-        df = pd.read_csv(api_path)
-        
-        route_customers = defaultdict(set)
-        for _, row in df.iterrows():
-            customer = str(row.get('Customer Name', '')).strip()
-            route_key = str(row.get('Route Key', '')).strip()
-            
-            if customer and customer != 'nan' and customer != 'Unknown':
-                route_customers[route_key].add(customer)
-        
-        self.api_stats = {k: sorted(list(v)) for k, v in route_customers.items()}
+        self.api_stats = load_api_customers(api_path, self.parse_cache)
         
         for route, customers in self.api_stats.items():
             print(f"   {route}: {len(customers)} customers")
@@ -43,70 +45,43 @@ class ReconciliationReport:
         """Load Excel customer data"""
         print(f"\n🔍 Loading {label} data...")
         
-        evening_sheets = {
-            'Avond. Aalsmeer': 'aalsmeer_evening',
-            'Avond. Naaldwijk': 'naaldwijk_evening',
-            'Avond. Rijnsburg': 'rijnsburg_evening'
-        }
-        
-        xls = pd.ExcelFile(excel_path)
+        customers = read_sheet_customers(excel_path, EVENING_SHEETS, self.parse_cache)
         excel_customers = {}
         
-        for sheet_name, route_key in evening_sheets.items():
-            if sheet_name not in xls.sheet_names:
-                excel_customers[route_key] = []
-                continue
-            
-            df = pd.read_excel(excel_path, sheet_name=sheet_name)
-            
-            # Find customer column
-            customer_col = None
-            for col in df.columns:
-                col_lower = str(col).lower()
-                if any(term in col_lower for term in ['klant', 'customer', 'client', 'naam', 'name']):
-                    customer_col = col
-                    break
-            
-            if customer_col is None and len(df.columns) > 0:
-                customer_col = df.columns[0]
-            
-            if customer_col:
-                customers = df[customer_col].dropna().unique()
-                customers = [str(c).strip() for c in customers if str(c).strip() and str(c).strip().lower() != 'nan']
-                excel_customers[route_key] = sorted(customers)
-                print(f"   {sheet_name}: {len(customers)} customers")
-            else:
-                excel_customers[route_key] = []
+        for sheet_name, route_key in EVENING_SHEETS.items():
+            excel_customers[route_key] = customers.get(route_key, [])
+            if route_key in customers:
+                print(f"   {sheet_name}: {len(customers[route_key])} customers")
         
         return excel_customers
     
     def normalize_name(self, name):
         """Normalize name for comparison"""
-        if pd.isna(name) or name == '':
-            return ''
-        return str(name).lower().strip()
+        return normalize_name(name)
     
     def count_matches(self, excel_customers, api_customers):
-        """Count how many Excel customers match API customers"""
-        matches = 0
+        """Count how many Excel customers match API customers
+        
+        A normalized Excel name matches the API name it equals, else the
+        first API name it contains or is contained in. Takes name lists or
+        prebuilt NameIndex objects.
+        """
+        excel_index = excel_customers if isinstance(excel_customers, NameIndex) else NameIndex(excel_customers)
+        api_index = api_customers if isinstance(api_customers, NameIndex) else NameIndex(api_customers)
+        
+        # Exact matches are hash lookups; only the rest need the substring scan
+        partial = [norm for norm in excel_index.normalized if norm not in api_index.by_normalized]
+        first_partial = first_containment_matches(partial, api_index) if partial else {}
+        
         matched_names = []
+        for excel_norm, excel_orig in excel_index.by_normalized.items():
+            if excel_norm in api_index.by_normalized:
+                matched_names.append((excel_orig, api_index.by_normalized[excel_norm]))
+            elif excel_norm in first_partial:
+                api_norm = api_index.normalized[first_partial[excel_norm]]
+                matched_names.append((excel_orig, api_index.by_normalized[api_norm]))
         
-        excel_normalized = {self.normalize_name(c): c for c in excel_customers}
-        api_normalized = {self.normalize_name(c): c for c in api_customers}
-        
-        for excel_norm, excel_orig in excel_normalized.items():
-            if excel_norm in api_normalized:
-                matches += 1
-                matched_names.append((excel_orig, api_normalized[excel_norm]))
-            else:
-                # Check for partial matches
-                for api_norm, api_orig in api_normalized.items():
-                    if excel_norm in api_norm or api_norm in excel_norm:
-                        matches += 1
-                        matched_names.append((excel_orig, api_orig))
-                        break
-        
-        return matches, matched_names
+        return len(matched_names), matched_names
     
     def generate_report(self, api_path, excel_before_path, excel_after_path, output_path):
         """Generate comprehensive reconciliation report"""
@@ -116,41 +91,67 @@ class ReconciliationReport:
         print()
         
         # Load data
-        self.load_api_data(api_path)
-        self.before_stats = self.load_excel_data(excel_before_path, 'Excel (Before)')
-        self.after_stats = self.load_excel_data(excel_after_path, 'Excel (After)')
+        with self.profiler.stage('load_api_data') as counts:
+            self.load_api_data(api_path)
+            counts['customers'] = sum(len(c) for c in self.api_stats.values())
+        with self.profiler.stage('load_excel_before') as counts:
+            self.before_stats = self.load_excel_data(excel_before_path, 'Excel (Before)')
+            counts['customers'] = sum(len(c) for c in self.before_stats.values())
+        with self.profiler.stage('load_excel_after') as counts:
+            self.after_stats = self.load_excel_data(excel_after_path, 'Excel (After)')
+            counts['customers'] = sum(len(c) for c in self.after_stats.values())
+        
+        return self.write_report(output_path)
+    
+    def write_report(self, output_path):
+        """Compare the loaded api/before/after customer lists and write the report
         
+        The lists are {route: customer names}, as load_api_data and
+        load_excel_data return them; a caller that already holds them (the
+        pipeline runner) sets them directly instead of re-reading the files.
+        """
         # Generate comparison
         print("\n📊 Generating comparison report...")
         
         routes = ['aalsmeer_evening', 'naaldwijk_evening', 'rijnsburg_evening']
         report_data = []
         
-        for route in routes:
-            api_customers = self.api_stats.get(route, [])
-            before_customers = self.before_stats.get(route, [])
-            after_customers = self.after_stats.get(route, [])
-            
-            # Count matches
-            before_matches, _ = self.count_matches(before_customers, api_customers)
-            after_matches, after_matched_names = self.count_matches(after_customers, api_customers)
-            
-            # Calculate match rates
-            before_rate = (before_matches / len(api_customers) * 100) if api_customers else 0
-            after_rate = (after_matches / len(api_customers) * 100) if api_customers else 0
-            
-            report_data.append({
-                'Route': route,
-                'API_Customers': len(api_customers),
-                'Excel_Before': len(before_customers),
-                'Excel_After': len(after_customers),
-                'Before_Matched': before_matches,
-                'After_Matched': after_matches,
-                'Before_Match_Rate': f"{before_rate:.1f}%",
-                'After_Match_Rate': f"{after_rate:.1f}%",
-                'Improvement': f"+{after_matches - before_matches}",
-                'New_Customers_Added': len(after_customers) - len(before_customers)
-            })
+        # One index per route and side, shared by the counts and the detail sheets
+        with self.profiler.stage('index_names') as counts:
+            indexes = {
+                route: (NameIndex(self.api_stats.get(route, [])), NameIndex(self.before_stats.get(route, [])), NameIndex(self.after_stats.get(route, [])))
+                for route in routes
+            }
+            counts['names'] = sum(len(index) for route_indexes in indexes.values() for index in route_indexes)
+        
+        with self.profiler.stage('count_matches') as counts:
+            for route in routes:
+                api_customers = self.api_stats.get(route, [])
+                before_customers = self.before_stats.get(route, [])
+                after_customers = self.after_stats.get(route, [])
+                api_index, before_index, after_index = indexes[route]
+                
+                # Count matches
+                before_matches, _ = self.count_matches(before_index, api_index)
+                after_matches, after_matched_names = self.count_matches(after_index, api_index)
+                
+                # Calculate match rates
+                before_rate = (before_matches / len(api_customers) * 100) if api_customers else 0
+                after_rate = (after_matches / len(api_customers) * 100) if api_customers else 0
+                
+                report_data.append({
+                    'Route': route,
+                    'API_Customers': len(api_customers),
+                    'Excel_Before': len(before_customers),
+                    'Excel_After': len(after_customers),
+                    'Before_Matched': before_matches,
+                    'After_Matched': after_matches,
+                    'Before_Match_Rate': f"{before_rate:.1f}%",
+                    'After_Match_Rate': f"{after_rate:.1f}%",
+                    'Improvement': f"+{after_matches - before_matches}",
+                    'New_Customers_Added': len(after_customers) - len(before_customers)
+                })
+            counts['routes'] = len(routes)
         
         # Create DataFrame
         report_df = pd.DataFrame(report_data)
@@ -172,33 +173,33 @@ class ReconciliationReport:
         report_df = pd.concat([report_df, pd.DataFrame([totals])], ignore_index=True)
         
         # Write to Excel
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Summary sheet
-            report_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Detailed per-route sheets
-            for route in routes:
-                api_customers = self.api_stats.get(route, [])
-                before_customers = self.before_stats.get(route, [])
-                after_customers = self.after_stats.get(route, [])
+        with self.profiler.stage('write_report') as counts:
+            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+                # Summary sheet
+                report_df.to_excel(writer, sheet_name='Summary', index=False)
                 
-                detail_data = []
-                
-                # API customers
-                for api_cust in api_customers:
-                    in_before = api_cust in before_customers or any(self.normalize_name(api_cust) == self.normalize_name(b) for b in before_customers)
-                    in_after = api_cust in after_customers or any(self.normalize_name(api_cust) == self.normalize_name(a) for a in after_customers)
+                # Detailed per-route sheets
+                for route in routes:
+                    api_index, before_index, after_index = indexes[route]
                     
-                    detail_data.append({
-                        'API_Customer': api_cust,
-                        'In_Excel_Before': 'Yes' if in_before else 'No',
-                        'In_Excel_After': 'Yes' if in_after else 'No',
-                        'Status': '✅ Matched' if in_after else '❌ Missing'
-                    })
-                
-                detail_df = pd.DataFrame(detail_data)
-                sheet_name = route.replace('_', ' ').title()[:31]  # Excel sheet name limit
-                detail_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                    detail_data = []
+                    
+                    # API customers
+                    for api_cust, api_norm in zip(api_index.names, api_index.keys):
+                        in_before = before_index.contains(api_cust, api_norm)
+                        in_after = after_index.contains(api_cust, api_norm)
+                        
+                        detail_data.append({
+                            'API_Customer': api_cust,
+                            'In_Excel_Before': 'Yes' if in_before else 'No',
+                            'In_Excel_After': 'Yes' if in_after else 'No',
+                            'Status': '✅ Matched' if in_after else '❌ Missing'
+                        })
+                    
+                    detail_df = pd.DataFrame(detail_data)
+                    sheet_name = route.replace('_', ' ').title()[:31]  # Excel sheet name limit
+                    detail_df.to_excel(writer, sheet_name=sheet_name, index=False)
+            counts['rows'] = len(report_df) + sum(len(indexes[route][0]) for route in routes)
         
         print(f"\n✅ Report saved to: {output_path}")
         
@@ -213,10 +214,12 @@ class ReconciliationReport:
 
 def main():
     parser = argparse.ArgumentParser(description='Generate reconciliation report')
-    parser.add_argument('--api', required=True, help='Path to API export CSV')
+    parser.add_argument('--api', required=True, help='Path to API export CSV or Florinet orders JSON/JSONL')
     parser.add_argument('--excel-before', required=True, help='Path to original Excel file')
     parser.add_argument('--excel-after', required=True, help='Path to updated Excel file')
     parser.add_argument('--output', default='reconciliation_report.xlsx', help='Output report file')
+    parser.add_argument('--parse-cache', metavar='DIR', help='Directory of Parquet copies of the parsed inputs, reused while the files are unchanged (requires pyarrow)')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
@@ -230,14 +233,23 @@ def main():
             print(f"❌ Error: {label} file not found: {file_path}")
             return 1
     
+    parse_cache = None
+    if args.parse_cache:
+        if PARQUET_AVAILABLE:
+            parse_cache = ParseCache(args.parse_cache)
+        else:
+            print("⚠️  --parse-cache requires pyarrow, parsing the input files directly")
+    
     # Generate report
-    reporter = ReconciliationReport()
+    profiler = profiler_from_args(args, 'generate_reconciliation_report')
+    reporter = ReconciliationReport(parse_cache, profiler)
     reporter.generate_report(
         args.api,
         args.excel_before,
         args.excel_after,
         args.output
     )
+    profiler.finish()
     
     print("\n✅ Reconciliation report complete!")
     return 0
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+SYNTHETIC DATA GENERATOR
+Generates realistic API exports and Planningstabel workbooks for benchmarking
+
+Writes, per size, an API export CSV with the js/data-export.js column layout
+and a Planningstabel workbook with the 'Avond. *' evening sheets and the
+morning route sheets. Customer names are Dutch florist names with the usual
+B.V./location/webshop variants; the Excel side spells part of them
+differently and has some customers the API doesn't know.
+
+Usage:
+    python generate_synthetic_data.py --rows 1000 10000 100000 --output-dir synthetic_data
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PREFIXES = ['', 'Bloemenhandel ', 'Kwekerij ', 'Plantenhandel ', 'Bloemen ', 'Flora ', 'Fleur ', 'Tuincentrum ', 'Groothandel ']
+INITIALS = ['', 'J. ', 'A. ', 'P. ', 'M. ', 'H. ', 'W. ', 'C. ', 'R. ', 'Gebr. ']
+SURNAMES = [
+    'de Jong', 'Jansen', 'de Vries', 'van den Berg', 'Bakker', 'Visser', 'Smit', 'Meijer', 'de Boer',
+    'Mulder', 'de Groot', 'Bos', 'Vos', 'Peters', 'Hendriks', 'van Leeuwen', 'Dekker', 'Brouwer',
+    'de Wit', 'Dijkstra', 'Hoekhuis', 'Akkus', 'Zalam', 'van Dijk', 'Verhoeven', 'van der Meer',
+    'Kuijpers', 'Hoogendoorn', 'van Vliet', 'Zuidgeest'
+]
+PRODUCTS = ['', ' Rozen', ' Tulpen', ' Gerbera', ' Orchidee', ' Chrysant', ' Lelies', ' Potplanten']
+SUFFIXES = ['', '', '', ' B.V.', ' BV', ' Naaldwijk', ' Aalsmeer', ' Rijnsburg', ' Villa', ' Webshop', ' Export', ' VOF']
+
+ROUTES = {
+    'rijnsburg_morning': ('Rijnsburg', 'morning'),
+    'aalsmeer_morning': ('Aalsmeer', 'morning'),
+    'naaldwijk_morning': ('Naaldwijk', 'morning'),
+    'rijnsburg_evening': ('Rijnsburg', 'evening'),
+    'aalsmeer_evening': ('Aalsmeer', 'evening'),
+    'naaldwijk_evening': ('Naaldwijk', 'evening')
+}
+
+PLANNING_SHEETS = {
+    'Avond. Aalsmeer': 'aalsmeer_evening',
+    'Avond. Naaldwijk': 'naaldwijk_evening',
+    'Avond. Rijnsburg': 'rijnsburg_evening',
+    'Rijnsburg': 'rijnsburg_morning',
+    'Aalsmeer': 'aalsmeer_morning',
+    'Naaldwijk': 'naaldwijk_morning'
+}
+
+EXPORT_COLUMNS = [
+    'Row #', 'Order ID', 'Customer Name', 'Route', 'Route Key', 'Period',
+    'City', 'Delivery Date', 'Delivery Time', 'FUST Type', 'FUST Count',
+    'Total Stems', 'Carts Needed', 'Cart Type', 'Status', 'Matched', 'Notes'
+]
+
+FUST_TYPES = ['612', '575', '902', '588', '996']
+FUST_CAPACITY = {'612': 72, '575': 32, '902': 40, '588': 40, '996': 32}
+
+
+def customer_names(count, rng):
+    """Return count unique API-style customer names"""
+    names = set()
+    while len(names) < count:
+        batch = max(count - len(names), 64) * 2
+        for parts in zip(rng.choice(PREFIXES, batch), rng.choice(INITIALS, batch), rng.choice(SURNAMES, batch),
+                         rng.choice(PRODUCTS, batch), rng.choice(SUFFIXES, batch)):
+            names.add(''.join(parts))
+            if len(names) == count:
+                break
+    return sorted(names)
+
+
+def excel_spelling(name, rng):
+    """Spell an API customer name the way the planners tend to in Excel"""
+    variant = rng.integers(6)
+    if variant == 0:
+        for suffix in (' B.V.', ' BV', ' VOF', ' Webshop', ' Export'):
+            if name.endswith(suffix):
+                return name[:-len(suffix)]
+    if variant == 1:
+        return name.replace('Bloemenhandel ', 'Bl. ').replace('Plantenhandel ', 'Pl. ')
+    if variant == 2 and len(name) > 6:
+        i = int(rng.integers(1, len(name) - 2))
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if variant == 3:
+        return name.upper()
+    return name
+
+
+def generate_api_export(rows, customers, customer_routes, rng, date='2026-02-09'):
+    """Build an API export frame with the data-export.js CSV layout"""
+    picks = rng.integers(len(customers), size=rows)
+    route_keys = np.array(customer_routes)[picks]
+    routes = np.array([ROUTES[key][0] for key in route_keys])
+    periods = np.array([ROUTES[key][1] for key in route_keys])
+
+    fust_types = rng.choice(FUST_TYPES, rows)
+    fust_counts = rng.integers(1, 25, size=rows)
+    capacities = np.array([FUST_CAPACITY[fust] for fust in fust_types])
+
+    df = pd.DataFrame({
+        'Order ID': rng.integers(100000, 999999, size=rows),
+        'Customer Name': np.array(customers, dtype=object)[picks],
+        'Route': [f"{route} ({period.upper()})" for route, period in zip(routes, periods)],
+        'Route Key': route_keys,
+        'Period': np.char.upper(periods.astype(str)),
+        'City': routes,
+        'Delivery Date': date,
+        'Delivery Time': np.where(periods == 'evening', '18:00', '09:00'),
+        'FUST Type': fust_types,
+        'FUST Count': fust_counts,
+        'Total Stems': fust_counts * rng.integers(20, 80, size=rows),
+        'Carts Needed': np.ceil(fust_counts / capacities).astype(int),
+        'Cart Type': np.where(rng.random(rows) < 0.05, 'danish', 'Standard'),
+        'Status': 'Active',
+        'Matched': 'Yes',
+        'Notes': ''
+    })
+    df.loc[rng.random(rows) < 0.002, 'Customer Name'] = 'Unknown'
+
+    df = df.sort_values('Route Key', kind='stable').reset_index(drop=True)
+    df.insert(0, 'Row #', df.groupby('Route Key').cumcount() + 1)
+    return df[EXPORT_COLUMNS]
+
+
+def generate_planning_workbook(path, customers, customer_routes, rng):
+    """Write a Planningstabel workbook with one customer row per planned customer"""
+    by_route = {}
+    for name, route_key in zip(customers, customer_routes):
+        by_route.setdefault(route_key, []).append(name)
+
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet_name, route_key in PLANNING_SHEETS.items():
+            names = [excel_spelling(name, rng) for name in by_route.get(route_key, []) if rng.random() < 0.9]
+            extra = customer_names(max(1, len(names) // 20), rng)
+            names = sorted(set(names) | {f"{name} (oud)" for name in extra})
+
+            df = pd.DataFrame({'Klant': names})
+            for fust in FUST_TYPES[:3]:
+                df[f'Fust {fust}'] = rng.integers(0, 12, size=len(names))
+            df['Karren'] = rng.integers(0, 4, size=len(names))
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def generate(rows, output_dir, seed=42):
+    """Generate one API export + workbook pair, returning their paths"""
+    rng = np.random.default_rng(seed + rows)
+    customers = customer_names(max(50, rows // 10), rng)
+    customer_routes = list(rng.choice(list(ROUTES), len(customers)))
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    api_path = output_dir / f'api_orders_export_{rows}.csv'
+    excel_path = output_dir / f'Planningstabel_{rows}.xlsx'
+
+    generate_api_export(rows, customers, customer_routes, rng).to_csv(api_path, index=False)
+    generate_planning_workbook(excel_path, customers, customer_routes, rng)
+    return api_path, excel_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic reconciliation data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='API export sizes to generate (default: 1000 10000 100000)')
+    parser.add_argument('--output-dir', default='synthetic_data', help='Output directory (default: synthetic_data)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        api_path, excel_path = generate(rows, args.output_dir, args.seed)
+        print(f"✅ {rows} rows: {api_path}, {excel_path}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
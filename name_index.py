@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+NAME INDEX
+Equality and substring lookups over a list of customer names, built once
+
+NameIndex normalizes a list of names once (customer_names.normalize_series)
+and keeps a hash set of the normalized names for equality checks and an
+Aho-Corasick automaton over them for containment: one scan of a text finds
+every indexed name that occurs in it. pyahocorasick is used when installed,
+otherwise a pure-Python automaton with the same results.
+"""
+
+from collections import deque
+
+from customer_names import normalize_series
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class PurePythonAutomaton:
+    """Aho-Corasick automaton over a list of non-empty patterns"""
+
+    def __init__(self, patterns):
+        goto = [{}]
+        output = [()]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                children = goto[state]
+                if char not in children:
+                    children[char] = len(goto)
+                    goto.append({})
+                    output.append(())
+                state = children[char]
+            output[state] = output[state] + (index,)
+
+        # Breadth-first: a state's failure link points at its longest proper
+        # suffix in the trie, and it inherits that state's outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(char, 0)
+                if output[fail[child]]:
+                    output[child] = output[child] + output[fail[child]]
+
+        self.goto = goto
+        self.fail = fail
+        self.output = output
+
+    def find(self, text):
+        """Indices of the patterns occurring in text"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class LibraryAutomaton:
+    """The same interface on top of pyahocorasick"""
+
+    def __init__(self, patterns):
+        self.automaton = ahocorasick.Automaton()
+        for index, pattern in enumerate(patterns):
+            self.automaton.add_word(pattern, index)
+        if patterns:
+            self.automaton.make_automaton()
+        self.empty = not patterns
+
+    def find(self, text):
+        if self.empty:
+            return set()
+        return {index for _, index in self.automaton.iter(text)}
+
+
+def build_automaton(patterns):
+    return LibraryAutomaton(patterns) if AHOCORASICK_AVAILABLE else PurePythonAutomaton(patterns)
+
+
+class SubstringIndex:
+    """Finds which of a list of keys occur inside a text, in one scan of the text"""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.non_empty = [i for i, key in enumerate(self.keys) if key]
+        self.empty = [i for i, key in enumerate(self.keys) if not key]
+        self.automaton = None
+
+    def build(self):
+        """Build the automaton now instead of on the first lookup"""
+        if self.automaton is None:
+            self.automaton = build_automaton([self.keys[i] for i in self.non_empty])
+        return self
+
+    def occurring_in(self, text):
+        """Positions (in keys) of the keys that are substrings of text"""
+        self.build()
+        found = {self.non_empty[i] for i in self.automaton.find(text)}
+        found.update(self.empty)  # an empty key occurs in every text
+        return found
+
+
+class NameIndex:
+    def __init__(self, names):
+        self.names = list(names)
+        # Normalized form of each name, aligned with names
+        self.keys = normalize_series(self.names).tolist() if self.names else []
+        # normalized name -> original; the last original wins, in first-seen order
+        self.by_normalized = {}
+        for name, key in zip(self.names, self.keys):
+            self.by_normalized[key] = name
+        self.normalized = list(self.by_normalized)
+        self.raw = set(self.names)
+        self.substrings = SubstringIndex(self.normalized)
+
+    def __len__(self):
+        return len(self.names)
+
+    def contains(self, name, normalized):
+        """True if name is in the index as is or, normalized, after normalization"""
+        return name in self.raw or normalized in self.by_normalized
+
+
+def first_containment_matches(queries, index):
+    """For each query name, the first indexed name it contains or that contains it
+
+    queries are normalized names; returns {query: position in
+    index.normalized} for the queries that have such a name. Equivalent to
+    scanning index.normalized in order for `query in name or name in
+    query`, in linear time: indexed names inside a query come from scanning
+    the query with the index's automaton, and queries inside indexed names
+    from scanning every indexed name once with an automaton over the queries.
+    """
+    first = {}
+    for query in queries:
+        inside = index.substrings.occurring_in(query)
+        if inside:
+            first[query] = min(inside)
+
+    query_index = SubstringIndex(dict.fromkeys(queries))
+    for position, name in enumerate(index.normalized):
+        for i in query_index.occurring_in(name):
+            query = query_index.keys[i]
+            if first.get(query, position + 1) > position:
+                first[query] = position
+    return first
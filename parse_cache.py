@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+PARSE CACHE
+Parquet copies of parsed Planningstabel sheets and API exports, shared between scripts
+
+One run_customer_matching.sh session parses the same workbook and export in
+every script. Entries are keyed on the SHA-256 of the source file's bytes
+plus the part that was read (a sheet name or a CSV column selection), so an
+unchanged file is read back from Parquet and a changed one is re-parsed
+automatically. Entries not used for max_age_days are removed on open.
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - pandas' Parquet engine
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Bump when the parsed layout changes so old entries are not reused
+CACHE_VERSION = 1
+
+DEFAULT_MAX_AGE_DAYS = 14
+
+
+def columnar_frame(df):
+    """Make a frame storable as Parquet
+
+    Column labels become strings and object columns that mix types (e.g.
+    names and numbers in one Excel column) are stored as strings; missing
+    values stay missing.
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object and values.dropna().map(type).nunique() > 1:
+            df[col] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+class ParseCache:
+    def __init__(self, cache_dir, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("The parse cache requires pyarrow (pip install pyarrow)")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.digests = {}
+        self.prune()
+
+    def digest(self, source):
+        """SHA-256 of the source file, memoized while its size and mtime are unchanged"""
+        stat = os.stat(source)
+        key = (str(Path(source).resolve()), stat.st_size, stat.st_mtime_ns)
+        if key not in self.digests:
+            sha = hashlib.sha256()
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+            self.digests[key] = sha.hexdigest()
+        return self.digests[key]
+
+    def entry_path(self, source, part, suffix='.parquet'):
+        """Cache file for one part of a source file"""
+        part_key = hashlib.sha1(f"{CACHE_VERSION}:{part}".encode()).hexdigest()[:16]
+        return self.cache_dir / f"{self.digest(source)[:32]}_{part_key}{suffix}"
+
+    def frame(self, source, part, build):
+        """Return the cached frame for source/part, calling build() to create it on a miss"""
+        path = self.entry_path(source, part)
+        if path.exists():
+            self.hits += 1
+            os.utime(path)
+            return pd.read_parquet(path)
+
+        self.misses += 1
+        df = columnar_frame(build())
+        tmp_path = path.with_suffix('.tmp')
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return df
+
+    def sheet_names(self, source, build):
+        """Return the cached sheet names of a workbook, calling build() on a miss"""
+        path = self.entry_path(source, 'sheet_names', '.json')
+        if path.exists():
+            os.utime(path)
+            return json.loads(path.read_text())
+
+        names = list(build())
+        path.write_text(json.dumps(names))
+        return names
+
+    def prune(self):
+        """Remove entries that have not been used for max_age_days"""
+        cutoff = time.time() - self.max_age_days * 86400
+        removed = 0
+        for path in self.cache_dir.iterdir():
+            if path.suffix in ('.parquet', '.json', '.tmp') and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        return removed
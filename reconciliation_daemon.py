@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+RECONCILIATION DAEMON
+Resident service answering customer lookup, match and reconcile queries
+
+Loads the Planningstabel workbook and the API export once, keeps the
+customer lists, their name indexes (name_index.NameIndex) and the latest
+fuzzy match results in memory, and answers JSON queries over localhost HTTP
+or a Unix socket. A watcher thread re-reads a file when its size or mtime
+changes (only the changed side is re-parsed, then matching is re-run) and
+swaps the new data in whole: while a reload runs, queries are answered from
+the previous data, and they never see a half-loaded state.
+
+Endpoints:
+    GET  /status                          loaded files, counts, reloads
+    GET  /lookup?customer=Akkus[&route=]  is the customer in Excel / the API, exactly or partly
+    GET  /match?customer=Akkus[&route=]   mapping row and best fuzzy API match
+    GET  /reconcile[?route=]              matched counts and customers missing from Excel
+    POST /reload                          re-read both files now
+
+Usage:
+    python reconciliation_daemon.py --excel Planningstabel_2_0__2_.xlsx --api api_orders_export.csv --port 8766
+    curl 'http://127.0.0.1:8766/lookup?customer=Akkus&route=aalsmeer_evening'
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from customer_names import normalize_name
+from data_loaders import EVENING_SHEETS, load_api_customers, read_sheet_customers
+from fuzzy_match_customers import CustomerMatcher, MATCH_ROUTES
+from generate_reconciliation_report import ReconciliationReport
+from name_index import NameIndex
+from parse_cache import ParseCache, PARQUET_AVAILABLE
+
+DEFAULT_PORT = 8766
+
+# Partial matches returned per route and side
+MAX_PARTIAL_MATCHES = 20
+
+
+def file_signature(path):
+    """(size, mtime) of a file, which changes whenever it is rewritten"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Snapshot:
+    """Everything loaded from one version of the workbook and the export"""
+
+    def __init__(self, excel_customers, api_customers, excel_signature, api_signature):
+        self.excel_customers = excel_customers
+        self.api_customers = api_customers
+        self.excel_signature = excel_signature
+        self.api_signature = api_signature
+        self.excel_indexes = {route: NameIndex(excel_customers.get(route, [])) for route in MATCH_ROUTES}
+        self.api_indexes = {route: NameIndex(api_customers.get(route, [])) for route in MATCH_ROUTES}
+        for index in [*self.excel_indexes.values(), *self.api_indexes.values()]:
+            index.substrings.build()
+        self.mapping = {}
+        self.loaded_at = time.time()
+
+
+class ResidentData:
+    def __init__(self, excel_path, api_path, parse_cache=None, compact=False, threshold_high=90, threshold_medium=70, quiet=False):
+        self.excel_path = excel_path
+        self.api_path = api_path
+        self.parse_cache = parse_cache
+        self.compact = compact
+        self.threshold_high = threshold_high
+        self.threshold_medium = threshold_medium
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+        self.snapshot = None
+        self.reloads = 0
+        self.last_load_seconds = 0.0
+        self.last_error = None
+
+    def refresh(self, force=False, wait=True):
+        """Reload whatever changed on disk; returns the parts that were reloaded
+        
+        The new snapshot is built without holding self.lock, which only
+        guards swapping it in, so queries keep being answered from the
+        current snapshot meanwhile. One reload runs at a time: with
+        wait=False a refresh returns [] instead of waiting for another one.
+        """
+        if not self.reload_lock.acquire(blocking=wait):
+            return []
+        try:
+            current = self.snapshot
+            excel_signature = file_signature(self.excel_path)
+            api_signature = file_signature(self.api_path)
+            reloaded = []
+            if force or current is None or excel_signature != current.excel_signature:
+                reloaded.append('excel')
+            if force or current is None or api_signature != current.api_signature:
+                reloaded.append('api')
+            if not reloaded:
+                return reloaded
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()) if self.quiet else contextlib.nullcontext():
+                if 'excel' in reloaded:
+                    excel_customers = read_sheet_customers(self.excel_path, EVENING_SHEETS, self.parse_cache)
+                else:
+                    excel_customers = current.excel_customers
+                if 'api' in reloaded:
+                    api_customers = load_api_customers(self.api_path, self.parse_cache, self.compact)
+                else:
+                    api_customers = current.api_customers
+                snapshot = Snapshot(excel_customers, api_customers, excel_signature, api_signature)
+                snapshot.mapping = self.match(snapshot)
+
+            with self.lock:
+                self.snapshot = snapshot
+                self.reloads += 1
+                self.last_load_seconds = time.perf_counter() - start
+            print(f"🔄 Loaded {', '.join(reloaded)} in {self.last_load_seconds:.2f}s")
+            return reloaded
+        finally:
+            self.reload_lock.release()
+
+    def safe_refresh(self, force=False, wait=True):
+        """refresh(), keeping the last good snapshot if it fails; returns (reloaded, error)"""
+        try:
+            reloaded = self.refresh(force, wait)
+        except Exception as e:
+            # A file caught mid-write or replaced by something unreadable
+            error = f"{type(e).__name__}: {e}"
+            if error != self.last_error:
+                print(f"⚠️  Reload failed, keeping the loaded data: {error}")
+            self.last_error = error
+            return [], error
+        if reloaded:
+            self.last_error = None
+        return reloaded, None
+
+    def match(self, snapshot):
+        """Run the fuzzy matcher over a snapshot: {route: {'rows': rows, 'excel': {name: row}, 'api': {name: row}}}"""
+        matcher = CustomerMatcher()
+        matcher.excel_customers = {route: snapshot.excel_customers.get(route, []) for route in MATCH_ROUTES}
+        matcher.api_customers = {route: snapshot.api_customers.get(route, []) for route in MATCH_ROUTES}
+        mapping = {route: {'rows': [], 'excel': {}, 'api': {}} for route in MATCH_ROUTES}
+        for row in matcher.match_customers(self.threshold_high, self.threshold_medium):
+            mapping[row['Route']]['rows'].append(row)
+            if row['Excel_Name']:
+                mapping[row['Route']]['excel'][row['Excel_Name']] = row
+            if row['API_Name']:
+                mapping[row['Route']]['api'].setdefault(row['API_Name'], row)
+        return mapping
+
+    def routes(self, route=None):
+        if route is None:
+            return MATCH_ROUTES
+        if route not in MATCH_ROUTES:
+            raise ValueError(f"Unknown route '{route}', expected one of {', '.join(MATCH_ROUTES)}")
+        return [route]
+
+    @staticmethod
+    def find_in(index, name, normalized):
+        """Exact and partial (substring either way) matches of a name in one index"""
+        exact = index.by_normalized.get(normalized) if normalized else None
+        if exact is None and name in index.raw:
+            exact = name
+        partial = []
+        if normalized:
+            positions = index.substrings.occurring_in(normalized)
+            positions.update(i for i, key in enumerate(index.normalized) if normalized in key)
+            partial = sorted(index.by_normalized[index.normalized[i]] for i in positions)
+            partial = [match for match in partial if match != exact][:MAX_PARTIAL_MATCHES]
+        return exact, partial
+
+    def lookup(self, customer, route=None):
+        snapshot = self.snapshot
+        normalized = normalize_name(customer)
+        result = {'customer': customer, 'normalized': normalized, 'routes': {}}
+        for route_key in self.routes(route):
+            excel_exact, excel_partial = self.find_in(snapshot.excel_indexes[route_key], customer, normalized)
+            api_exact, api_partial = self.find_in(snapshot.api_indexes[route_key], customer, normalized)
+            result['routes'][route_key] = {
+                'in_excel': excel_exact is not None,
+                'excel_name': excel_exact,
+                'excel_partial': excel_partial,
+                'in_api': api_exact is not None,
+                'api_name': api_exact,
+                'api_partial': api_partial
+            }
+        return result
+
+    def match_customer(self, customer, route=None):
+        """The mapping row for a customer (by Excel or API name) in each route"""
+        snapshot = self.snapshot
+        result = {'customer': customer, 'routes': {}}
+        for route_key in self.routes(route):
+            mapping = snapshot.mapping[route_key]
+            row = mapping['excel'].get(customer) or mapping['api'].get(customer)
+            if row is None:
+                # Not a known name: score it against the route's API customers
+                api_name, score = CustomerMatcher().fuzzy_match(customer, snapshot.api_customers.get(route_key, []), self.threshold_medium)
+                row = {'API_Name': api_name, 'Match_Score': f"{score:.1f}%" if api_name else '0%'}
+            result['routes'][route_key] = row
+        return result
+
+    def reconcile(self, route=None):
+        snapshot = self.snapshot
+        reporter = ReconciliationReport()
+        result = {}
+        for route_key in self.routes(route):
+            excel_index = snapshot.excel_indexes[route_key]
+            api_index = snapshot.api_indexes[route_key]
+            matched, matched_names = reporter.count_matches(excel_index, api_index)
+            matched_api = {api_name for _, api_name in matched_names}
+            result[route_key] = {
+                'excel_customers': len(excel_index),
+                'api_customers': len(api_index),
+                'matched': matched,
+                'match_rate': round(matched / len(api_index) * 100, 1) if len(api_index) else 0,
+                'missing_from_excel': [name for name in api_index.names if name not in matched_api],
+                'actions': self.action_counts(snapshot.mapping[route_key]['rows'])
+            }
+        return result
+
+    @staticmethod
+    def action_counts(rows):
+        counts = {}
+        for row in rows:
+            counts[row['Action']] = counts.get(row['Action'], 0) + 1
+        return counts
+
+    def status(self):
+        with self.lock:
+            snapshot, reloads, last_load_seconds = self.snapshot, self.reloads, self.last_load_seconds
+        return {
+            'excel': str(Path(self.excel_path).resolve()),
+            'api': str(Path(self.api_path).resolve()),
+            'loaded_at': snapshot.loaded_at,
+            'reloads': reloads,
+            'last_load_seconds': round(last_load_seconds, 3),
+            'last_error': self.last_error,
+            'routes': {
+                route: {'excel_customers': len(snapshot.excel_indexes[route]), 'api_customers': len(snapshot.api_indexes[route])}
+                for route in MATCH_ROUTES
+            }
+        }
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if self.server.cors_origin:
+            self.send_header('Access-Control-Allow-Origin', self.server.cors_origin)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        data = self.server.data
+        if self.server.poll == 0:
+            # A reload already running (e.g. POST /reload) is not waited for
+            data.safe_refresh(wait=False)
+
+        start = time.perf_counter()
+        try:
+            if url.path == '/status':
+                payload = data.status()
+            elif url.path in ['/lookup', '/match']:
+                if not query.get('customer'):
+                    return self.send_json(400, {'error': 'customer is required'})
+                if url.path == '/lookup':
+                    payload = data.lookup(query['customer'], query.get('route'))
+                else:
+                    payload = data.match_customer(query['customer'], query.get('route'))
+            elif url.path == '/reconcile':
+                payload = data.reconcile(query.get('route'))
+            else:
+                return self.send_json(404, {'error': 'Not found'})
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        payload['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        self.send_json(200, payload)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if urlsplit(self.path).path != '/reload':
+            return self.send_json(404, {'error': 'Not found'})
+        reloaded, error = self.server.data.safe_refresh(force=True)
+        if error:
+            return self.send_json(503, {'error': f"Reload failed, still serving the previous data: {error}"})
+        self.send_json(200, {'reloaded': reloaded, 'seconds': round(self.server.data.last_load_seconds, 3)})
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'local'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def watch(data, poll, stop):
+    """Reload changed files every poll seconds until stop is set"""
+    while not stop.wait(poll):
+        data.safe_refresh()
+
+
+def make_server(data, port=DEFAULT_PORT, host='127.0.0.1', socket_path=None, poll=2.0, cors_origin=None, quiet=False):
+    """Create (but don't start) a daemon over loaded data; port 0 picks a free port"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, DaemonHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), DaemonHandler)
+        server.daemon_threads = True
+    server.data = data
+    server.poll = poll
+    server.cors_origin = cors_origin
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep the workbook, API export and match results in memory and answer queries')
+    parser.add_argument('--excel', required=True, help='Path to Excel file')
+    parser.add_argument('--api', required=True, help='Path to API export CSV or Florinet orders JSON/JSONL')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--socket', metavar='PATH', help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--poll', type=float, default=2.0, help='Seconds between checks for changed files (0 = check on every request, default: 2)')
+    parser.add_argument('--threshold-high', type=float, default=90, help='High confidence threshold (default: 90)')
+    parser.add_argument('--threshold-medium', type=float, default=70, help='Medium confidence threshold (default: 70)')
+    parser.add_argument('--parse-cache', metavar='DIR', help='Directory of Parquet copies of the parsed inputs (requires pyarrow)')
+    parser.add_argument('--compact', action='store_true', help='Read API names and route keys as categoricals (less memory on large exports)')
+    parser.add_argument('--cors-origin', help='Send Access-Control-Allow-Origin with this origin, for the dashboard (default: none)')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests or loading progress')
+
+    args = parser.parse_args()
+
+    for file_path, label in [(args.excel, 'Excel'), (args.api, 'API export')]:
+        if not Path(file_path).exists():
+            print(f"❌ Error: {label} file not found: {file_path}")
+            return 1
+
+    parse_cache = None
+    if args.parse_cache:
+        if PARQUET_AVAILABLE:
+            parse_cache = ParseCache(args.parse_cache)
+        else:
+            print("⚠️  --parse-cache requires pyarrow, parsing the input files directly")
+
+    data = ResidentData(args.excel, args.api, parse_cache, args.compact, args.threshold_high, args.threshold_medium, args.quiet)
+    data.refresh()
+
+    server = make_server(data, args.port, args.host, args.socket, args.poll, args.cors_origin, args.quiet)
+    stop = threading.Event()
+    if args.poll > 0:
+        threading.Thread(target=watch, args=(data, args.poll, stop), daemon=True).start()
+
+    # Stop on SIGTERM as on Ctrl-C, so the socket file is removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    where = f"unix:{args.socket}" if args.socket else f"http://{args.host}:{server.server_address[1]}"
+    print(f"🛰️  Reconciliation daemon on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+RESPONSE CACHE
+On-disk SQLite cache of fetched Florinet responses, shared between fetch runs
+
+Keys are (base URL, endpoint, delivery date, params). Delivery days that are
+over are stored as immutable and served without touching the network; for
+today and later days the ETag / Last-Modified validators are kept so the
+next fetch can revalidate with a conditional request. Bodies are stored
+zlib-compressed and the least recently used entries are evicted when the
+cache grows beyond max_bytes.
+"""
+
+import json
+import sqlite3
+import time
+import zlib
+from datetime import date
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                day TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                immutable INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @staticmethod
+    def make_key(base_url, endpoint, day, params):
+        return json.dumps([base_url, endpoint, day, sorted((params or {}).items())])
+
+    @staticmethod
+    def is_complete(day, today=None):
+        """True once the delivery day is over, after which its orders no longer change"""
+        return date.fromisoformat(day) < (today or date.today())
+
+    def get(self, key):
+        """Return (records, etag, last_modified, immutable) for a cached response, or None"""
+        row = self.conn.execute(
+            "SELECT body, etag, last_modified, immutable FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        body, etag, last_modified, immutable = row
+        return json.loads(zlib.decompress(body)), etag, last_modified, bool(immutable)
+
+    def put(self, key, endpoint, day, records, etag=None, last_modified=None, immutable=False):
+        """Store a response body (compressed) with its validators"""
+        body = zlib.compress(json.dumps(records, ensure_ascii=False).encode('utf-8'), 6)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, endpoint, day, body, len(body), etag, last_modified, int(immutable), now, now)
+        )
+        self.conn.commit()
+
+    def mark_immutable(self, key):
+        with self.conn:
+            self.conn.execute("UPDATE responses SET immutable = 1 WHERE key = ?", (key,))
+
+    def size(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self.size()
+        removed = 0
+        if total <= self.max_bytes:
+            return removed
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            removed += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return removed
+
+    def close(self):
+        """Evict over-budget entries and write everything to disk"""
+        with self.conn:
+            self.evict()
+        self.conn.close()
+        self.conn = None
@@ -26,13 +26,26 @@ if [ $? -ne 0 ]; then
     pip install rapidfuzz
 fi
 
+# Parquet parse cache shared by the steps below (optional, needs pyarrow)
+PARSE_CACHE_ARGS=()
+python3 -c "import pyarrow" 2>/dev/null
+if [ $? -eq 0 ]; then
+    PARSE_CACHE_ARGS=(--parse-cache .parse_cache)
+fi
+
 echo "✅ Dependencies OK"
 echo ""
 
-# Get file paths
-read -p "Enter API export CSV path: " API_FILE
-read -p "Enter Excel file path: " EXCEL_FILE
-read -p "Enter date (YYYY-MM-DD): " DATE
+# Get file paths (or pass them: run_customer_matching.sh API_FILE EXCEL_FILE DATE)
+API_FILE="$1"
+EXCEL_FILE="$2"
+DATE="$3"
+[ -z "$API_FILE" ] && read -p "Enter API export CSV path: " API_FILE
+[ -z "$EXCEL_FILE" ] && read -p "Enter Excel file path: " EXCEL_FILE
+[ -z "$DATE" ] && read -p "Enter date (YYYY-MM-DD): " DATE
+
+# POLICY=apply runs unattended, POLICY=skip only matches
+POLICY="${POLICY:-ask}"
 
 # Validate files
 if [ ! -f "$API_FILE" ]; then
@@ -45,80 +58,13 @@ if [ ! -f "$EXCEL_FILE" ]; then
     exit 1
 fi
 
-echo ""
-echo "=========================================="
-echo "STEP 1: Fuzzy Matching"
-echo "=========================================="
-python3 fuzzy_match_customers.py \
+# Matching, update and report run in one Python process
+python3 customer_matching_pipeline.py \
     --api "$API_FILE" \
     --excel "$EXCEL_FILE" \
-    --output "customer_mapping_${DATE}.csv"
-
-if [ $? -ne 0 ]; then
-    echo "❌ Matching failed"
-    exit 1
-fi
-
-echo ""
-echo "✅ Matching complete! Review customer_mapping_${DATE}.csv"
-echo ""
-read -p "Press Enter to continue to Step 2..."
-
-echo ""
-echo "=========================================="
-echo "STEP 2: Update Excel"
-echo "=========================================="
-read -p "Update Excel file? (yes/no): " UPDATE_CHOICE
-
-if [ "$UPDATE_CHOICE" = "yes" ]; then
-    OUTPUT_FILE="${EXCEL_FILE%.xlsx}_UPDATED_${DATE}.xlsx"
-    
-    python3 update_excel_customers.py \
-        --excel "$EXCEL_FILE" \
-        --mapping "customer_mapping_${DATE}.csv" \
-        --output "$OUTPUT_FILE"
-    
-    if [ $? -ne 0 ]; then
-        echo "❌ Update failed"
-        exit 1
-    fi
-    
-    echo ""
-    echo "✅ Excel updated! Saved to: $OUTPUT_FILE"
-    
-    echo ""
-    echo "=========================================="
-    echo "STEP 3: Generate Report"
-    echo "=========================================="
-    read -p "Generate reconciliation report? (yes/no): " REPORT_CHOICE
-    
-    if [ "$REPORT_CHOICE" = "yes" ]; then
-        python3 generate_reconciliation_report.py \
-            --api "$API_FILE" \
-            --excel-before "$EXCEL_FILE" \
-            --excel-after "$OUTPUT_FILE" \
-            --output "reconciliation_report_${DATE}.xlsx"
-        
-        if [ $? -eq 0 ]; then
-            echo "✅ Report generated: reconciliation_report_${DATE}.xlsx"
-        fi
-    fi
-else
-    echo "⏭️  Skipping Excel update"
-fi
-
-echo ""
-echo "=========================================="
-echo "✅ WORKFLOW COMPLETE!"
-echo "=========================================="
-echo ""
-echo "Files created:"
-echo "  - customer_mapping_${DATE}.csv"
-if [ "$UPDATE_CHOICE" = "yes" ]; then
-    echo "  - ${OUTPUT_FILE}"
-    if [ "$REPORT_CHOICE" = "yes" ]; then
-        echo "  - reconciliation_report_${DATE}.xlsx"
-    fi
-fi
-echo ""
-
+    --date "$DATE" \
+    --mapping-output "customer_mapping_${DATE}.csv" \
+    --output "${EXCEL_FILE%.xlsx}_UPDATED_${DATE}.xlsx" \
+    --report "reconciliation_report_${DATE}.xlsx" \
+    --policy "$POLICY" \
+    "${PARSE_CACHE_ARGS[@]}"
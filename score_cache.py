@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+SCORE CACHE
+Persistent SQLite memo of fuzzy match scores, shared between daily matching runs
+
+Keys are (Excel name, API name, scorer, version). Entries are loaded once per
+run, new scores are written back on close() and the least recently used
+entries are evicted when the cache grows beyond max_entries. Recency is
+tracked per Excel name, so a name seen today keeps all of its pairs.
+"""
+
+import sqlite3
+import time
+from collections import defaultdict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 2_000_000
+
+
+class ScoreCache:
+    def __init__(self, path, scorer, version, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = str(path)
+        self.scorer = scorer
+        self.version = str(version)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.scores = defaultdict(dict)
+        self.new_scores = []
+        self.used = set()
+
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                excel TEXT NOT NULL,
+                api TEXT NOT NULL,
+                scorer TEXT NOT NULL,
+                version TEXT NOT NULL,
+                score REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (excel, api, scorer, version)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self.load()
+
+    def load(self):
+        """Load all cached scores for this scorer/version into memory"""
+        rows = self.conn.execute(
+            "SELECT excel, api, score FROM scores WHERE scorer = ? AND version = ?",
+            (self.scorer, self.version)
+        )
+        for excel, api, score in rows:
+            self.scores[excel][api] = score
+        return len(self)
+
+    def __len__(self):
+        return sum(len(row) for row in self.scores.values())
+
+    def lookup(self, excel_names, api_names):
+        """Return the cached score matrix for excel_names x api_names
+        
+        Pairs that are not cached are NaN; hit and miss counters are updated.
+        """
+        scores = np.full((len(excel_names), len(api_names)), np.nan)
+        for i, excel_name in enumerate(excel_names):
+            row = self.scores.get(excel_name)
+            if row:
+                scores[i] = [row.get(api_name, np.nan) for api_name in api_names]
+                self.used.add(excel_name)
+        
+        missing = int(np.isnan(scores).sum())
+        self.misses += missing
+        self.hits += scores.size - missing
+        return scores
+
+    def store(self, excel_names, api_names, scores, mask):
+        """Remember the freshly computed scores[mask]"""
+        for i, j in zip(*np.nonzero(mask)):
+            score = float(scores[i, j])
+            self.scores[excel_names[i]][api_names[j]] = score
+            self.new_scores.append((excel_names[i], api_names[j], score))
+
+    def close(self):
+        """Write new scores, refresh LRU stamps and evict old entries"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)",
+                ((excel, api, self.scorer, self.version, score, now) for excel, api, score in self.new_scores)
+            )
+            self.conn.executemany(
+                "UPDATE scores SET last_used = ? WHERE excel = ? AND scorer = ? AND version = ?",
+                ((now, excel, self.scorer, self.version) for excel in self.used)
+            )
+
+            total = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+            if total > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM scores WHERE rowid IN "
+                    "(SELECT rowid FROM scores ORDER BY last_used ASC LIMIT ?)",
+                    (total - self.max_entries,)
+                )
+        self.conn.close()
+        self.conn = None
+        self.new_scores = []
+        self.used = set()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+STAGE PROFILER
+Per-stage wall time, CPU time, peak memory and row counts for the CLIs
+
+Wrap each step of a run in `with profiler.stage('load_api_customers') as
+counts:` and fill counts (rows, pairs, ...) inside the block. Stages may
+nest. A disabled profiler (the default) only hands out the counts dict.
+
+The trace is written as one JSON file that is both a readable summary
+("stages") and a Chrome trace ("traceEvents", complete events), so it opens
+in chrome://tracing or https://ui.perfetto.dev. Peak memory comes from
+tracemalloc: Python and NumPy allocations are traced, Arrow buffers are not.
+With a cProfile path every top-level stage is also run under cProfile
+(timings then include its overhead) and the slowest stage's stats are
+dumped for `python -m pstats` or snakeviz.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def add_profile_arguments(parser):
+    """The --profile / --cprofile options shared by the CLIs"""
+    parser.add_argument('--profile', metavar='TRACE_JSON', help='Write per-stage wall/CPU time, peak memory and counts as a JSON / Chrome trace file')
+    parser.add_argument('--cprofile', metavar='PSTATS', help='With --profile, also cProfile each stage and dump the slowest one here')
+
+
+def profiler_from_args(args, tool):
+    return StageProfiler(tool, enabled=bool(args.profile), trace_path=args.profile, cprofile_path=args.cprofile if args.profile else None)
+
+
+class StageProfiler:
+    def __init__(self, tool='', enabled=True, trace_path=None, cprofile_path=None):
+        self.tool = tool
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.cprofile_path = cprofile_path
+        self.stages = []
+        self.stack = []
+        self.profiles = {}
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """Time one stage; yields a dict for its counts"""
+        if not self.enabled:
+            yield counts
+            return
+
+        if self.stack:
+            # The parent's peak so far, before the child resets it
+            parent = self.stack[-1]
+            parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        record = {'name': name, 'depth': len(self.stack), 'peak': start_memory}
+        self.stack.append(record)
+
+        profile = cProfile.Profile() if self.cprofile_path and record['depth'] == 0 else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield counts
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak = max(record.pop('peak'), tracemalloc.get_traced_memory()[1])
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1]['peak'] = max(self.stack[-1]['peak'], peak)
+
+            record.update({
+                'start_ms': round((wall_start - self.started) * 1000, 3),
+                'wall_ms': round(wall * 1000, 3),
+                'cpu_ms': round(cpu * 1000, 3),
+                'start_memory_mb': round(start_memory / 1024 / 1024, 2),
+                'peak_memory_mb': round(peak / 1024 / 1024, 2),
+                'counts': counts
+            })
+            self.stages.append(record)
+            if profile is not None:
+                self.profiles[len(self.stages) - 1] = profile
+
+    def trace(self):
+        """The summary plus Chrome trace events, as one JSON-ready dict"""
+        stages = sorted(self.stages, key=lambda record: record['start_ms'])
+        events = [{
+            'name': record['name'],
+            'ph': 'X',
+            'ts': round(record['start_ms'] * 1000),
+            'dur': round(record['wall_ms'] * 1000),
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': {
+                'cpu_ms': record['cpu_ms'],
+                'peak_memory_mb': record['peak_memory_mb'],
+                **record['counts']
+            }
+        } for record in stages]
+        return {
+            'tool': self.tool,
+            'argv': sys.argv[1:],
+            'started_at': self.started_at,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'stages': stages,
+            'traceEvents': events,
+            'displayTimeUnit': 'ms'
+        }
+
+    def finish(self):
+        """Print the stage table and write the trace (and cProfile dump)"""
+        if not self.enabled:
+            return None
+        trace = self.trace()
+
+        print("\n⏱️  Stage profile")
+        print(f"   {'Stage':40} {'Wall ms':>10} {'CPU ms':>10} {'Peak MB':>9}  Counts")
+        for record in trace['stages']:
+            name = '  ' * record['depth'] + record['name']
+            counts = ', '.join(f"{key}={value}" for key, value in record['counts'].items())
+            print(f"   {name:40} {record['wall_ms']:10.1f} {record['cpu_ms']:10.1f} {record['peak_memory_mb']:9.1f}  {counts}")
+        print(f"   {'total':40} {trace['total_ms']:10.1f}")
+
+        if self.trace_path:
+            with open(self.trace_path, 'w', encoding='utf-8') as f:
+                json.dump(trace, f, indent=1, default=str)
+            print(f"💾 Saved trace to: {self.trace_path}")
+
+        if self.cprofile_path and self.profiles:
+            slowest = max(self.profiles, key=lambda i: self.stages[i]['wall_ms'])
+            self.profiles[slowest].dump_stats(self.cprofile_path)
+            print(f"💾 Saved cProfile stats of '{self.stages[slowest]['name']}' to: {self.cprofile_path}")
+
+        tracemalloc.stop()
+        return trace
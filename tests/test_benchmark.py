@@ -0,0 +1,142 @@
+"""Stage benchmarks of the four reconciliation scripts on generated data
+
+Times the load, match, compare and write stages of CustomerMatcher,
+ExcelUpdater, DataReconciliation and ReconciliationReport with
+pytest-benchmark, on generate_synthetic_data.py data at 1k and 10k rows;
+100k rows are marked slow.
+
+    python -m pytest tests/test_benchmark.py
+    python -m pytest tests/test_benchmark.py -m slow    # 100k rows
+"""
+
+import shutil
+
+import pytest
+
+from data_reconciliation import DataReconciliation
+from fuzzy_match_customers import CustomerMatcher, MATCH_ROUTES
+from generate_reconciliation_report import ReconciliationReport
+from generate_synthetic_data import generate
+from update_excel_customers import ExcelUpdater
+
+pytest.importorskip('pytest_benchmark')
+
+SIZES = [1000, 10000, pytest.param(100000, marks=pytest.mark.slow)]
+
+ROUNDS = 3
+
+
+@pytest.fixture(scope='module', params=SIZES, ids=lambda rows: f'{rows}_rows')
+def data(request, tmp_path_factory):
+    """(api_path, excel_path, mapping_path) for one size; the mapping comes from a matcher run"""
+    data_dir = tmp_path_factory.mktemp(f'data_{request.param}')
+    api_path, excel_path = generate(request.param, data_dir)
+    matcher = loaded_matcher(api_path, excel_path)
+    matcher.match_customers()
+    mapping_path = data_dir / 'customer_mapping.csv'
+    matcher.save_mapping(mapping_path)
+    return str(api_path), str(excel_path), str(mapping_path)
+
+
+def loaded_matcher(api_path, excel_path):
+    matcher = CustomerMatcher()
+    matcher.load_api_customers(str(api_path))
+    matcher.load_excel_customers(str(excel_path))
+    return matcher
+
+
+def loaded_reconciliation(api_path, excel_path):
+    reconciler = DataReconciliation(excel_path, api_path, '2026-02-09')
+    reconciler.load_excel_data()
+    reconciler.load_api_data()
+    return reconciler
+
+
+def run(benchmark, stage, setup):
+    """Time stage(*setup()) for ROUNDS rounds, with a fresh setup per round"""
+    return benchmark.pedantic(stage, setup=lambda: (setup(), {}), rounds=ROUNDS, iterations=1)
+
+
+def test_matcher_load(benchmark, data):
+    api_path, excel_path, _ = data
+    matcher = benchmark.pedantic(loaded_matcher, args=(api_path, excel_path), rounds=ROUNDS, iterations=1)
+    assert matcher.api_customers and matcher.excel_customers
+
+
+def test_matcher_match(benchmark, data):
+    api_path, excel_path, _ = data
+    run(benchmark, CustomerMatcher.match_customers, lambda: (loaded_matcher(api_path, excel_path),))
+
+
+def test_matcher_write(benchmark, data, tmp_path):
+    api_path, excel_path, _ = data
+    matcher = loaded_matcher(api_path, excel_path)
+    matcher.match_customers()
+    benchmark.pedantic(matcher.save_mapping, args=(tmp_path / 'customer_mapping.csv',), rounds=ROUNDS, iterations=1)
+
+
+def test_updater_load(benchmark, data, tmp_path):
+    _, excel_path, mapping_path = data
+    run(benchmark, ExcelUpdater.load_mapping, lambda: (ExcelUpdater(excel_path, mapping_path, tmp_path / 'backups'),))
+
+
+def test_updater_write(benchmark, data, tmp_path):
+    _, excel_path, mapping_path = data
+
+    def setup():
+        updated_path = tmp_path / 'Planningstabel_UPDATED.xlsx'
+        shutil.copy2(excel_path, updated_path)
+        updater = ExcelUpdater(updated_path, mapping_path, tmp_path / 'backups')
+        updater.load_mapping()
+        return (updater,)
+
+    run(benchmark, lambda updater: updater.update_excel(review_required=False), setup)
+
+
+def test_reconciliation_load(benchmark, data):
+    api_path, excel_path, _ = data
+    reconciler = benchmark.pedantic(loaded_reconciliation, args=(api_path, excel_path), rounds=ROUNDS, iterations=1)
+    assert reconciler.api_data
+
+
+def test_reconciliation_compare(benchmark, data):
+    api_path, excel_path, _ = data
+    comparisons = run(benchmark, DataReconciliation.reconcile, lambda: (loaded_reconciliation(api_path, excel_path),))
+    assert comparisons
+
+
+def test_reconciliation_write(benchmark, data, tmp_path):
+    api_path, excel_path, _ = data
+    reconciler = loaded_reconciliation(api_path, excel_path)
+    output_path = str(tmp_path / 'reconciliation_report.xlsx')
+    benchmark.pedantic(reconciler.generate_report, args=(output_path,), rounds=ROUNDS, iterations=1)
+
+
+def test_report_load(benchmark, data):
+    api_path, excel_path, _ = data
+
+    def load():
+        reporter = ReconciliationReport()
+        reporter.load_api_data(api_path)
+        return reporter.load_excel_data(excel_path)
+
+    assert benchmark.pedantic(load, rounds=ROUNDS, iterations=1)
+
+
+def test_report_compare(benchmark, data):
+    api_path, excel_path, _ = data
+    reporter = ReconciliationReport()
+    reporter.load_api_data(api_path)
+    excel = reporter.load_excel_data(excel_path)
+
+    def count_matches():
+        return [reporter.count_matches(excel.get(route, []), reporter.api_stats.get(route, [])) for route in MATCH_ROUTES]
+
+    benchmark.pedantic(count_matches, rounds=ROUNDS, iterations=1)
+
+
+def test_report_write(benchmark, data, tmp_path):
+    api_path, excel_path, _ = data
+    output_path = str(tmp_path / 'before_after_report.xlsx')
+    reporter = ReconciliationReport()
+    benchmark.pedantic(reporter.generate_report, args=(api_path, excel_path, excel_path, output_path), rounds=ROUNDS, iterations=1)
@@ -0,0 +1,29 @@
+"""cart_engine against the dashboard JS: js/cart-calculation.js under node, and the cart type rule of js/carts.js"""
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from cart_engine import check_js_parity, order_carts, synthetic_orderrows
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+@pytest.mark.parametrize('seed', [7, 42])
+def test_matches_js_cart_calculation(seed):
+    assert check_js_parity(synthetic_orderrows(2000, seed)) == []
+
+
+def test_order_carts_cart_type_is_compared_exactly():
+    # order.cartType === 'danish' in js/carts.js: other spellings are standard carts
+    df = pd.DataFrame({
+        'FUST Count': [48, 48, 48, 0, None],
+        'FUST Type': ['612', '612', '575', '612', '612'],
+        'Cart Type': ['danish', 'Danish', 'Standard', 'danish', 'danish']
+    })
+    assert order_carts(df).tolist() == [2, 1, 2, 0, 0]
+
+
+def test_order_carts_by_customer_without_cart_type():
+    df = pd.DataFrame({'FUST Count': [48, 48], 'Customer Name': ['Superflora B.V.', 'Bloemenhandel Jansen']})
+    assert order_carts(df).tolist() == [2, 1]
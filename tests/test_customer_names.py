@@ -0,0 +1,66 @@
+"""Conformance of the customer-name key with normalizeName() in js/route-mapping.js"""
+
+import pandas as pd
+import pytest
+
+from customer_names import normalize_name, normalize_series
+from data_reconciliation import DataReconciliation
+from fuzzy_match_customers import CustomerMatcher
+from generate_reconciliation_report import ReconciliationReport
+from name_index import NameIndex
+
+# (raw name, canonical key) pairs as normalizeName() in js/route-mapping.js gives them
+CONFORMANCE_CASES = [
+    ('Akkus BV', 'akkus'),
+    ('Akkus B.V.', 'akkus'),
+    ('  Zalam   bv ', 'zalam'),
+    ('2x Hoekhuis Naaldwijk (MINI)', 'hoekhuis naaldwijk'),
+    ('Hoekhuis [Villa] {old}', 'hoekhuis'),
+    ('Bloemenhandel De Jong', 'de jong'),
+    ('Bloemen en Planten Vos', 'vos'),
+    ('Bl. Exp Smit', 'smit'),
+    ('Kwekerij vd Berg', 'kwekerij van der berg'),
+    ('Jansen & Zn.', 'jansen en zonen'),
+    ('Flora GmbH', 'flora'),
+    ('Fleur VOF', 'fleur'),
+    ('Rozenhof Webshop', 'rozenhof'),
+    ('Gerbera King Export', 'gerbera king'),
+    ('Plant Holding', 'plant'),
+    ('L&M Flowers', 'l en m flowers'),
+    ('Groen-Link/Art', 'groen link art'),
+    ("Van 't Hof!", 'van t hof'),
+    ('Café Bloem', 'caf bloem'),
+    ('', ''),
+]
+
+NAMES = [name for name, _ in CONFORMANCE_CASES]
+KEYS = [key for _, key in CONFORMANCE_CASES]
+
+
+@pytest.mark.parametrize('name, expected', CONFORMANCE_CASES)
+def test_scalar_key(name, expected):
+    assert normalize_name(name) == expected
+
+
+def test_series_key():
+    assert normalize_series(NAMES).tolist() == KEYS
+
+
+def test_scalar_and_series_agree_on_missing_values():
+    names = pd.Series(['Akkus BV', None, float('nan'), pd.NA], dtype=object)
+    assert normalize_series(names).tolist() == [normalize_name(name) for name in names]
+
+
+def test_scripts_share_the_key():
+    matcher = CustomerMatcher()
+    reconciliation = DataReconciliation('planning.xlsx', 'export.csv', '2026-02-09')
+    report = ReconciliationReport()
+
+    assert [matcher.normalize_name(name) for name in NAMES] == KEYS
+    assert [reconciliation.normalize_customer_name(name) for name in NAMES] == KEYS
+    assert [report.normalize_name(name) for name in NAMES] == KEYS
+
+    # The paths the scripts take on whole columns
+    frame, = reconciliation.normalize_frames([pd.DataFrame({'raw': NAMES})])
+    assert frame['customer'].tolist() == KEYS
+    assert NameIndex(NAMES).keys == KEYS
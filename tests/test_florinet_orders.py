@@ -0,0 +1,59 @@
+"""Periods of Florinet orders as separateOrdersByClientMatch() in js/route-mapping.js assigns them"""
+
+from pathlib import Path
+
+import pytest
+
+from florinet_orders import client_route_lists, infer_period, known_client, order_period, read_orders_json
+
+FIXTURES = Path(__file__).parent.parent / 'fixtures' / 'florinet'
+
+INFERRED_PERIODS = [
+    ({'delivery_time': '18:00'}, 'evening'),
+    ({'delivery_time': '14:59'}, 'morning'),
+    ({'delivery_date': '2026-02-09T16:00:00.000Z'}, 'evening'),
+    ({'order': {'delivery_time': '15:00:00'}}, 'evening'),
+    ({'delivery_date': '2026-02-09', 'customer_name': 'Bloemenhandel Jansen'}, 'morning'),
+    ({'customer_name': 'Jansen Avond'}, 'evening'),
+    ({'customer_name': 'Jansen zaterdag'}, 'evening'),
+    ({'customer': 'Afternoon Flowers'}, 'evening'),
+    ({'customer_name': 'Penning'}, 'evening'),
+    ({}, 'morning'),
+]
+
+
+@pytest.mark.parametrize('order, period', INFERRED_PERIODS)
+def test_infer_period(order, period):
+    assert infer_period(order) == period
+
+
+def test_route_lists_are_read_from_the_js():
+    lists = client_route_lists()
+    assert {'rijnsburg_morning', 'aalsmeer_evening', 'naaldwijk_evening'} <= set(lists)
+    assert 'A. Heemskerk' in lists['rijnsburg_morning']
+
+
+def test_known_client():
+    assert known_client('Superflora BV') == ('naaldwijk', 'morning')
+    assert known_client('Superflora avond') == ('naaldwijk', 'evening')
+    assert known_client('Plantion Naaldwijk') == ('late_delivery', None)
+    assert known_client('Nobody In The Lists') is None
+
+
+def test_single_list_beats_delivery_time():
+    # Penning is only on the Naaldwijk evening list
+    assert order_period({'customer_name': 'Penning', 'delivery_time': '08:00'}) == 'evening'
+
+
+def test_both_lists_follow_delivery_time():
+    # A. Heemskerk is on the Rijnsburg morning and evening lists
+    assert order_period({'customer_name': 'A. Heemskerk', 'delivery_time': '08:00'}) == 'morning'
+    assert order_period({'customer_name': 'A. Heemskerk', 'delivery_time': '17:30'}) == 'evening'
+
+
+def test_raw_orders_get_evening_routes():
+    df = read_orders_json(FIXTURES / 'orders' / '2026-02-09.json')
+    evening = df[df['Customer Name'] == 'Penning']
+    assert list(evening['Route Key'].unique()) == ['rijnsburg_evening']
+    assert set(evening['Period']) == {'EVENING'} and set(evening['Delivery Time']) == {'18:00'}
+    assert set(df.loc[df['Customer Name'] != 'Penning', 'Period']) == {'MORNING'}
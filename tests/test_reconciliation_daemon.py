@@ -0,0 +1,45 @@
+"""ResidentData: match scores as the mapping CSV writes them, and queries during a reload"""
+
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from generate_synthetic_data import generate
+from reconciliation_daemon import ResidentData, make_server
+
+
+@pytest.fixture(scope='module')
+def data(tmp_path_factory):
+    api_path, excel_path = generate(1000, tmp_path_factory.mktemp('daemon'))
+    data = ResidentData(str(excel_path), str(api_path), quiet=True)
+    data.refresh()
+    return data
+
+
+def test_unknown_customer_score_has_one_decimal(data):
+    route_key, names = next((route, names) for route, names in data.snapshot.api_customers.items() if names)
+    row = data.match_customer(names[0] + ' xx', route_key)['routes'][route_key]
+    assert row['API_Name']
+    assert row['Match_Score'].endswith('%') and len(row['Match_Score'].rstrip('%').split('.')[1]) == 1
+
+
+def test_refresh_does_not_wait_for_a_running_reload(data):
+    with data.reload_lock:
+        assert data.safe_refresh(force=True, wait=False) == ([], None)
+        assert data.status()['reloads'] == 1
+
+
+def test_queries_are_answered_during_a_reload(data):
+    server = make_server(data, port=0, poll=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # As if POST /reload were still loading
+        with data.reload_lock:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/status", timeout=5) as response:
+                assert json.load(response)['reloads'] == data.reloads
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,71 @@
+"""In-place runs of ExcelUpdater: no-op renames are not changes, and a repeated run touches nothing"""
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from update_excel_customers import CHANGES_LOG_SHEET, ExcelUpdater
+
+MAPPING = pd.DataFrame([
+    {'Route': 'aalsmeer_evening', 'Action': 'UPDATE_EXCEL', 'Excel_Name': 'Akkus', 'API_Name': 'Akkus', 'Match_Score': 100.0},
+    {'Route': 'aalsmeer_evening', 'Action': 'UPDATE_EXCEL', 'Excel_Name': 'Van Dijk ', 'API_Name': 'Van Dijk', 'Match_Score': 100.0},
+    {'Route': 'aalsmeer_evening', 'Action': 'UPDATE_EXCEL', 'Excel_Name': 'Bloem Jansen', 'API_Name': 'Bloemenhandel Jansen', 'Match_Score': 90.0},
+    {'Route': 'aalsmeer_evening', 'Action': 'ADD_TO_EXCEL', 'Excel_Name': None, 'API_Name': 'Nieuwe Klant', 'Match_Score': 0.0},
+])
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'Planningstabel.xlsx'
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Avond. Aalsmeer'
+    for row in [['Klant', 'Fust'], ['Akkus', 4], ['Van Dijk', 2], ['Bloem Jansen', 6]]:
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def store_files(store_dir):
+    return {path.relative_to(store_dir): path.read_bytes() for path in sorted(store_dir.rglob('*')) if path.is_file()}
+
+
+def run_in_place(excel_path, mapping, store_dir, streamed):
+    updater = ExcelUpdater(excel_path, mapping, store_dir)
+    assert updater.update_excel(review_required=False, streamed=streamed)
+    return updater
+
+
+def test_no_op_renames_are_not_compiled():
+    renames, additions = ExcelUpdater('unused.xlsx', MAPPING).compile_updates(MAPPING)['aalsmeer_evening']
+    assert renames == [('Bloem Jansen', 'Bloemenhandel Jansen')]
+    assert additions == ['Nieuwe Klant']
+
+
+@pytest.mark.parametrize('streamed', [False, True], ids=['patched', 'streamed'])
+def test_second_run_changes_nothing(workbook, tmp_path, streamed):
+    store_dir = tmp_path / 'backups'
+    first = run_in_place(workbook, MAPPING, store_dir, streamed)
+    assert [(change['Action'], change['New_Name']) for change in first.changes_log] == [
+        ('UPDATED', 'Bloemenhandel Jansen'), ('ADDED', 'Nieuwe Klant')
+    ]
+    wb = openpyxl.load_workbook(workbook)
+    assert [row[0] for row in wb['Avond. Aalsmeer'].iter_rows(min_row=2, values_only=True)] == [
+        'Akkus', 'Van Dijk', 'Bloemenhandel Jansen', 'Nieuwe Klant'
+    ]
+    assert wb[CHANGES_LOG_SHEET].max_row == 3
+
+    workbook_bytes = workbook.read_bytes()
+    backups = store_files(store_dir)
+    second = run_in_place(workbook, MAPPING, store_dir, streamed)
+    assert second.changes_log == [] and second.backup_path is None
+    assert workbook.read_bytes() == workbook_bytes
+    assert store_files(store_dir) == backups
+
+
+def test_only_no_op_renames_skip_the_save(workbook, tmp_path):
+    store_dir = tmp_path / 'backups'
+    workbook_bytes = workbook.read_bytes()
+    run_in_place(workbook, MAPPING.iloc[:2], store_dir, False)
+    assert workbook.read_bytes() == workbook_bytes
+    assert not store_dir.exists()
@@ -3,133 +3,339 @@
 EXCEL CUSTOMER UPDATE SCRIPT
 Updates Excel file with corrected customer names based on mapping
 
+The workbook is opened once with openpyxl and only the customer cells that
+are renamed or appended are written, so formatting and every other sheet
+are kept. Workbooks of STREAMED_WRITE_BYTES or more are copied row by row
+through a write-only workbook instead of being loaded whole. Backups go to
+a content-addressed store (backup_store.py), so an unchanged workbook is
+only hashed, not copied again.
+
 Usage:
     python update_excel_customers.py --excel Planningstabel_2_0__2_.xlsx --mapping customer_mapping.csv --output Planningstabel_2_0__2_UPDATED.xlsx
 """
 
 import pandas as pd
 import argparse
+import openpyxl
+import os
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
-import shutil
+from backup_store import BackupStore, DEFAULT_STORE_DIR
+from data_loaders import EVENING_SHEETS, column_customers, find_customer_column, header_labels
+from stage_profiler import StageProfiler, add_profile_arguments, profiler_from_args
+
+CHANGES_LOG_SHEET = 'Changes_Log'
+
+# Workbooks at least this large are streamed instead of loaded whole
+STREAMED_WRITE_BYTES = 20 * 1024 * 1024
 
 class ExcelUpdater:
-    def __init__(self, excel_path, mapping_path):
+    def __init__(self, excel_path, mapping_path, backup_dir=None, profiler=None):
         self.excel_path = excel_path
-        self.mapping_path = mapping_path
+        self.mapping_path = mapping_path  # mapping CSV, or the mapping DataFrame itself
         self.changes_log = []
+        self.sheet_customers = {}
+        self.profiler = profiler or StageProfiler(enabled=False)
         self.backup_path = None
+        self.backup_store = BackupStore(backup_dir or Path(excel_path).parent / DEFAULT_STORE_DIR)
         
     def create_backup(self):
-        """Create backup of original Excel file"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.backup_path = str(self.excel_path).replace('.xlsx', f'_BACKUP_{timestamp}.xlsx')
-        shutil.copy2(self.excel_path, self.backup_path)
-        print(f"✅ Created backup: {self.backup_path}")
+        """Back up the original Excel file into the backup store"""
+        entry = self.backup_store.backup(self.excel_path)
+        self.backup_path = str(self.backup_store.blob_dir / entry['blob'])
+        if entry['stored'] == 'existing':
+            print(f"✅ Backup {entry['digest'][:12]}: unchanged since an earlier backup, nothing copied")
+        else:
+            print(f"✅ Created backup {entry['digest'][:12]} ({entry['stored']}): {self.backup_path}")
         return self.backup_path
     
     def load_mapping(self):
-        """Load customer mapping from CSV"""
+        """Load customer mapping from CSV (a DataFrame is used as is)"""
         print("🔍 Loading customer mapping...")
-        df = pd.read_csv(self.mapping_path)
+        if isinstance(self.mapping_path, pd.DataFrame):
+            df = self.mapping_path
+        else:
+            df = pd.read_csv(self.mapping_path)
         print(f"   Loaded {len(df)} mapping entries")
         return df
     
-    def find_customer_column(self, df):
-        """Find the customer name column in Excel sheet"""
-        # Try common column names
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if any(term in col_lower for term in ['klant', 'customer', 'client', 'naam', 'name']):
-                return col
+    def select_updates(self, mapping_df, auto_update_high_confidence=True):
+        """Mapping rows to apply: UPDATE/ADD only, or REVIEW rows as well"""
+        if auto_update_high_confidence:
+            # Only auto-update high confidence matches
+            return mapping_df[mapping_df['Action'].isin(['UPDATE_EXCEL', 'ADD_TO_EXCEL'])].copy()
+        # Include all actions (user will review)
+        return mapping_df[mapping_df['Action'].isin(['UPDATE_EXCEL', 'ADD_TO_EXCEL', 'REVIEW'])].copy()
+    
+    def compile_updates(self, update_df):
+        """Compile the mapping into {route: (renames, additions)} in one pass
         
-        # If not found, use first column
-        if len(df.columns) > 0:
-            return df.columns[0]
+        renames is a list of (old name, new name) and additions a list of
+        names, both in mapping order. Renames to the same name (a score 100
+        match) are left out, so they never count as a change.
+        """
+        excel_names = update_df['Excel_Name'].where(update_df['Excel_Name'].notna(), '').astype(str)
+        api_names = update_df['API_Name'].astype(str)
+        is_rename = (update_df['Action'] == 'UPDATE_EXCEL') & (excel_names != '') & (excel_names.str.strip() != api_names.str.strip())
+        is_add = update_df['Action'] == 'ADD_TO_EXCEL'
         
-        return None
+        compiled = {}
+        for route, old_name, new_name in zip(update_df['Route'][is_rename], excel_names[is_rename], api_names[is_rename]):
+            compiled.setdefault(route, ([], []))[0].append((old_name, new_name))
+        for route, name in zip(update_df['Route'][is_add], api_names[is_add]):
+            compiled.setdefault(route, ([], []))[1].append(name)
+        return compiled
     
-    def update_customer_name(self, df, customer_col, old_name, new_name, route):
-        """Update customer name in DataFrame"""
-        mask = df[customer_col].astype(str).str.strip() == str(old_name).strip()
-        if mask.any():
-            df.loc[mask, customer_col] = new_name
+    def plan_sheet_changes(self, names, renames, additions, route_key):
+        """Work out the cell changes for one sheet's customer column in a single pass
+        
+        names are the column's values for the data rows. Renames apply in
+        mapping order (a renamed row can be renamed again), then additions
+        are checked against the renamed names in one set lookup each.
+        Returns ({row offset: new name}, [names to append]), logs every
+        change and keeps the sheet's resulting customers in sheet_customers.
+        """
+        rows_by_name = {}
+        for offset, name in enumerate(names):
+            if name is not None:
+                rows_by_name.setdefault(str(name).strip(), []).append(offset)
+        
+        changed = {}
+        for old_name, new_name in renames:
+            if old_name.strip() == new_name.strip():
+                # The cells already hold the new name
+                continue
+            rows = rows_by_name.pop(old_name.strip(), None)
+            if not rows:
+                continue
+            for offset in rows:
+                changed[offset] = new_name
+            rows_by_name.setdefault(new_name.strip(), []).extend(rows)
             self.changes_log.append({
-                'Route': route,
+                'Route': route_key,
                 'Action': 'UPDATED',
                 'Old_Name': old_name,
                 'New_Name': new_name,
-                'Rows_Affected': mask.sum()
+                'Rows_Affected': len(rows)
+            })
+            print(f"      ✅ Updated: '{old_name}' → '{new_name}'")
+        
+        existing = {name.lower() for name in rows_by_name}
+        added = []
+        for name in additions:
+            key = name.strip().lower()
+            if key in existing:
+                print(f"      ⏭️  Skipped (already exists): '{name}'")
+                continue
+            existing.add(key)
+            added.append(name)
+            self.changes_log.append({
+                'Route': route_key,
+                'Action': 'ADDED',
+                'Old_Name': '',
+                'New_Name': name,
+                'Rows_Affected': 1
             })
-            return True
-        return False
+            print(f"      ➕ Added: '{name}'")
+        
+        self.sheet_customers[route_key] = column_customers([changed.get(offset, name) for offset, name in enumerate(names)] + added)
+        return changed, added
     
-    def add_customer(self, df, customer_col, customer_name, route):
-        """Add new customer row to DataFrame"""
-        # Create new row
-        new_row = pd.Series(index=df.columns)
-        new_row[customer_col] = customer_name
+    def sort_order(self, rows, column):
+        """Row order with empty customers first, then customers alphabetically (case-insensitive)"""
+        def is_empty(row):
+            value = row[column] if column < len(row) else None
+            return value is None or str(value).strip() in ['', 'nan', 'NaN']
         
-        # Fill other columns with empty/default values
-        for col in df.columns:
-            if col != customer_col:
-                new_row[col] = ''
+        empty = [i for i, row in enumerate(rows) if is_empty(row)]
+        named = [i for i, row in enumerate(rows) if not is_empty(row)]
+        named.sort(key=lambda i: str(rows[i][column]).lower())
+        return empty + named
+    
+    def check_sorted_rows(self, ws, rows):
+        """Fail if the sorted sheet does not hold exactly the rows it held before the sort"""
+        width = max((len(row) for row in rows), default=0)
+        def key(row):
+            return tuple(row) + (None,) * (width - len(row))
+        written = ws.iter_rows(min_row=2, max_row=len(rows) + 1, max_col=width, values_only=True) if rows else ()
+        if Counter(key(row) for row in written) != Counter(key(row) for row in rows):
+            raise ValueError(f"Sorting sheet '{ws.title}' changed its rows")
+    
+    def patch_sheet(self, ws, route_key, renames, additions, sort=False):
+        """Write one sheet's renames and additions into its cells in place"""
+        header = next(ws.iter_rows(max_row=1, values_only=True), ())
+        column = find_customer_column(header)
+        if column is None:
+            print(f"      ⚠️  No customer column found, skipping")
+            return 0, 0
+        print(f"      Found customer column: {header_labels(header)[column]}")
         
-        # Append row
-        df = pd.concat([df, new_row.to_frame().T], ignore_index=True)
+        # Data rows end at the last row with any value (formatting alone doesn't count)
+        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        while rows and all(value is None for value in rows[-1]):
+            rows.pop()
         
-        self.changes_log.append({
-            'Route': route,
-            'Action': 'ADDED',
-            'Old_Name': '',
-            'New_Name': customer_name,
-            'Rows_Affected': 1
-        })
+        renames, added = self.plan_sheet_changes([row[column] if column < len(row) else None for row in rows], renames, additions, route_key)
+        for offset, name in renames.items():
+            ws.cell(row=offset + 2, column=column + 1, value=name)
+        for i, name in enumerate(added):
+            ws.cell(row=len(rows) + i + 2, column=column + 1, value=name)
         
-        return df
+        if sort and (renames or added):
+            # Only rows that change position are rewritten
+            rows = [list(row) for row in rows] + [[None] * (column + 1) for _ in added]
+            for offset, name in renames.items():
+                rows[offset][column] = name
+            for i, name in enumerate(added):
+                rows[len(rows) - len(added) + i][column] = name
+            for target, source in enumerate(self.sort_order(rows, column)):
+                if target != source:
+                    for col in range(max(len(rows[source]), len(rows[target]))):
+                        value = rows[source][col] if col < len(rows[source]) else None
+                        # Assigned, not passed to ws.cell(): value=None there leaves the old value
+                        ws.cell(row=target + 2, column=col + 1).value = value
+            self.check_sorted_rows(ws, rows)
+        
+        return len(renames), len(added)
     
-    def sort_customers(self, df, customer_col):
-        """Sort customers alphabetically"""
-        if customer_col and customer_col in df.columns:
-            # Sort by customer name, but preserve empty rows at top/bottom
-            df[customer_col] = df[customer_col].astype(str)
-            empty_mask = df[customer_col].isin(['', 'nan', 'NaN'])
+    def patch_workbook(self, updates, output_path, sort=False):
+        """Open the workbook once, patch only the changed cells and save once
+        
+        Every other cell, sheet and all formatting is left as it was.
+        """
+        with self.profiler.stage('load_workbook'):
+            wb = openpyxl.load_workbook(self.excel_path)
+        
+        for sheet_name, route_key in EVENING_SHEETS.items():
+            print(f"\n   Processing {sheet_name}...")
+            if sheet_name not in wb.sheetnames:
+                print(f"      ⚠️  Sheet '{sheet_name}' not found, skipping")
+                continue
             
-            # Separate empty and non-empty rows
-            empty_rows = df[empty_mask].copy()
-            non_empty_rows = df[~empty_mask].copy()
+            updates_count, adds_count = self.patch_sheet(wb[sheet_name], route_key, *updates.get(route_key, ([], [])), sort=sort)
+            print(f"      Summary: {updates_count} updated, {adds_count} added")
+        
+        if self.changes_log:
+            if CHANGES_LOG_SHEET in wb.sheetnames:
+                del wb[CHANGES_LOG_SHEET]
+            ws = wb.create_sheet(CHANGES_LOG_SHEET)
+            for row in self.changes_log_rows():
+                ws.append(row)
+        
+        with self.profiler.stage('save_workbook'):
+            self.save(wb, output_path)
+    
+    def stream_workbook(self, updates, output_path, sort=False):
+        """Copy the workbook row by row into a write-only workbook, patching the evening sheets
+        
+        For workbooks too large to load whole. Values and formulas are kept,
+        cell formatting is not. Only the evening sheets are held in memory.
+        """
+        source = openpyxl.load_workbook(self.excel_path, read_only=True)
+        wb = openpyxl.Workbook(write_only=True)
+        previous_log = None
+        try:
+            for sheet_name in source.sheetnames:
+                if sheet_name == CHANGES_LOG_SHEET:
+                    # Replaced by this run's log, if there are changes (decided at the end)
+                    previous_log = list(source[sheet_name].iter_rows(values_only=True))
+                    continue
+                ws = wb.create_sheet(sheet_name)
+                rows = source[sheet_name].iter_rows(values_only=True)
+                if sheet_name not in EVENING_SHEETS:
+                    for row in rows:
+                        ws.append(row)
+                    continue
+                
+                print(f"\n   Processing {sheet_name}...")
+                route_key = EVENING_SHEETS[sheet_name]
+                rows = [list(row) for row in rows]
+                header = rows[0] if rows else []
+                column = find_customer_column(header)
+                if column is None:
+                    print(f"      ⚠️  No customer column found, skipping")
+                    for row in rows:
+                        ws.append(row)
+                    continue
+                print(f"      Found customer column: {header_labels(header)[column]}")
+                
+                data = rows[1:]
+                while data and all(value is None for value in data[-1]):
+                    data.pop()
+                renames, added = self.plan_sheet_changes([row[column] if column < len(row) else None for row in data], *updates.get(route_key, ([], [])), route_key)
+                for offset, name in renames.items():
+                    data[offset][column] = name
+                for name in added:
+                    data.append([None] * column + [name])
+                if sort and (renames or added):
+                    data = [data[i] for i in self.sort_order(data, column)]
+                
+                ws.append(header)
+                for row in data:
+                    ws.append(row)
+                print(f"      Summary: {len(renames)} updated, {len(added)} added")
             
-            # Sort non-empty rows
-            if len(non_empty_rows) > 0:
-                non_empty_rows = non_empty_rows.sort_values(by=customer_col, key=lambda x: x.str.lower())
+            for sheet_name in EVENING_SHEETS:
+                if sheet_name not in source.sheetnames:
+                    print(f"\n   Processing {sheet_name}...")
+                    print(f"      ⚠️  Sheet '{sheet_name}' not found, skipping")
             
-            # Combine: empty rows first, then sorted non-empty
-            df = pd.concat([empty_rows, non_empty_rows], ignore_index=True)
+            if self.changes_log or previous_log is not None:
+                ws = wb.create_sheet(CHANGES_LOG_SHEET)
+                for row in self.changes_log_rows() if self.changes_log else previous_log:
+                    ws.append(row)
+        finally:
+            source.close()
         
-        return df
+        with self.profiler.stage('save_workbook'):
+            self.save(wb, output_path)
     
-    def update_excel(self, auto_update_high_confidence=True, review_required=True):
-        """Update Excel file with customer name changes"""
-        print("\n🔄 Updating Excel file...")
+    def changes_log_rows(self):
+        """Changes_Log sheet rows: header, then one row per change"""
+        columns = ['Route', 'Action', 'Old_Name', 'New_Name', 'Rows_Affected']
+        return [columns] + [[change[col] for col in columns] for change in self.changes_log]
+    
+    def save(self, wb, output_path):
+        """Save once, via a temporary file so a failed save never leaves a half-written workbook
         
-        # Create backup
-        self.create_backup()
+        When the Excel file itself is overwritten it is backed up first; a
+        run without changes leaves both the file and the backup store as
+        they were.
+        """
+        output_path = Path(output_path)
+        if output_path.resolve() == Path(self.excel_path).resolve():
+            if not self.changes_log:
+                print("\n   No changes, workbook left as it was")
+                if wb.write_only:
+                    # Finish the streamed sheets' temporary files, which openpyxl removes at exit
+                    for ws in wb.worksheets:
+                        ws.close()
+                return
+            with self.profiler.stage('create_backup'):
+                self.create_backup()
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+        try:
+            wb.save(tmp_path)
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+    
+    def update_excel(self, auto_update_high_confidence=True, review_required=True, output_path=None, sort=False, streamed=None):
+        """Update Excel file with customer name changes
         
-        # Load mapping
-        mapping_df = self.load_mapping()
+        Writes to output_path (default: the Excel file itself, backed up
+        before it is overwritten). Large workbooks (or streamed=True) go through the streamed
+        writer instead of being patched in place.
+        """
+        print("\n🔄 Updating Excel file...")
+        output_path = output_path or self.excel_path
         
-        # Filter mapping based on action
-        if auto_update_high_confidence:
-            # Only auto-update high confidence matches
-            update_df = mapping_df[
-                (mapping_df['Action'] == 'UPDATE_EXCEL') |
-                (mapping_df['Action'] == 'ADD_TO_EXCEL')
-            ].copy()
-        else:
-            # Include all actions (user will review)
-            update_df = mapping_df[
-                mapping_df['Action'].isin(['UPDATE_EXCEL', 'ADD_TO_EXCEL', 'REVIEW'])
-            ].copy()
+        # Load mapping
+        with self.profiler.stage('load_mapping') as counts:
+            mapping_df = self.load_mapping()
+            update_df = self.select_updates(mapping_df, auto_update_high_confidence)
+            counts.update(rows=len(mapping_df), updates=len(update_df))
         
         if review_required:
             # Show what will be changed
@@ -137,7 +343,7 @@ class ExcelUpdater:
             print("="*80)
             for _, row in update_df.iterrows():
                 action = row['Action']
-                excel_name = row['Excel_Name'] if pd.notna(row['Excel_Name']) else '(new)'
+                excel_name = row['Excel_Name'] if pd.notna(row['Excel_Name']) and row['Excel_Name'] != '' else '(new)'
                 api_name = row['API_Name']
                 route = row['Route']
                 
@@ -154,85 +360,23 @@ class ExcelUpdater:
                 print("❌ Update cancelled by user")
                 return False
         
-        # Sheet mapping
-        sheet_mapping = {
-            'aalsmeer_evening': 'Avond. Aalsmeer',
-            'naaldwijk_evening': 'Avond. Naaldwijk',
-            'rijnsburg_evening': 'Avond. Rijnsburg'
-        }
-        
-        # Open Excel file
-        xls = pd.ExcelFile(self.excel_path)
-        writer = pd.ExcelWriter(self.excel_path, engine='openpyxl')
+        if streamed is None:
+            streamed = os.path.getsize(self.excel_path) >= STREAMED_WRITE_BYTES
+        with self.profiler.stage('stream_workbook' if streamed else 'patch_workbook') as counts:
+            if streamed:
+                print("   Large workbook: streaming it into a new file (cell formatting is not kept)")
+                self.stream_workbook(self.compile_updates(update_df), output_path, sort)
+            else:
+                self.patch_workbook(self.compile_updates(update_df), output_path, sort)
+            counts['changes'] = len(self.changes_log)
         
-        # Process each sheet
-        for route_key, sheet_name in sheet_mapping.items():
-            print(f"\n   Processing {sheet_name}...")
-            
-            if sheet_name not in xls.sheet_names:
-                print(f"      ⚠️  Sheet '{sheet_name}' not found, skipping")
-                continue
-            
-            # Read sheet
-            df = pd.read_excel(self.excel_path, sheet_name=sheet_name)
-            
-            # Find customer column
-            customer_col = self.find_customer_column(df)
-            if not customer_col:
-                print(f"      ⚠️  No customer column found, skipping")
-                # Write unchanged sheet
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                continue
-            
-            print(f"      Found customer column: {customer_col}")
-            
-            # Get updates for this route
-            route_updates = update_df[update_df['Route'] == route_key]
-            
-            # Apply updates
-            updates_count = 0
-            adds_count = 0
-            
-            for _, update_row in route_updates.iterrows():
-                action = update_row['Action']
-                excel_name = update_row['Excel_Name'] if pd.notna(update_row['Excel_Name']) else ''
-                api_name = update_row['API_Name']
-                
-                if action == 'UPDATE_EXCEL' and excel_name:
-                    if self.update_customer_name(df, customer_col, excel_name, api_name, route_key):
-                        updates_count += 1
-                        print(f"      ✅ Updated: '{excel_name}' → '{api_name}'")
-                
-                elif action == 'ADD_TO_EXCEL':
-                    # Check if already exists
-                    if customer_col in df.columns:
-                        existing = df[customer_col].astype(str).str.strip().str.lower()
-                        if api_name.lower() not in existing.str.lower().values:
-                            df = self.add_customer(df, customer_col, api_name, route_key)
-                            adds_count += 1
-                            print(f"      ➕ Added: '{api_name}'")
-                        else:
-                            print(f"      ⏭️  Skipped (already exists): '{api_name}'")
-            
-            # Sort customers alphabetically
-            df = self.sort_customers(df, customer_col)
-            
-            # Write updated sheet
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            print(f"      Summary: {updates_count} updated, {adds_count} added")
-        
-        # Create changes log sheet
         if self.changes_log:
-            changes_df = pd.DataFrame(self.changes_log)
-            changes_df.to_excel(writer, sheet_name='Changes_Log', index=False)
             print(f"\n   📝 Created 'Changes_Log' sheet with {len(self.changes_log)} changes")
         
-        # Save
-        writer.close()
-        
         print(f"\n✅ Excel file updated successfully!")
-        print(f"📁 Backup saved: {self.backup_path}")
+        if self.backup_path:
+            print(f"📁 Backup saved: {self.backup_path}")
+            print(f"   Restore with: python backup_store.py --store {self.backup_store.store_dir} restore {Path(self.backup_path).stem[:12]}")
         print(f"📝 Changes log: {len(self.changes_log)} changes applied")
         
         return True
@@ -244,6 +388,10 @@ def main():
     parser.add_argument('--output', help='Output Excel file (default: overwrites original)')
     parser.add_argument('--auto-update', action='store_true', help='Auto-update high confidence matches without review')
     parser.add_argument('--no-review', action='store_true', help='Skip review prompt (use with caution)')
+    parser.add_argument('--backup-dir', help=f'Backup store for the original workbook (default: {DEFAULT_STORE_DIR} next to it)')
+    parser.add_argument('--sort', action='store_true', help='Re-sort each evening sheet alphabetically by customer after the changes')
+    parser.add_argument('--streamed', action='store_true', help=f'Stream the workbook into a new file instead of patching it in place (automatic from {STREAMED_WRITE_BYTES // (1024 * 1024)} MB; cell formatting is not kept)')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
@@ -265,19 +413,22 @@ def main():
     output_path = args.output or args.excel
     
     # Create updater
-    updater = ExcelUpdater(args.excel, args.mapping)
+    profiler = profiler_from_args(args, 'update_excel_customers')
+    updater = ExcelUpdater(args.excel, args.mapping, args.backup_dir, profiler)
     
     # Update Excel
     success = updater.update_excel(
         auto_update_high_confidence=args.auto_update,
-        review_required=not args.no_review
+        review_required=not args.no_review,
+        output_path=output_path,
+        sort=args.sort,
+        streamed=args.streamed or None
     )
+    profiler.finish()
     
     if success:
-        if args.output and args.output != args.excel:
-            # Copy to output path
-            shutil.copy2(args.excel, args.output)
-            print(f"📄 Saved updated file to: {args.output}")
+        if output_path != args.excel:
+            print(f"📄 Saved updated file to: {output_path}")
         
         print("\n✅ Update complete!")
         return 0